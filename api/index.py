@@ -1,7 +1,68 @@
-from flask import Flask, jsonify
+import math
+import os
+import sys
+from pathlib import Path
+
+from flask import Flask, Response, jsonify, request
+
+# Vercel runs this file with api/ as the script directory; make the project
+# packages (core, fs, monitor, ...) importable in that layout too.
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from core.errors import CommandError  # noqa: E402
+from core.pool import RouterPool, SessionNotFoundError  # noqa: E402
+from core.session_store import create_session_store  # noqa: E402
+from core.streaming import stream_command  # noqa: E402
 
 app = Flask(__name__)
 
+pool = RouterPool(
+    max_sessions=int(os.getenv("API_MAX_SESSIONS", "1024")),
+    idle_timeout=float(os.getenv("API_SESSION_IDLE_SECONDS", "900")),
+    store=create_session_store(),
+)
+
+
+def _response_payload(response, records=False):
+    payload = {
+        "stderr": response.stderr,
+        "status": response.status,
+        "cwd": str(response.new_cwd) if response.new_cwd is not None else None,
+        "exec_ms": float(response.meta_value("exec_ms", 0.0)),
+    }
+    if records and response.records is not None:
+        # Structured commands hand back their rows; the text is never built.
+        payload["records"] = response.records.as_dicts()
+    else:
+        payload["stdout"] = response.stdout
+        if records:
+            payload["records"] = None
+    for key in ("rusage", "queue_ms", "cursor", "page", "pages", "retry_after"):
+        value = response.meta_value(key)
+        if value is not None:
+            payload[key] = value
+    return payload
+
+
+def _compact_result(index, response):
+    result = {"i": index, "status": response.status}
+    if response.stdout:
+        result["stdout"] = response.stdout
+    if response.stderr:
+        result["stderr"] = response.stderr
+    return result
+
+
+def _session_not_found(error):
+    return jsonify({"error": str(error)}), 404
+
+
+def _bad_request(message):
+    return jsonify({"error": message}), 400
+
+
 @app.route('/')
 def home():
     return jsonify({
@@ -11,7 +72,12 @@ def home():
         "endpoints": [
             "/",
             "/health",
-            "/info"
+            "/info",
+            "/api/sessions",
+            "/api/sessions/<session_id>/execute",
+            "/api/sessions/<session_id>/batch",
+            "/api/sessions/<session_id>/history",
+            "/api/sessions/<session_id>/stream",
         ]
     })
 
@@ -19,7 +85,8 @@ def home():
 def health():
     return jsonify({
         "status": "healthy",
-        "timestamp": "2025-09-21"
+        "timestamp": "2025-09-21",
+        "sessions": len(pool),
     })
 
 @app.route('/info')
@@ -31,8 +98,114 @@ def info():
         "repository": "https://github.com/hiiiHimanshu/codemate-hackathon"
     })
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
+
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    entry = pool.create()
+    return jsonify({
+        "session_id": entry.session.session_id,
+        "cwd": str(entry.session.cwd),
+    }), 201
+
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    if not pool.discard(session_id):
+        return _session_not_found(SessionNotFoundError(f"Unknown session: {session_id}"))
+    return jsonify({"session_id": session_id, "deleted": True})
+
+
+@app.route('/api/sessions/<session_id>/execute', methods=['POST'])
+def execute_command(session_id):
+    payload = request.get_json(silent=True) or {}
+    command = payload.get("command")
+    cursor = payload.get("cursor")
+    if cursor is not None:
+        if not isinstance(cursor, str):
+            return _bad_request("Field 'cursor' must be a string.")
+    elif not isinstance(command, str):
+        return _bad_request("Field 'command' must be a string.")
+    records = bool(payload.get("records", False))
+    try:
+        entry = pool.get(session_id)
+    except SessionNotFoundError as exc:
+        return _session_not_found(exc)
+    if cursor is None:
+        # Unbalanced quotes are the client's mistake, as in a batch.
+        try:
+            entry.router.parse_input(command)
+        except ValueError as exc:
+            return _bad_request(f"Invalid syntax in {command.strip()!r}: {exc}")
+    with entry.lock:
+        if cursor is not None:
+            response = entry.router.more(cursor)
+        else:
+            # Rows are returned whole; only text output is paged.
+            response = entry.router.execute(command, paginate=not records)
+        pool.commit(entry)
+    result = jsonify(_response_payload(response, records=records))
+    retry_after = response.meta_value("retry_after")
+    if retry_after is not None:
+        # Rate limited or throttled: nothing ran, so tell the client when to come back.
+        result.status_code = 429
+        result.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return result
+
+
+@app.route('/api/sessions/<session_id>/batch', methods=['POST'])
+def execute_batch(session_id):
+    payload = request.get_json(silent=True) or {}
+    commands = payload.get("commands")
+    if not isinstance(commands, list) or not all(isinstance(cmd, str) for cmd in commands):
+        return _bad_request("Field 'commands' must be a list of strings.")
+    stop_on_error = bool(payload.get("stop_on_error", True))
+    try:
+        entry = pool.get(session_id)
+    except SessionNotFoundError as exc:
+        return _session_not_found(exc)
+    try:
+        with entry.lock:
+            batch = entry.router.execute_batch(commands, stop_on_error=stop_on_error)
+            pool.commit(entry)
+    except CommandError as exc:
+        return _bad_request(str(exc))
+    return jsonify({
+        "status": batch.status,
+        "cwd": str(batch.cwd) if batch.cwd is not None else None,
+        "results": [_compact_result(idx, response) for idx, response in enumerate(batch.results)],
+        "timing": batch.timing,
+    })
+
+
+@app.route('/api/sessions/<session_id>/stream', methods=['GET', 'POST'])
+def stream_execute(session_id):
+    # GET keeps the endpoint usable from a browser EventSource.
+    if request.method == 'GET':
+        command = request.args.get("command")
+    else:
+        command = (request.get_json(silent=True) or {}).get("command")
+    if not isinstance(command, str):
+        return _bad_request("Field 'command' must be a string.")
+    try:
+        entry = pool.get(session_id)
+    except SessionNotFoundError as exc:
+        return _session_not_found(exc)
+    return Response(
+        stream_command(entry.router, command, lock=entry.lock, on_done=lambda: pool.commit(entry)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route('/api/sessions/<session_id>/history', methods=['GET'])
+def session_history(session_id):
+    try:
+        entry = pool.get(session_id)
+    except SessionNotFoundError as exc:
+        return _session_not_found(exc)
+    with entry.lock:
+        history = list(entry.session.history)
+    return jsonify({"session_id": session_id, "history": history})
 
 
 # Error handler for all exceptions
@@ -2,21 +2,25 @@
 
 from __future__ import annotations
 
+import getpass
 import os
 from pathlib import Path
 from typing import Dict
 
 import streamlit as st
 
+from core.history import HistoryStore
 from core.registry import create_default_registry
 from core.router import CommandRouter
 from core.session import SessionContext
+from core.session_store import SessionState, SessionStore, commit_state, create_session_store
 
 # Initialize workspace root
 WORKSPACE_ROOT = Path(os.getenv("WORKSPACE_ROOT", "./workspace")).resolve()
 WORKSPACE_ROOT.mkdir(parents=True, exist_ok=True)
 from monitor import stats as monitor_stats
-from ui.render import emit_stdout, emit_stderr, format_status
+from ui.render import format_status
+from ui.scrollback import Scrollback
 
 
 def safe_rerun() -> None:
@@ -26,17 +30,76 @@ def safe_rerun() -> None:
         rerun()
 
 
+def _current_user() -> str:
+    user = os.getenv("CODEMATE_USER")
+    if user:
+        return user
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "default"
+
+
+@st.cache_resource
+def _history_store(user: str) -> HistoryStore:
+    return HistoryStore(user)
+
+
+@st.cache_resource
+def _session_store() -> SessionStore:
+    return create_session_store()
+
+
+def _query_session_id() -> str:
+    params = getattr(st, "query_params", None)
+    if params is not None:
+        return params.get("sid", "")
+    legacy = st.experimental_get_query_params().get("sid", [""])
+    return legacy[0] if legacy else ""
+
+
+def _set_query_session_id(session_id: str) -> None:
+    params = getattr(st, "query_params", None)
+    if params is not None:
+        params["sid"] = session_id
+    else:
+        st.experimental_set_query_params(sid=session_id)
+
+
 def _bootstrap_router() -> CommandRouter:
     registry = create_default_registry()
-    session = SessionContext(cwd=WORKSPACE_ROOT)
+    session = SessionContext(cwd=WORKSPACE_ROOT, history_store=_history_store(_current_user()))
+    # A session id in the URL survives a reconnect to another worker process.
+    session_id = _query_session_id()
+    state = _session_store().load(session_id) if session_id else None
+    if state is not None:
+        session.session_id = session_id
+        state.apply(session, WORKSPACE_ROOT)
+        st.session_state.session_version = state.version
+        st.session_state.session_synced = list(state.history)
+    _set_query_session_id(session.session_id)
     return CommandRouter(registry, session)
 
 
+def _save_session(router: CommandRouter) -> None:
+    captured = SessionState.capture(router.session, WORKSPACE_ROOT, st.session_state.get("session_version", 0))
+    stored = commit_state(_session_store(), captured, st.session_state.get("session_synced", []))
+    if stored is None:
+        return
+    if stored is not captured:
+        # Another worker changed this session meanwhile; pick up its history.
+        stored.apply(router.session, WORKSPACE_ROOT)
+    st.session_state.session_version = stored.version
+    st.session_state.session_synced = list(stored.history)
+
+
 def init_session_state() -> None:
     if "router" not in st.session_state:
         st.session_state.router = _bootstrap_router()
     if "scrollback" not in st.session_state:
-        st.session_state.scrollback = []  # list[tuple[str,str]]
+        st.session_state.scrollback = Scrollback()
+    if "scrollback_pages" not in st.session_state:
+        st.session_state.scrollback_pages = 1
     if "last_exec_time" not in st.session_state:
         st.session_state.last_exec_time = 0.0
     if "last_status" not in st.session_state:
@@ -49,7 +112,7 @@ def execute_command(command: str) -> Dict[str, str]:
     router: CommandRouter = st.session_state.router
     response = router.execute(command)
 
-    exec_ms = float(response.meta.get("exec_ms", 0.0)) if response.meta else 0.0
+    exec_ms = float(response.meta_value("exec_ms", 0.0))
 
     if response.new_cwd is not None:
         router.session.cwd = response.new_cwd
@@ -58,10 +121,16 @@ def execute_command(command: str) -> Dict[str, str]:
         st.session_state.scrollback.append(("err", response.stderr))
     if response.stdout:
         st.session_state.scrollback.append(("out", response.stdout))
+    cursor = response.meta_value("cursor")
+    if cursor is not None:
+        page, pages = response.meta_value("page"), response.meta_value("pages")
+        st.session_state.scrollback.append(("out", f"-- page {page}/{pages}: `more {cursor}` for the next --"))
 
     st.session_state.last_exec_time = exec_ms
     st.session_state.last_status = response.status
+    st.session_state.scrollback_pages = 1
     st.session_state.router = router
+    _save_session(router)
 
     return {
         "stdout": response.stdout,
@@ -99,13 +168,14 @@ def main() -> None:
             safe_rerun()
 
         st.subheader("Output")
-        for channel, payload in st.session_state.scrollback:
-            if channel == "err":
-                block = emit_stderr(payload)
-            else:
-                block = emit_stdout(payload)
-            if block:
-                st.markdown(block, unsafe_allow_html=True)
+        scrollback: Scrollback = st.session_state.scrollback
+        pages = st.session_state.scrollback_pages
+        if scrollback.has_older(pages) and st.button("Load older output"):
+            st.session_state.scrollback_pages = pages + 1
+            safe_rerun()
+        html = scrollback.render(pages)
+        if html:
+            st.markdown(html, unsafe_allow_html=True)
 
         st.markdown("---")
         st.caption(format_status(st.session_state.last_status, st.session_state.last_exec_time))
@@ -115,6 +185,7 @@ def main() -> None:
         st.text(monitor_stats.cpu())
         st.text(monitor_stats.mem())
         st.text(monitor_stats.disk())
+        st.text(monitor_stats.scrollback(st.session_state.scrollback.memory_usage()))
 
         st.subheader("Top Processes")
         st.code(monitor_stats.ps(5) or "No data")
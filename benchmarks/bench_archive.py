@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Benchmark archive/extract: parallel gzip members vs. one single-threaded gzip stream."""
+
+import os
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.session import SessionContext  # noqa: E402
+from fs import archive, paths  # noqa: E402
+
+TREE_MB = int(os.getenv("BENCH_TREE_MB", "512"))
+FILES = int(os.getenv("BENCH_FILES", "128"))
+
+
+def build(root: Path) -> None:
+    size = TREE_MB * 1024 * 1024 // FILES
+    # Half random, half text, so there is something to compress.
+    noise = os.urandom(size // 2)
+    text = (b"2024-01-01 INFO request served in 12 ms\n" * (size // 80 + 1))[: size - len(noise)]
+    for idx in range(FILES):
+        directory = root / "tree" / f"d{idx % 8}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"f{idx:04d}.log").write_bytes(noise + text)
+
+
+def report(label: str, nbytes: int, elapsed: float, size: int) -> None:
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {nbytes / 1048576 / elapsed:8.1f} MiB/s  -> {size / 1048576:8.1f} MiB")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths.WORKSPACE_ROOT = root
+        build(root)
+        ctx = SessionContext(cwd=root)
+        total = TREE_MB * 1024 * 1024
+
+        t0 = time.perf_counter()
+        with tarfile.open(root / "serial.tar.gz", "w:gz", compresslevel=archive.COMPRESS_LEVEL) as bundle:
+            bundle.add(root / "tree", "tree")
+        report("tarfile w:gz (1 thread)", total, time.perf_counter() - t0, (root / "serial.tar.gz").stat().st_size)
+
+        meta = archive.archive_handler(ctx, ["parallel.tar.gz", "tree"]).meta
+        report(
+            f"archive ({archive.ARCHIVE_WORKERS} workers)",
+            meta["bytes"],
+            meta["elapsed_ms"] / 1000,
+            meta["archive_bytes"],
+        )
+        meta = archive.extract_handler(ctx, ["parallel.tar.gz", "restored"]).meta
+        report("extract", meta["bytes"], meta["elapsed_ms"] / 1000, meta["bytes"])
+
+
+if __name__ == "__main__":
+    main()
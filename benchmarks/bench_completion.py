@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Benchmark path completion against a directory with 100k entries."""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ENTRIES = int(os.getenv("BENCH_ENTRIES", "100000"))
+QUERIES = ["rep", "report_1", "r9", "dt", "zzz", "data_00042", "rpt9"]
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["WORKSPACE_ROOT"] = tmp
+        from core.registry import create_default_registry
+        from ui.completion import CompletionEngine
+
+        big = Path(tmp) / "big"
+        big.mkdir()
+        for idx in range(ENTRIES):
+            prefix = ("report", "data", "notes", "img")[idx % 4]
+            (big / f"{prefix}_{idx:06d}.txt").touch()
+
+        engine = CompletionEngine(create_default_registry())
+        start = time.perf_counter()
+        engine.complete_path("big/", Path(tmp))
+        print(f"cold listing of {ENTRIES} entries: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        for query in QUERIES:
+            samples = []
+            for _ in range(50):
+                t0 = time.perf_counter()
+                results = engine.complete_path(f"big/{query}", Path(tmp), limit=10)
+                samples.append(time.perf_counter() - t0)
+            samples.sort()
+            print(
+                f"{query!r:>14}: median {statistics.median(samples) * 1e6:8.1f}us  "
+                f"p99 {samples[int(len(samples) * 0.99) - 1] * 1e6:8.1f}us  top={results[:2]}"
+            )
+
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            engine.complete_command("c")
+        print(f"command prefix: {(time.perf_counter() - t0) * 1e3:.3f}us per call")
+
+
+if __name__ == "__main__":
+    main()
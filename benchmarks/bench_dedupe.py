@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark dedupe's staged hashing against fully hashing every file.
+
+The tree mixes unique files, same-size files that differ near the start, and
+true copies, roughly what ``cp -r`` leaves behind in a workspace.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.session import SessionContext  # noqa: E402
+from fs import dedupe, hashing, paths  # noqa: E402
+
+FILES = int(os.getenv("BENCH_FILES", "2000"))
+FILE_KB = int(os.getenv("BENCH_FILE_KB", "512"))
+
+
+def build(root: Path) -> None:
+    body = os.urandom(FILE_KB * 1024)
+    for idx in range(FILES):
+        directory = root / "tree" / f"d{idx % 32:02d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        if idx % 4 == 0:
+            data = body  # a copy
+        elif idx % 4 == 1:
+            data = idx.to_bytes(4, "big") + body[4:]  # same size, different head
+        else:
+            data = body[: len(body) - idx]  # unique size
+        (directory / f"f{idx:05d}.bin").write_bytes(data)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths.WORKSPACE_ROOT = root
+        hashing.HASH_CACHE_PATH = ""
+        build(root)
+
+        t0 = time.perf_counter()
+        files = dedupe.scan(root / "tree", "tree", hashing.HASH_WORKERS)
+        hashing.hash_files([info.path for info in files], "sha256", None)
+        full = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        output = dedupe.dedupe_handler(SessionContext(cwd=root), ["tree"])
+        staged = time.perf_counter() - t0
+        meta = output.meta
+        print(f"{'hash every file':<18} {len(files):>6} full reads  {full * 1000:9.1f} ms")
+        print(f"{'dedupe (staged)':<18} {meta['full_hashed']:>6} full reads  {staged * 1000:9.1f} ms"
+              f"  ({meta['edge_hashed']} edge hashes, {meta['duplicate_groups']} groups)")
+
+
+if __name__ == "__main__":
+    main()
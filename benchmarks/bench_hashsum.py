@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark hashsum on a tree of files: one worker, many workers, and a warm cache."""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.session import SessionContext  # noqa: E402
+from fs import hashing, paths  # noqa: E402
+
+TREE_MB = int(os.getenv("BENCH_TREE_MB", "1024"))
+FILES = int(os.getenv("BENCH_FILES", "256"))
+
+
+def build(root: Path) -> None:
+    size = TREE_MB * 1024 * 1024 // FILES
+    block = os.urandom(min(size, 1024 * 1024))
+    for idx in range(FILES):
+        directory = root / "tree" / f"d{idx % 16:02d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / f"f{idx:05d}.bin", "wb") as handle:
+            written = 0
+            while written < size:
+                written += handle.write(block[: size - written])
+    # Old enough that the cache accepts them.
+    past = time.time() - 3600
+    for path in (root / "tree").rglob("*.bin"):
+        os.utime(path, (past, past))
+
+
+def run(label: str, root: Path) -> None:
+    t0 = time.perf_counter()
+    rows = hashing.hashsum_handler(SessionContext(cwd=root), ["tree"]).rows
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<24} {len(rows):>6} files  {elapsed * 1000:9.1f} ms  {TREE_MB / elapsed:8.1f} MiB/s")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths.WORKSPACE_ROOT = root
+        build(root)
+        default_workers = hashing.HASH_WORKERS
+
+        hashing.HASH_WORKERS = 1
+        hashing._cache = None
+        hashing.HASH_CACHE_PATH = ""
+        run("cold, 1 worker", root)
+
+        hashing.HASH_WORKERS = default_workers
+        hashing.HASH_CACHE_PATH = str(root / "hashes.db")
+        run(f"cold, {default_workers} workers", root)
+        run("warm cache", root)
+
+
+if __name__ == "__main__":
+    main()
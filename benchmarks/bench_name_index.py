@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark fuzzy name lookups against a 500k-entry name index."""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ENTRIES = int(os.getenv("BENCH_ENTRIES", "500000"))
+QUERIES = ["readme", "report_0421", "reprot_0421", "archive", "notes_9", "img_1234.png", "zzzz", "docs/plan"]
+WORDS = ["report", "notes", "img", "data", "plan", "draft", "summary", "archive"]
+
+
+def main() -> None:
+    from fs.name_index import NameIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NameIndex(Path(tmp))
+        rng = random.Random(3)
+        start = time.perf_counter()
+        # Entries are inserted directly: creating 500k real files would dominate the run.
+        dirs = [f"d{idx:03d}" for idx in range(1000)]
+        for name in dirs:
+            index._insert(name, True)
+        index._insert("docs", True)
+        index._insert("docs/plan.md", False)
+        index._insert("README.md", False)
+        for idx in range(ENTRIES - len(dirs) - 3):
+            word = rng.choice(WORDS)
+            ext = rng.choice(["txt", "md", "png", "csv"])
+            index._insert(f"{rng.choice(dirs)}/{word}_{idx:06d}.{ext}", False)
+        index.built = True
+        print(f"indexed {len(index)} names in {(time.perf_counter() - start):.1f}s")
+
+        for query in QUERIES:
+            samples = []
+            for _ in range(30):
+                t0 = time.perf_counter()
+                matches = index.lookup(query, Path(tmp))
+                samples.append(time.perf_counter() - t0)
+            samples.sort()
+            best = matches[0].path.name if matches else "-"
+            print(
+                f"{query!r:<16} median {statistics.median(samples) * 1000:6.2f}ms  "
+                f"max {samples[-1] * 1000:6.2f}ms  best {best}"
+            )
+
+
+if __name__ == "__main__":
+    main()
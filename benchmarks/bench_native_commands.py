@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark per-invocation latency of native vs. forked whitelisted commands."""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+RUNS = int(os.getenv("BENCH_RUNS", "200"))
+COMMANDS = [
+    ["echo", "hello"],
+    ["basename", "/a/b/report.txt", ".txt"],
+    ["dirname", "/a/b/report.txt"],
+    ["whoami"],
+    ["date", "+%Y-%m-%d"],
+    ["stat", "-c", "%s %a", "notes.txt"],
+    ["head", "-n", "5", "notes.txt"],
+    ["tail", "-n", "5", "notes.txt"],
+]
+
+
+def _median_ms(command, cwd, native):
+    from core.subprocess_adapter import run_command
+
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        run_command(command, cwd=cwd, native=native)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["WORKSPACE_ROOT"] = tmp
+        from fs import paths
+
+        paths.WORKSPACE_ROOT = Path(tmp).resolve()
+        cwd = paths.WORKSPACE_ROOT
+        (cwd / "notes.txt").write_text("".join(f"note {idx}\n" for idx in range(10000)))
+        for command in COMMANDS:
+            forked = _median_ms(command, cwd, native=False)
+            native = _median_ms(command, cwd, native=True)
+            print(
+                f"{' '.join(command):<32} fork+exec {forked:7.3f}ms  native {native:7.3f}ms  "
+                f"{forked / native:6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark NL classification and parsing over a corpus of generated phrases."""
+
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PHRASES = int(os.getenv("BENCH_PHRASES", "5000"))
+TEMPLATES = [
+    "create a folder called {name}",
+    "please create new folder named {name}",
+    "move {name}.txt to {dir}",
+    "could you move {name} into {dir}",
+    "list files",
+    "list everything in {dir}",
+    "show {name}.md",
+    "delete {name} now",
+    "find the biggest file in {dir}",
+    "ls -l {dir}",
+    "cat {name}.txt",
+    "mkdir {name}",
+    "this sentence matches nothing {name}",
+]
+WORDS = ["alpha", "beta", "gamma", "docs", "src", "build", "notes", "report", "data", "logs"]
+
+
+def corpus(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        lines.append(template.format(name=f"{rng.choice(WORDS)}{rng.randrange(200)}", dir=rng.choice(WORDS)))
+    return lines
+
+
+def measure(label: str, func, lines: list) -> None:
+    samples = []
+    for line in lines:
+        t0 = time.perf_counter()
+        func(line)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for line in lines:
+        func(line)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    print(
+        f"{label:<28} mean {statistics.mean(samples) * 1e6:8.2f}us  "
+        f"p99 {samples[int(len(samples) * 0.99)] * 1e6:8.2f}us  "
+        f"retained blocks {allocations}"
+    )
+
+
+def main() -> None:
+    from nl.parser import NLParser
+
+    lines = corpus(PHRASES)
+    print(f"{len(lines)} phrases, {len(set(lines))} distinct")
+
+    parser = NLParser()
+    measure("classify_as_nl", parser.classify_as_nl, lines)
+    measure("parse (cold cache)", NLParser().parse, lines)
+    for line in lines:
+        parser.parse(line)
+    measure("parse (warm cache)", parser.parse, lines)
+    print(f"cache: {parser.cache_info()}")
+
+    # Every call goes through the cache, so check the combined regex on its own too.
+    uncached = NLParser()
+    measure("parse (cache bypassed)", uncached._parse_normalized, lines)
+
+    start = time.perf_counter()
+    uncached.parse_many(lines)
+    elapsed = time.perf_counter() - start
+    print(f"{'parse_many':<28} mean {elapsed / len(lines) * 1e6:8.2f}us  total {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark the sort builtin on inputs larger than its memory budget.
+
+Each case runs in a fresh process so peak RSS can be compared with a plain
+in-memory ``sorted(readlines())``.
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FILE_MB = int(os.getenv("BENCH_FILE_MB", "256"))
+BUDGET_MB = int(os.getenv("BENCH_BUDGET_MB", "32"))
+
+CHILD = r"""
+import resource, sys, time
+from pathlib import Path
+sys.path.insert(0, {project!r})
+mode, root = sys.argv[1], Path(sys.argv[2])
+t0 = time.perf_counter()
+if mode == "in-memory":
+    with open(root / "data.txt") as handle:
+        lines = sorted(handle)
+    with open(root / "out.txt", "w") as handle:
+        handle.writelines(lines)
+    runs = 0
+else:
+    from core.session import SessionContext
+    from fs import paths, sortops
+    paths.WORKSPACE_ROOT = root
+    sortops.SORT_MEMORY_BYTES = {budget}
+    args = ["-n", "-k", "2"] if mode == "sort -n -k 2" else []
+    runs = sortops.sort_handler(SessionContext(cwd=root), args + ["-o", "out.txt", "data.txt"]).meta["sort_runs"]
+elapsed = time.perf_counter() - t0
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{{mode:<16}} {{elapsed:8.2f}}s  runs {{runs:4d}}  peak RSS {{peak:8.1f}} MiB")
+"""
+
+
+def main() -> None:
+    project = str(Path(__file__).resolve().parent.parent)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp).resolve()
+        rng = random.Random(1)
+        target = FILE_MB * 1024 * 1024
+        written = 0
+        with (root / "data.txt").open("w") as handle:
+            while written < target:
+                line = f"host-{rng.randrange(1000):03d} {rng.randrange(10**9)} GET /items/{rng.randrange(10**6)}\n"
+                written += handle.write(line)
+        print(f"{FILE_MB} MiB input, {BUDGET_MB} MiB sort budget")
+        script = CHILD.format(project=project, budget=BUDGET_MB * 1024 * 1024)
+        for mode in ("in-memory", "sort", "sort -n -k 2"):
+            subprocess.run([sys.executable, "-c", script, mode, str(root)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark structured (records) vs. text output for ``ls`` and ``ps``.
+
+The "text" column is the pre-records path: build every line eagerly and wrap
+it in a response. The "records" columns run the current handlers, once with
+the text materialised and once read as rows only (what API clients with
+``"records": true`` get).
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ENTRIES = int(os.getenv("BENCH_ENTRIES", "100000"))
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+
+
+def _legacy_ls(target: Path) -> str:
+    entries = []
+    for item in sorted(target.iterdir(), key=lambda p: p.name.lower()):
+        if item.name.startswith("."):
+            continue
+        entries.append(f"{item.name}/" if item.is_dir() else item.name)
+    return "\n".join(entries)
+
+
+def _measure(label, fn):
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} median {statistics.median(samples) * 1000:9.2f}ms  peak alloc {peak / 1024:9.1f} KiB")
+
+
+def main() -> None:
+    from core.router import Response
+    from core.session import SessionContext
+    from fs import ops, paths
+    from monitor import stats
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp).resolve()
+        paths.WORKSPACE_ROOT = root
+        for idx in range(ENTRIES):
+            if idx % 10 == 0:
+                (root / f"dir_{idx:06d}").mkdir()
+            else:
+                (root / f"file_{idx:06d}.txt").touch()
+        ctx = SessionContext(cwd=root)
+
+        print(f"ls on {ENTRIES} entries")
+        _measure("text (eager)", lambda: Response(stdout=_legacy_ls(root)).stdout)
+        _measure("records -> text", lambda: Response(records=ops.ls_handler(ctx, [])).stdout)
+        _measure("records only", lambda: Response(records=ops.ls_handler(ctx, [])).records.rows)
+        _measure("records -> json", lambda: ops.ls_handler(ctx, []).to_json())
+
+    print("ps (all processes)")
+    _measure("text (eager)", lambda: Response(stdout=stats.ps(top_n=10**6)).stdout)
+    _measure("records only", lambda: stats.ps_rows(top_n=10**6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Benchmark head/tail/wc builtins against reading the whole file on a large log."""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FILE_MB = int(os.getenv("BENCH_FILE_MB", "1024"))
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+
+
+def _median_ms(fn):
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    from core.session import SessionContext
+    from fs import paths, textops
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp).resolve()
+        paths.WORKSPACE_ROOT = root
+        line = b"2024-01-01T00:00:00Z INFO request handled in 12ms path=/api/items status=200\n"
+        block = line * (1024 * 1024 // len(line))
+        with (root / "big.log").open("wb") as handle:
+            for _ in range(FILE_MB):
+                handle.write(block)
+        ctx = SessionContext(cwd=root)
+
+        print(f"{FILE_MB} MiB log")
+        print(f"{'read whole file (cat)':<24} {_median_ms(lambda: (root / 'big.log').read_bytes()):10.2f}ms")
+        print(f"{'head -n 100':<24} {_median_ms(lambda: textops.head_handler(ctx, ['-n', '100', 'big.log'])):10.2f}ms")
+        print(f"{'tail -n 100':<24} {_median_ms(lambda: textops.tail_handler(ctx, ['-n', '100', 'big.log'])):10.2f}ms")
+        print(f"{'tail -n 100000':<24} {_median_ms(lambda: textops.tail_handler(ctx, ['-n', '100000', 'big.log'])):10.2f}ms")
+        print(f"{'wc -l':<24} {_median_ms(lambda: textops.wc_handler(ctx, ['-l', 'big.log']).text()):10.2f}ms")
+        print(f"{'wc':<24} {_median_ms(lambda: textops.wc_handler(ctx, ['big.log']).text()):10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Dict, Optional
 
 
 class CommandError(Exception):
@@ -22,6 +22,30 @@ class ArgumentError(CommandError):
     """Raised when command arguments are invalid."""
 
 
+class CommandFailedError(CommandError):
+    """Raised when a command fails after producing output worth keeping."""
+
+    def __init__(
+        self, message: str, stdout: str = "", stderr: str = "", meta: Optional[Dict[str, Any]] = None
+    ) -> None:
+        super().__init__(message)
+        self.stdout = stdout
+        self.stderr = stderr
+        self.meta = dict(meta or {})
+
+
+class CommandTimeoutError(CommandFailedError):
+    """Raised when a command is killed for running too long; carries its partial output."""
+
+
+class SessionThrottledError(CommandError):
+    """Raised when a session has used up its recent resource budget."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def map_exception_to_message(exception: Exception) -> str:
     """Translate exceptions into user-facing error strings."""
     if isinstance(exception, CommandError):
@@ -0,0 +1,258 @@
+"""Persistent per-user command history with substring search and frecency."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import IO, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+try:  # pragma: no cover - not available on Windows
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+__all__ = ["HistoryEntry", "HistoryStore", "DEFAULT_HISTORY_DIR", "frecency_weight"]
+
+DEFAULT_HISTORY_DIR = Path(os.getenv("HISTORY_DIR", "~/.codemate/history")).expanduser()
+NGRAM = 3
+
+HistoryEntry = Tuple[int, float, str]
+
+_SAFE_USER = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def frecency_weight(age_seconds: float) -> float:
+    """Weight of one use of a command given how long ago it happened."""
+    if age_seconds < 3600:
+        return 4.0
+    if age_seconds < 86400:
+        return 2.0
+    if age_seconds < 7 * 86400:
+        return 1.0
+    return 0.5
+
+
+def _ngrams(text: str) -> Set[str]:
+    lowered = text.lower()
+    return {lowered[idx:idx + NGRAM] for idx in range(len(lowered) - NGRAM + 1)}
+
+
+class _FileLock:
+    def __init__(self, handle: IO[bytes]) -> None:
+        self._handle = handle
+
+    def __enter__(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exc) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+
+
+class HistoryStore:
+    """Append-only history log for one user.
+
+    ``<user>.log`` holds one JSON ``[timestamp, command]`` line per entry and
+    ``<user>.idx`` holds the byte offset of every line as a native-endian
+    uint64, so entry *n* is one seek away. Substring search is served from a
+    trigram index that is built on first use and kept up to date afterwards.
+    Several processes may append to the same log; new entries written by
+    others are picked up on the next read.
+    """
+
+    def __init__(self, user: str = "default", directory: Optional[Path] = None, recent_limit: int = 1000) -> None:
+        self.user = _SAFE_USER.sub("_", user) or "default"
+        self.directory = Path(directory) if directory is not None else DEFAULT_HISTORY_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.directory / f"{self.user}.log"
+        self.index_path = self.directory / f"{self.user}.idx"
+        self._lock = threading.Lock()
+        self._log = open(self.log_path, "a+b")
+        self._offsets = array("Q")
+        self._recent: Deque[HistoryEntry] = deque(maxlen=max(1, recent_limit))
+        self._ngrams: Optional[Dict[str, Set[int]]] = None
+        self._frecency: Optional[Dict[str, float]] = None
+        self._load_index()
+
+    # -- persistence ---------------------------------------------------------------
+
+    def _load_index(self) -> None:
+        with self._lock, _FileLock(self._log):
+            log_size = os.fstat(self._log.fileno()).st_size
+            offsets = array("Q")
+            if self.index_path.exists():
+                with open(self.index_path, "rb") as handle:
+                    data = handle.read()
+                offsets.frombytes(data[: len(data) - len(data) % offsets.itemsize])
+            if not self._index_matches_log(offsets, log_size):
+                offsets = self._rebuild_index_locked()
+            self._offsets = offsets
+            self._refresh_recent_locked()
+
+    def _index_matches_log(self, offsets: array, log_size: int) -> bool:
+        if not offsets:
+            return log_size == 0
+        if offsets[-1] >= log_size:
+            return False
+        # The last indexed line must end exactly at EOF, otherwise a writer died
+        # between the log and index writes.
+        self._log.seek(offsets[-1])
+        self._log.readline()
+        return self._log.tell() == log_size
+
+    def _rebuild_index_locked(self) -> array:
+        offsets = array("Q")
+        self._log.seek(0)
+        position = 0
+        for line in self._log:
+            if line.endswith(b"\n"):
+                offsets.append(position)
+            position += len(line)
+        with open(self.index_path, "wb") as handle:
+            offsets.tofile(handle)
+        return offsets
+
+    def _sync_locked(self) -> None:
+        """Pick up entries appended by other processes."""
+        size = self.index_path.stat().st_size if self.index_path.exists() else 0
+        known = len(self._offsets) * self._offsets.itemsize
+        if size <= known:
+            return
+        with open(self.index_path, "rb") as handle:
+            handle.seek(known)
+            data = handle.read(size - known)
+        first_new = len(self._offsets)
+        self._offsets.frombytes(data[: len(data) - len(data) % self._offsets.itemsize])
+        for entry_id in range(first_new, len(self._offsets)):
+            self._on_new_entry_locked(self._read_locked(entry_id))
+
+    def _read_locked(self, entry_id: int) -> HistoryEntry:
+        self._log.seek(self._offsets[entry_id])
+        stamp, command = json.loads(self._log.readline())
+        return entry_id, float(stamp), command
+
+    def _refresh_recent_locked(self) -> None:
+        self._recent.clear()
+        start = max(0, len(self._offsets) - (self._recent.maxlen or 0))
+        for entry_id in range(start, len(self._offsets)):
+            self._recent.append(self._read_locked(entry_id))
+
+    def _on_new_entry_locked(self, entry: HistoryEntry) -> None:
+        self._recent.append(entry)
+        self._frecency = None
+        if self._ngrams is not None:
+            self._index_entry(entry)
+
+    # -- public API ----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, command: str, timestamp: Optional[float] = None) -> None:
+        self.extend([command], timestamp)
+
+    def extend(self, commands: Iterable[str], timestamp: Optional[float] = None) -> None:
+        """Append commands with one write to the log and one to the index."""
+        stamp = time.time() if timestamp is None else timestamp
+        lines = [json.dumps([stamp, cmd]).encode("utf-8") + b"\n" for cmd in commands if cmd.strip()]
+        if not lines:
+            return
+        with self._lock, _FileLock(self._log):
+            self._sync_locked()
+            self._log.seek(0, os.SEEK_END)
+            position = self._log.tell()
+            new_offsets = array("Q")
+            for line in lines:
+                new_offsets.append(position)
+                position += len(line)
+            self._log.write(b"".join(lines))
+            self._log.flush()
+            with open(self.index_path, "ab") as handle:
+                new_offsets.tofile(handle)
+            first = len(self._offsets)
+            self._offsets.extend(new_offsets)
+            for entry_id in range(first, len(self._offsets)):
+                self._on_new_entry_locked(self._read_locked(entry_id))
+
+    def get(self, entry_id: int) -> HistoryEntry:
+        with self._lock:
+            return self._read_locked(entry_id)
+
+    def recent(self, count: Optional[int] = None) -> List[str]:
+        """Most recent commands, oldest first."""
+        with self._lock:
+            self._sync_locked()
+            entries = list(self._recent)
+        if count is not None:
+            entries = entries[-count:] if count else []
+        return [command for _, _, command in entries]
+
+    def search(self, substring: str, limit: int = 20) -> List[HistoryEntry]:
+        """Entries containing *substring* (case-insensitive), newest first."""
+        needle = substring.lower()
+        if not needle:
+            return []
+        with self._lock:
+            self._sync_locked()
+            if len(needle) < NGRAM:
+                candidates: Iterable[int] = range(len(self._offsets) - 1, -1, -1)
+            else:
+                self._ensure_ngrams_locked()
+                assert self._ngrams is not None
+                postings = sorted((self._ngrams.get(gram, set()) for gram in _ngrams(needle)), key=len)
+                matched = set(postings[0]).intersection(*postings[1:]) if postings else set()
+                candidates = sorted(matched, reverse=True)
+            results: List[HistoryEntry] = []
+            seen: Set[str] = set()
+            for entry_id in candidates:
+                entry = self._read_locked(entry_id)
+                command = entry[2]
+                if needle in command.lower() and command not in seen:
+                    seen.add(command)
+                    results.append(entry)
+                    if len(results) >= limit:
+                        break
+            return results
+
+    def frecency_scores(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Frecency of command names and arguments over the recent window."""
+        with self._lock:
+            self._sync_locked()
+            if self._frecency is not None and now is None:
+                return self._frecency
+            current = time.time() if now is None else now
+            scores: Dict[str, float] = {}
+            for _, stamp, command in self._recent:
+                weight = frecency_weight(current - stamp)
+                for token in set(command.split()):
+                    if token.startswith("-"):
+                        continue
+                    scores[token] = scores.get(token, 0.0) + weight
+            if now is None:
+                self._frecency = scores
+            return scores
+
+    def close(self) -> None:
+        self._log.close()
+
+    # -- n-gram index ----------------------------------------------------------------
+
+    def _ensure_ngrams_locked(self) -> None:
+        if self._ngrams is not None:
+            return
+        self._ngrams = {}
+        for entry_id in range(len(self._offsets)):
+            self._index_entry(self._read_locked(entry_id))
+
+    def _index_entry(self, entry: HistoryEntry) -> None:
+        assert self._ngrams is not None
+        entry_id, _, command = entry
+        for gram in _ngrams(command):
+            self._ngrams.setdefault(gram, set()).add(entry_id)
@@ -0,0 +1,214 @@
+"""Hierarchical shared/exclusive locks over workspace paths.
+
+A lock on a path covers its whole subtree: reading ``docs`` conflicts with a
+write to ``docs/plan.md`` and with a write to the workspace root, but not with
+anything under ``src``. Shared (read) locks are compatible with each other;
+exclusive (write) locks are compatible with nothing that overlaps them.
+
+A request names all of its paths up front and is granted atomically, so no
+caller ever holds one lock while waiting for another and lock-order
+deadlocks cannot happen. Requests are granted in arrival order among those
+that overlap, so a stream of readers cannot starve a writer.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.errors import CommandError
+
+__all__ = ["LockRequest", "LockTimeoutError", "PathLockManager", "get_lock_manager"]
+
+LOCK_TIMEOUT = float(os.getenv("PATH_LOCK_TIMEOUT", "30"))
+
+
+class LockTimeoutError(CommandError):
+    """Raised when conflicting commands hold a path for too long."""
+
+
+def _key(path: Path) -> Tuple[str, ...]:
+    return Path(path).parts
+
+
+def _overlap(first: Tuple[str, ...], second: Tuple[str, ...]) -> bool:
+    shorter = min(len(first), len(second))
+    return first[:shorter] == second[:shorter]
+
+
+@dataclass(eq=False)
+class LockRequest:
+    """
+    Paths one caller locks together, sorted by path components.
+
+    Paths that are both read and written are locked exclusively.
+    """
+
+    shared: Tuple[Tuple[str, ...], ...]
+    exclusive: Tuple[Tuple[str, ...], ...]
+    granted: bool = field(default=False, compare=False)
+
+    @classmethod
+    def build(cls, reads: Iterable[Path] = (), writes: Iterable[Path] = ()) -> "LockRequest":
+        exclusive = sorted({_key(path) for path in writes})
+        shared = sorted({_key(path) for path in reads} - set(exclusive))
+        return cls(shared=tuple(shared), exclusive=tuple(exclusive))
+
+    def conflicts_with(self, other: "LockRequest") -> bool:
+        for mine in self.exclusive:
+            if any(_overlap(mine, theirs) for theirs in other.exclusive + other.shared):
+                return True
+        for mine in self.shared:
+            if any(_overlap(mine, theirs) for theirs in other.exclusive):
+                return True
+        return False
+
+
+class PathLockManager:
+    """Grants :class:`LockRequest` objects once nothing they overlap is held.
+
+    Held locks are counted on every node of their path, both per node and per
+    subtree, so checking a request costs O(depth) per path no matter how many
+    locks are held.
+    """
+
+    def __init__(self, timeout: float = LOCK_TIMEOUT) -> None:
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        # Locks held exactly at a node, and anywhere in its subtree.
+        self._node_shared: Dict[Tuple[str, ...], int] = {}
+        self._node_exclusive: Dict[Tuple[str, ...], int] = {}
+        self._subtree_any: Dict[Tuple[str, ...], int] = {}
+        self._subtree_exclusive: Dict[Tuple[str, ...], int] = {}
+        self._waiting: Deque[LockRequest] = deque()
+
+    @contextmanager
+    def hold(
+        self, reads: Iterable[Path] = (), writes: Iterable[Path] = (), timeout: Optional[float] = None
+    ) -> Iterator[LockRequest]:
+        """Lock *reads* shared and *writes* exclusive for the ``with`` block."""
+        request = self.acquire(reads, writes, timeout)
+        try:
+            yield request
+        finally:
+            self.release(request)
+
+    def acquire(
+        self, reads: Iterable[Path] = (), writes: Iterable[Path] = (), timeout: Optional[float] = None
+    ) -> LockRequest:
+        """
+        Block until every path can be locked, then lock them all at once.
+
+        Raises:
+            LockTimeoutError: If the paths stay busy for longer than *timeout*
+        """
+        request = LockRequest.build(reads, writes)
+        if not request.shared and not request.exclusive:
+            request.granted = True
+            return request
+        with self._cond:
+            # Waiters on other paths do not hold this request back; only an
+            # earlier waiter it overlaps with goes first.
+            if self._available_locked(request) and not any(
+                request.conflicts_with(other) for other in self._waiting
+            ):
+                self._grant_locked(request)
+                return request
+            self._waiting.append(request)
+            limit = self.timeout if timeout is None else timeout
+            if not self._cond.wait_for(lambda: request.granted, timeout=limit):
+                self._waiting.remove(request)
+                # Requests queued behind this one may now be grantable.
+                self._dispatch_locked()
+                busy = ", ".join(str(Path(*parts)) for parts in request.exclusive + request.shared)
+                raise LockTimeoutError(f"Timed out waiting for busy paths: {busy}")
+        return request
+
+    def release(self, request: LockRequest) -> None:
+        if not request.granted or (not request.shared and not request.exclusive):
+            return
+        with self._cond:
+            for key in request.shared:
+                self._count_locked(key, exclusive=False, delta=-1)
+            for key in request.exclusive:
+                self._count_locked(key, exclusive=True, delta=-1)
+            request.granted = False
+            self._dispatch_locked()
+
+    def held(self) -> int:
+        """Number of path locks currently held."""
+        with self._cond:
+            return self._subtree_any.get((), 0)
+
+    # -- internals -------------------------------------------------------------------
+
+    def _available_locked(self, request: LockRequest) -> bool:
+        for key in request.exclusive:
+            if self._subtree_any.get(key, 0):
+                return False
+            if any(self._node_shared.get(key[:depth], 0) or self._node_exclusive.get(key[:depth], 0)
+                   for depth in range(len(key))):
+                return False
+        for key in request.shared:
+            if self._subtree_exclusive.get(key, 0):
+                return False
+            if any(self._node_exclusive.get(key[:depth], 0) for depth in range(len(key))):
+                return False
+        return True
+
+    def _grant_locked(self, request: LockRequest) -> None:
+        for key in request.shared:
+            self._count_locked(key, exclusive=False, delta=1)
+        for key in request.exclusive:
+            self._count_locked(key, exclusive=True, delta=1)
+        request.granted = True
+
+    def _dispatch_locked(self) -> None:
+        granted = False
+        ahead: List[LockRequest] = []
+        for request in list(self._waiting):
+            # Never overtake an earlier waiter that wants an overlapping path.
+            if self._available_locked(request) and not any(request.conflicts_with(other) for other in ahead):
+                self._waiting.remove(request)
+                self._grant_locked(request)
+                granted = True
+            else:
+                ahead.append(request)
+        if granted:
+            self._cond.notify_all()
+
+    def _count_locked(self, key: Tuple[str, ...], exclusive: bool, delta: int) -> None:
+        node = self._node_exclusive if exclusive else self._node_shared
+        _bump(node, key, delta)
+        for depth in range(len(key) + 1):
+            prefix = key[:depth]
+            _bump(self._subtree_any, prefix, delta)
+            if exclusive:
+                _bump(self._subtree_exclusive, prefix, delta)
+
+
+def _bump(counts: Dict[Tuple[str, ...], int], key: Tuple[str, ...], delta: int) -> None:
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+_manager: Optional[PathLockManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_lock_manager() -> PathLockManager:
+    """The lock manager shared by every session and router in this process."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = PathLockManager()
+        return _manager
+
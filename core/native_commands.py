@@ -0,0 +1,490 @@
+"""
+In-process implementations of the cheap read-only whitelisted commands.
+
+Commands like ``echo`` or ``basename`` do microseconds of work but cost a full
+fork and exec when run as binaries. The functions here reproduce the GNU
+coreutils output for the common invocations. Anything they do not handle
+exactly (unknown flags, locale-dependent formats, error paths whose wording
+varies between coreutils versions) raises ``NativeUnsupported`` and the
+caller runs the real binary instead. ``head`` and ``tail`` read through the
+same readers as the ``head``/``tail`` builtins in :mod:`fs.textops`, and every
+file operand is resolved inside the workspace root.
+"""
+
+import grp
+import os
+import pwd
+import socket
+import stat
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fs import paths
+from fs import textops
+
+from .errors import CommandError, RootEscapeError
+
+__all__ = ["NATIVE_COMMANDS", "NativeUnsupported", "run_native"]
+
+# (returncode, stdout bytes, stderr text)
+NativeResult = Tuple[int, bytes, str]
+NativeCommand = Callable[[List[str], Path, int], NativeResult]
+
+
+class NativeUnsupported(Exception):
+    """The invocation must be handled by the real binary."""
+
+
+def _plain_args(args: List[str]) -> List[str]:
+    """Operands of a command that takes no options; any option falls back."""
+    if args and args[0] == "--":
+        return args[1:]
+    if any(arg.startswith("-") and arg != "-" for arg in args):
+        raise NativeUnsupported
+    return args
+
+
+def _in_workspace(name: str, cwd: Path) -> Path:
+    """*name* resolved against *cwd*; operands outside the workspace are refused."""
+    try:
+        return paths.resolve_in_root(name, cwd)
+    except RootEscapeError as exc:
+        raise CommandError(f"Path not within workspace: {name}") from exc
+
+
+def _lines(*parts: str) -> bytes:
+    return "".join(part + "\n" for part in parts).encode("utf-8", errors="surrogateescape")
+
+
+# -- echo, whoami, hostname, id ------------------------------------------------------
+
+
+def _echo(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    if args in (["--help"], ["--version"]):
+        raise NativeUnsupported
+    newline = True
+    words = list(args)
+    while words and len(words[0]) > 1 and words[0][0] == "-" and set(words[0][1:]) <= set("neE"):
+        if "e" in words[0]:
+            # Escape interpretation is left to the binary.
+            raise NativeUnsupported
+        if "n" in words[0]:
+            newline = False
+        words.pop(0)
+    text = " ".join(words) + ("\n" if newline else "")
+    return 0, text.encode("utf-8", errors="surrogateescape"), ""
+
+
+def _user_name(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        raise NativeUnsupported from None
+
+
+def _group_name(gid: int) -> str:
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        raise NativeUnsupported from None
+
+
+def _whoami(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    if args:
+        raise NativeUnsupported
+    return 0, _lines(_user_name(os.geteuid())), ""
+
+
+def _hostname(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    if args:
+        raise NativeUnsupported
+    return 0, _lines(socket.gethostname()), ""
+
+
+def _group_ids() -> List[int]:
+    egid = os.getegid()
+    return [egid] + [gid for gid in dict.fromkeys(os.getgroups()) if gid != egid]
+
+
+def _id(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    uid, gid = os.geteuid(), os.getegid()
+    if uid != os.getuid() or gid != os.getgid() or os.path.exists("/sys/fs/selinux/enforce"):
+        # Extra euid=/egid=/context= fields; not worth reproducing.
+        raise NativeUnsupported
+    flags = set()
+    for arg in args:
+        if not arg.startswith("-") or arg == "-" or not set(arg[1:]) <= set("ugGn"):
+            raise NativeUnsupported
+        flags.update(arg[1:])
+    which = flags & set("ugG")
+    if not which:
+        if "n" in flags:
+            raise NativeUnsupported
+        groups = ",".join(f"{g}({_group_name(g)})" for g in _group_ids())
+        return 0, _lines(f"uid={uid}({_user_name(uid)}) gid={gid}({_group_name(gid)}) groups={groups}"), ""
+    if len(which) > 1:
+        raise NativeUnsupported
+    names = "n" in flags
+    if "u" in which:
+        return 0, _lines(_user_name(uid) if names else str(uid)), ""
+    if "g" in which:
+        return 0, _lines(_group_name(gid) if names else str(gid)), ""
+    return 0, _lines(" ".join(_group_name(g) if names else str(g) for g in _group_ids())), ""
+
+
+# -- date, uptime ---------------------------------------------------------------------
+
+
+def _c_locale() -> bool:
+    for name in ("LC_ALL", "LC_TIME", "LANG"):
+        value = os.environ.get(name)
+        if value:
+            return value in {"C", "POSIX"} or value.startswith("C.")
+    return True
+
+
+def _date_format(fmt: str, utc: bool) -> str:
+    """Reject coreutils-only directives; pin the zone fields for ``-u``."""
+    out: List[str] = []
+    idx = 0
+    while idx < len(fmt):
+        char = fmt[idx]
+        if char != "%":
+            out.append(char)
+            idx += 1
+            continue
+        directive = fmt[idx + 1:idx + 2]
+        if directive in {"N", ":", "q", ""}:
+            raise NativeUnsupported
+        if utc and directive in {"Z", "z"}:
+            out.append("UTC" if directive == "Z" else "+0000")
+        else:
+            out.append("%" + directive)
+        idx += 2
+    return "".join(out)
+
+
+def _date(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    if not _c_locale():
+        raise NativeUnsupported
+    utc = False
+    fmt = "%a %b %e %H:%M:%S %Z %Y"
+    for position, arg in enumerate(args):
+        if arg in {"-u", "--utc", "--universal"}:
+            utc = True
+        elif arg.startswith("+") and position == len(args) - 1:
+            fmt = arg[1:]
+        else:
+            raise NativeUnsupported
+    now = time.time()
+    moment = time.gmtime(now) if utc else time.localtime(now)
+    return 0, _lines(time.strftime(_date_format(fmt, utc), moment)), ""
+
+
+def _uptime(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    # The default and ``-p`` layouts differ between procps releases; only
+    # ``-s`` has a stable format.
+    if args not in (["-s"], ["--since"]):
+        raise NativeUnsupported
+    try:
+        with open("/proc/uptime", encoding="ascii") as handle:
+            seconds = float(handle.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        raise NativeUnsupported from None
+    boot = time.localtime(time.time() - seconds)
+    return 0, _lines(time.strftime("%Y-%m-%d %H:%M:%S", boot)), ""
+
+
+# -- basename, dirname, realpath --------------------------------------------------------
+
+
+def _base(name: str, suffix: str = "") -> str:
+    stripped = name.rstrip("/")
+    if not stripped:
+        return "/" if name else ""
+    base = stripped.rsplit("/", 1)[-1]
+    if suffix and base != suffix and base.endswith(suffix):
+        base = base[: -len(suffix)]
+    return base
+
+
+def _basename(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    operands = _plain_args(args)
+    if len(operands) not in (1, 2):
+        raise NativeUnsupported
+    return 0, _lines(_base(*operands)), ""
+
+
+def _dir(name: str) -> str:
+    stripped = name.rstrip("/")
+    if not stripped:
+        return "/" if name else "."
+    if "/" not in stripped:
+        return "."
+    head = stripped[: stripped.rfind("/")].rstrip("/")
+    return head or "/"
+
+
+def _dirname(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    operands = _plain_args(args)
+    if not operands:
+        raise NativeUnsupported
+    return 0, _lines(*[_dir(name) for name in operands]), ""
+
+
+def _realpath(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    operands = _plain_args(args)
+    if not operands:
+        raise NativeUnsupported
+    resolved = []
+    for name in operands:
+        if name:
+            _in_workspace(name, cwd)
+        target = os.path.join(str(cwd), name)
+        # GNU realpath requires every component but the last to exist.
+        if not name or not os.path.isdir(os.path.dirname(os.path.abspath(target)) or "/"):
+            raise NativeUnsupported
+        resolved.append(os.path.realpath(target))
+    return 0, _lines(*resolved), ""
+
+
+# -- stat -----------------------------------------------------------------------------
+
+
+def _file_type(info: os.stat_result) -> str:
+    mode = info.st_mode
+    if stat.S_ISREG(mode):
+        return "regular empty file" if info.st_size == 0 else "regular file"
+    for test, label in (
+        (stat.S_ISDIR, "directory"),
+        (stat.S_ISLNK, "symbolic link"),
+        (stat.S_ISFIFO, "fifo"),
+        (stat.S_ISSOCK, "socket"),
+        (stat.S_ISCHR, "character special file"),
+        (stat.S_ISBLK, "block special file"),
+    ):
+        if test(mode):
+            return label
+    raise NativeUnsupported
+
+
+def _owner(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return "UNKNOWN"
+
+
+def _group(gid: int) -> str:
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return "UNKNOWN"
+
+
+_STAT_FIELDS: Dict[str, Callable[[str, os.stat_result], str]] = {
+    "n": lambda name, info: name,
+    "s": lambda name, info: str(info.st_size),
+    "a": lambda name, info: format(stat.S_IMODE(info.st_mode), "o"),
+    "A": lambda name, info: stat.filemode(info.st_mode),
+    "f": lambda name, info: format(info.st_mode, "x"),
+    "F": lambda name, info: _file_type(info),
+    "u": lambda name, info: str(info.st_uid),
+    "U": lambda name, info: _owner(info.st_uid),
+    "g": lambda name, info: str(info.st_gid),
+    "G": lambda name, info: _group(info.st_gid),
+    "i": lambda name, info: str(info.st_ino),
+    "h": lambda name, info: str(info.st_nlink),
+    "b": lambda name, info: str(info.st_blocks),
+    "B": lambda name, info: "512",
+    "o": lambda name, info: str(info.st_blksize),
+    "d": lambda name, info: str(info.st_dev),
+    "X": lambda name, info: str(int(info.st_atime)),
+    "Y": lambda name, info: str(int(info.st_mtime)),
+    "Z": lambda name, info: str(int(info.st_ctime)),
+}
+
+
+def _stat_line(fmt: str, name: str, info: os.stat_result) -> str:
+    out: List[str] = []
+    idx = 0
+    while idx < len(fmt):
+        char = fmt[idx]
+        if char != "%":
+            out.append(char)
+            idx += 1
+            continue
+        directive = fmt[idx + 1:idx + 2]
+        if directive == "%":
+            out.append("%")
+        elif directive in _STAT_FIELDS:
+            out.append(_STAT_FIELDS[directive](name, info))
+        else:
+            raise NativeUnsupported
+        idx += 2
+    return "".join(out)
+
+
+def _stat(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    # Only ``-c``/``--format`` is handled: the default layout differs between
+    # coreutils releases.
+    fmt: Optional[str] = None
+    follow = False
+    names: List[str] = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg == "-c" and idx + 1 < len(args):
+            fmt = args[idx + 1]
+            idx += 1
+        elif arg.startswith("--format="):
+            fmt = arg[len("--format="):]
+        elif arg in {"-L", "--dereference"}:
+            follow = True
+        elif arg.startswith("-") and arg != "-":
+            raise NativeUnsupported
+        else:
+            names.append(arg)
+        idx += 1
+    if fmt is None or not names:
+        raise NativeUnsupported
+    lines = []
+    for name in names:
+        # The check resolves links; lstat still describes the link itself.
+        _in_workspace(name, cwd)
+        try:
+            info = os.stat(cwd / name) if follow else os.lstat(cwd / name)
+        except OSError:
+            raise NativeUnsupported from None
+        lines.append(_stat_line(fmt, name, info))
+    return 0, _lines(*lines), ""
+
+
+# -- head, tail -----------------------------------------------------------------------
+
+
+def _parse_count(text: str, allow_plus: bool) -> Tuple[int, bool]:
+    """``(count, from_start)``; size suffixes and negative counts fall back."""
+    from_start = allow_plus and text.startswith("+")
+    digits = text[1:] if from_start else text
+    if not digits.isdigit():
+        raise NativeUnsupported
+    return int(digits), from_start
+
+
+def _head_tail_options(args: List[str], allow_plus: bool) -> Tuple[str, int, bool, Optional[bool], List[str]]:
+    """Parse ``-n N``/``-c N``/``-N``/``-q``/``-v`` into ``(unit, count, from_start, headers, files)``."""
+    unit, count, from_start = "lines", 10, False
+    headers: Optional[bool] = None
+    files: List[str] = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg == "--":
+            files.extend(args[idx + 1:])
+            break
+        if arg in {"-n", "-c"} and idx + 1 < len(args):
+            unit = "lines" if arg == "-n" else "bytes"
+            count, from_start = _parse_count(args[idx + 1], allow_plus)
+            idx += 1
+        elif arg[:2] in {"-n", "-c"} and len(arg) > 2:
+            unit = "lines" if arg[1] == "n" else "bytes"
+            count, from_start = _parse_count(arg[2:], allow_plus)
+        elif arg.startswith(("--lines=", "--bytes=")):
+            unit = "lines" if arg.startswith("--lines=") else "bytes"
+            count, from_start = _parse_count(arg.split("=", 1)[1], allow_plus)
+        elif arg[1:].isdigit() and arg.startswith("-"):
+            unit, count, from_start = "lines", int(arg[1:]), False
+        elif arg in {"-q", "--quiet", "--silent"}:
+            headers = False
+        elif arg in {"-v", "--verbose"}:
+            headers = True
+        elif arg.startswith("-"):
+            # Includes ``-`` (stdin, which is always empty here) and ``-f``.
+            raise NativeUnsupported
+        else:
+            files.append(arg)
+        idx += 1
+    if not files:
+        raise NativeUnsupported
+    return unit, count, from_start, headers, files
+
+
+def _read_body(path: Path, unit: str, count: int, from_start: bool, tail: bool, limit: int) -> bytes:
+    with open(path, "rb") as handle:
+        if not tail:
+            return textops.read_head(handle, unit, count, limit)
+        if not from_start:
+            return textops.read_tail(handle, unit, count, limit)
+        if unit == "bytes":
+            handle.seek(max(0, count - 1))
+        else:
+            textops.skip_lines(handle, count)
+        return handle.read(limit + 1)
+
+
+def _head_or_tail(args: List[str], cwd: Path, limit: int, tail: bool) -> NativeResult:
+    unit, count, from_start, headers, files = _head_tail_options(args, allow_plus=tail)
+    show_headers = headers if headers is not None else len(files) > 1
+    parts: List[bytes] = []
+    for position, name in enumerate(files):
+        path = _in_workspace(name, cwd)
+        if not path.is_file():
+            raise NativeUnsupported
+        try:
+            body = _read_body(path, unit, count, from_start, tail, limit)
+        except OSError:
+            raise NativeUnsupported from None
+        if len(body) > limit:
+            raise NativeUnsupported
+        if show_headers:
+            parts.append(("\n" if position else "").encode() + _lines(f"==> {name} <=="))
+        parts.append(body)
+    output = b"".join(parts)
+    if len(output) > limit:
+        raise NativeUnsupported
+    return 0, output, ""
+
+
+def _head(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    return _head_or_tail(args, cwd, limit, tail=False)
+
+
+def _tail(args: List[str], cwd: Path, limit: int) -> NativeResult:
+    return _head_or_tail(args, cwd, limit, tail=True)
+
+
+NATIVE_COMMANDS: Dict[str, NativeCommand] = {
+    "echo": _echo,
+    "date": _date,
+    "whoami": _whoami,
+    "hostname": _hostname,
+    "id": _id,
+    "uptime": _uptime,
+    "basename": _basename,
+    "dirname": _dirname,
+    "realpath": _realpath,
+    "stat": _stat,
+    "head": _head,
+    "tail": _tail,
+}
+
+
+def run_native(command: List[str], cwd: Path, max_output_bytes: int) -> Optional[NativeResult]:
+    """
+    Run *command* in-process if it has a native implementation for these flags.
+
+    Returns:
+        ``(returncode, stdout, stderr)``, or None if the binary must run instead
+
+    Raises:
+        CommandError: If a file operand is outside the workspace
+    """
+    handler = NATIVE_COMMANDS.get(command[0]) if command else None
+    if handler is None:
+        return None
+    try:
+        return handler(command[1:], Path(cwd), max_output_bytes)
+    except NativeUnsupported:
+        return None
@@ -0,0 +1,51 @@
+"""Handler output that carries metadata or structured rows alongside its text."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class CommandOutput(str):
+    """Handler output text with entries to merge into ``Response.meta``.
+
+    It is a ``str``, so callers that only want the text can treat it like any
+    other handler output; the router copies ``meta`` into the response.
+    """
+
+    meta: Dict[str, Any]
+
+    def __new__(cls, text: str = "", meta: Optional[Dict[str, Any]] = None) -> "CommandOutput":
+        output = super().__new__(cls, text)
+        output.meta = dict(meta or {})
+        return output
+
+
+class Records:
+    """Typed rows returned by a handler in place of text.
+
+    Rows are named tuples. The text form is produced by ``formatter`` only
+    when something asks for it, so API clients that want the rows never pay
+    for formatting.
+    """
+
+    __slots__ = ("rows", "_formatter", "_text")
+
+    def __init__(self, rows: Sequence[Tuple[Any, ...]], formatter: Callable[[Sequence[Tuple[Any, ...]]], str]) -> None:
+        self.rows = rows
+        self._formatter = formatter
+        self._text: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._formatter(self.rows)
+        return self._text
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [row._asdict() for row in self.rows]  # type: ignore[attr-defined]
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dicts(), separators=(",", ":"))
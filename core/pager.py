@@ -0,0 +1,211 @@
+"""Per-session buffers that page through large command output.
+
+When a command prints more than one page, the router keeps the full text in
+the session's :class:`OutputBuffers` and returns only the first page with a
+cursor. ``more <cursor>`` then returns the next page.
+
+Page boundaries are computed once, when the output is stored. Fetching a page
+costs O(page) both in memory and on disk, where it is one ``seek`` and one
+``read``. Buffers stay in memory until the session's buffered text passes
+``memory_limit``. After that the least recently used ones are spilled to
+spool files. Buffers older than ``ttl`` seconds are dropped, and so are the
+least recently used ones beyond ``max_buffers``.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from core.errors import CommandError
+
+__all__ = ["CursorError", "OutputBuffers", "Page", "split_pages"]
+
+PAGE_CHARS = int(os.getenv("OUTPUT_PAGE_CHARS", "10000"))
+BUFFER_MEMORY_CHARS = int(os.getenv("OUTPUT_BUFFER_MEMORY_CHARS", str(2_000_000)))
+MAX_BUFFERS = int(os.getenv("OUTPUT_MAX_BUFFERS", "16"))
+BUFFER_TTL = float(os.getenv("OUTPUT_BUFFER_TTL", "900"))
+SPOOL_DIR = Path(os.getenv("OUTPUT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "codemate-output")))
+
+
+class CursorError(CommandError):
+    """Raised for a cursor that is malformed, expired or already evicted."""
+
+
+class Page(NamedTuple):
+    """One page of buffered output; ``cursor`` is None on the last page."""
+
+    text: str
+    number: int
+    pages: int
+    cursor: Optional[str]
+
+
+def split_pages(text: str, page_chars: int) -> List[int]:
+    """
+    Start offsets of each page of *text*, followed by ``len(text)``.
+
+    A page ends after the last newline in its window so lines are not split,
+    unless the window holds no newline at all.
+    """
+    bounds = [0]
+    start = 0
+    length = len(text)
+    while length - start > page_chars:
+        end = text.rfind("\n", start, start + page_chars)
+        end = start + page_chars if end < 0 else end + 1
+        bounds.append(end)
+        start = end
+    bounds.append(length)
+    return bounds
+
+
+class _Buffer:
+    __slots__ = ("created", "bounds", "text", "path", "offsets", "_finalizer", "__weakref__")
+
+    def __init__(self, text: str, bounds: List[int]) -> None:
+        self.created = time.monotonic()
+        self.bounds = bounds
+        self.text: Optional[str] = text
+        self.path: Optional[Path] = None
+        # Byte offsets of each page in the spool file.
+        self.offsets: List[int] = []
+        self._finalizer: Optional[weakref.finalize] = None
+
+    @property
+    def pages(self) -> int:
+        return len(self.bounds) - 1
+
+    @property
+    def resident_chars(self) -> int:
+        return len(self.text) if self.text is not None else 0
+
+    def page(self, index: int) -> str:
+        if self.text is not None:
+            return self.text[self.bounds[index]:self.bounds[index + 1]]
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offsets[index])
+            return handle.read(self.offsets[index + 1] - self.offsets[index]).decode("utf-8")
+
+    def spill(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(prefix="out-", suffix=".txt", dir=str(directory))
+        offsets = [0]
+        with os.fdopen(fd, "wb") as handle:
+            for index in range(self.pages):
+                offsets.append(offsets[-1] + handle.write(self.page(index).encode("utf-8")))
+        self.path = Path(name)
+        self.offsets = offsets
+        self.text = None
+        # Remove the spool file with the buffer, however it goes away.
+        self._finalizer = weakref.finalize(self, _unlink, self.path)
+
+    def discard(self) -> None:
+        self.text = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class OutputBuffers:
+    """The buffered outputs of one session, addressed by cursor."""
+
+    def __init__(
+        self,
+        page_chars: int = PAGE_CHARS,
+        memory_limit: int = BUFFER_MEMORY_CHARS,
+        max_buffers: int = MAX_BUFFERS,
+        ttl: float = BUFFER_TTL,
+        spool_dir: Optional[Path] = None,
+    ) -> None:
+        self.page_chars = max(1, page_chars)
+        self.memory_limit = memory_limit
+        self.max_buffers = max(1, max_buffers)
+        self.ttl = ttl
+        self.spool_dir = Path(spool_dir) if spool_dir is not None else SPOOL_DIR
+        self._lock = threading.Lock()
+        self._buffers: "OrderedDict[str, _Buffer]" = OrderedDict()
+        self._resident = 0
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def needs_paging(self, text: str) -> bool:
+        return len(text) > self.page_chars
+
+    def store(self, text: str) -> Page:
+        """Buffer *text* and return its first page."""
+        buffer = _Buffer(text, split_pages(text, self.page_chars))
+        buffer_id = secrets.token_hex(6)
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            self._buffers[buffer_id] = buffer
+            self._resident += buffer.resident_chars
+            while len(self._buffers) > self.max_buffers:
+                _, evicted = self._buffers.popitem(last=False)
+                self._drop_locked(evicted)
+            self._spill_locked()
+            return self._page_locked(buffer_id, buffer, 0)
+
+    def fetch(self, cursor: str) -> Page:
+        """
+        The page *cursor* points at.
+
+        Raises:
+            CursorError: If the cursor is malformed or its output was evicted
+        """
+        buffer_id, _, number = cursor.partition(":")
+        try:
+            index = int(number) - 1
+        except ValueError:
+            raise CursorError(f"Invalid cursor: {cursor}") from None
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            buffer = self._buffers.get(buffer_id)
+            if buffer is None:
+                raise CursorError(f"Output for cursor {cursor} has expired; run the command again.")
+            if not 0 <= index < buffer.pages:
+                raise CursorError(f"Invalid cursor: {cursor}")
+            self._buffers.move_to_end(buffer_id)
+            return self._page_locked(buffer_id, buffer, index)
+
+    def clear(self) -> None:
+        with self._lock:
+            for buffer in self._buffers.values():
+                buffer.discard()
+            self._buffers.clear()
+            self._resident = 0
+
+    def _page_locked(self, buffer_id: str, buffer: _Buffer, index: int) -> Page:
+        cursor = f"{buffer_id}:{index + 2}" if index + 1 < buffer.pages else None
+        return Page(buffer.page(index), index + 1, buffer.pages, cursor)
+
+    def _expire_locked(self, now: float) -> None:
+        # At most ``max_buffers`` entries, and LRU order is not creation order.
+        for buffer_id in [key for key, buffer in self._buffers.items() if now - buffer.created > self.ttl]:
+            self._drop_locked(self._buffers.pop(buffer_id))
+
+    def _spill_locked(self) -> None:
+        for buffer in self._buffers.values():
+            if self._resident <= self.memory_limit:
+                return
+            if buffer.text is not None:
+                self._resident -= buffer.resident_chars
+                buffer.spill(self.spool_dir)
+
+    def _drop_locked(self, buffer: _Buffer) -> None:
+        self._resident -= buffer.resident_chars
+        buffer.discard()
@@ -0,0 +1,183 @@
+"""Session-scoped pool of command routers for multi-client servers."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from core.errors import CommandError
+from core.registry import CommandRegistry, create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from core.session_store import SessionState, SessionStore, commit_state
+
+__all__ = ["PooledSession", "RouterPool", "SessionNotFoundError"]
+
+
+class SessionNotFoundError(CommandError):
+    """Raised when a session id is unknown or has been evicted."""
+
+
+@dataclass
+class PooledSession:
+    """A router bound to one session, plus the lock that serialises its commands."""
+
+    router: CommandRouter
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    # Version of the stored state this copy reflects, and that state's history.
+    version: int = 0
+    synced: List[str] = field(default_factory=list)
+
+    @property
+    def session(self) -> SessionContext:
+        return self.router.session
+
+
+class RouterPool:
+    """Keep one router per session and share a single registry between them.
+
+    Sessions idle for longer than ``idle_timeout`` seconds are evicted, and the
+    least recently used session is dropped once ``max_sessions`` is reached.
+    With a ``store``, sessions are shared with other processes using the same
+    store: ``get`` picks up changes made elsewhere and ``commit`` publishes
+    local ones.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[CommandRegistry] = None,
+        *,
+        max_sessions: int = 1024,
+        idle_timeout: float = 900.0,
+        root_factory: Optional[Callable[[], Path]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        store: Optional[SessionStore] = None,
+    ) -> None:
+        self.registry = registry or create_default_registry()
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self._root_factory = root_factory or _workspace_root
+        self._clock = clock
+        self.store = store
+        self._sessions: "OrderedDict[str, PooledSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> PooledSession:
+        """Create a new session rooted at the workspace and return it."""
+        session = SessionContext(cwd=self._root_factory())
+        session_id = session.session_id
+        entry = PooledSession(CommandRouter(self.registry, session), last_used=self._clock())
+        self._insert(session_id, entry)
+        self.commit(entry)
+        return entry
+
+    def get(self, session_id: str) -> PooledSession:
+        """
+        Return the pooled session for *session_id*, refreshing its idle timer.
+
+        With a store, a session created by another process is adopted, and a
+        local copy is refreshed if another process changed it since.
+        """
+        with self._lock:
+            self._sweep_locked()
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry.last_used = self._clock()
+                self._sessions.move_to_end(session_id)
+        if self.store is None:
+            if entry is None:
+                raise SessionNotFoundError(f"Unknown session: {session_id}")
+            return entry
+        state = self.store.load(session_id, newer_than=entry.version if entry is not None else -1)
+        if entry is None:
+            if state is None:
+                raise SessionNotFoundError(f"Unknown session: {session_id}")
+            session = SessionContext(cwd=self._root_factory(), session_id=session_id)
+            entry = PooledSession(CommandRouter(self.registry, session), last_used=self._clock())
+            entry = self._insert(session_id, entry)
+        if state is not None:
+            with entry.lock:
+                if state.version > entry.version:
+                    state.apply(entry.session, self._root_factory())
+                    entry.version = state.version
+                    entry.synced = list(state.history)
+        return entry
+
+    def commit(self, entry: PooledSession) -> None:
+        """
+        Publish *entry*'s cwd and history to the store, if there is one.
+
+        If another process changed the session since *entry* last synced, its
+        changes are loaded and this one is replayed on top of them.
+        """
+        if self.store is None:
+            return
+        root = self._root_factory()
+        captured = SessionState.capture(entry.session, root, entry.version)
+        stored = commit_state(self.store, captured, entry.synced)
+        if stored is None:
+            return
+        if stored is not captured:
+            stored.apply(entry.session, root)
+        entry.version = stored.version
+        entry.synced = list(stored.history)
+
+    def discard(self, session_id: str) -> bool:
+        with self._lock:
+            removed = self._sessions.pop(session_id, None) is not None
+        if self.store is not None:
+            removed = removed or self.store.load(session_id) is not None
+            self.store.delete(session_id)
+        return removed
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def evict_idle(self) -> int:
+        """Drop every session idle for longer than ``idle_timeout``."""
+        with self._lock:
+            return self._sweep_locked(force=True)
+
+    def _insert(self, session_id: str, entry: PooledSession) -> PooledSession:
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                # Another thread adopted the same stored session first.
+                return existing
+            self._sweep_locked(force=True)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[session_id] = entry
+            return entry
+
+    def _sweep_locked(self, force: bool = False) -> int:
+        now = self._clock()
+        # Sweeping is O(evicted) because the dict is kept in LRU order, but there
+        # is no point in checking more than a few times per timeout window.
+        if not force and now - self._last_sweep < self.idle_timeout / 4:
+            return 0
+        self._last_sweep = now
+        evicted = 0
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry.last_used <= self.idle_timeout or entry.lock.locked():
+                break
+            del self._sessions[session_id]
+            evicted += 1
+        return evicted
+
+
+def _workspace_root() -> Path:
+    from fs import paths
+
+    return paths.WORKSPACE_ROOT
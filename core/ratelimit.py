@@ -0,0 +1,162 @@
+"""Token-bucket rate limits on commands, per session and per process.
+
+Every command belongs to a class with its own buckets, so a flood of cheap
+reads cannot use up the budget for writes and vice versa. A command needs one
+token from its session's bucket and one from the process-wide bucket of its
+class. If either is empty, the command is rejected and the caller is told
+how long to wait.
+
+Limits are ``RATE_LIMIT_<SCOPE>_<CLASS>`` environment variables holding
+``<per second>[:<burst>]``, e.g. ``RATE_LIMIT_SESSION_EXEC=10:20``. A rate of
+``0`` turns that bucket off.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+__all__ = [
+    "EXEC",
+    "MONITOR",
+    "RATE_CLASSES",
+    "READ",
+    "WRITE",
+    "RateLimit",
+    "RateLimiter",
+    "TokenBucket",
+    "get_rate_limiter",
+]
+
+READ = "read"
+WRITE = "write"
+EXEC = "exec"
+MONITOR = "monitor"
+RATE_CLASSES = (READ, WRITE, EXEC, MONITOR)
+
+_SESSION_DEFAULTS = {READ: "100:200", WRITE: "50:100", EXEC: "10:20", MONITOR: "10:20"}
+_GLOBAL_DEFAULTS = {READ: "2000:4000", WRITE: "500:1000", EXEC: "50:100", MONITOR: "100:200"}
+RATE_LIMITS_ENABLED = os.getenv("RATE_LIMITS_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+# Buckets of this many sessions are kept; an evicted session starts again with a full burst.
+MAX_TRACKED_SESSIONS = 10000
+
+
+class RateLimit(NamedTuple):
+    """Sustained ``rate`` per second with room for ``burst`` back-to-back calls."""
+
+    rate: float
+    burst: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        rate, _, burst = value.strip().partition(":")
+        per_second = float(rate)
+        return cls(per_second, float(burst) if burst else max(1.0, per_second))
+
+
+def _limits_from_env(scope: str, defaults: Dict[str, str]) -> Dict[str, RateLimit]:
+    limits = {}
+    for rate_class, default in defaults.items():
+        limit = RateLimit.parse(os.getenv(f"RATE_LIMIT_{scope}_{rate_class.upper()}", default))
+        if limit.rate > 0:
+            limits[rate_class] = limit
+    return limits
+
+
+class TokenBucket:
+    """A bucket refilled continuously at ``limit.rate`` tokens per second."""
+
+    __slots__ = ("limit", "tokens", "updated")
+
+    def __init__(self, limit: RateLimit, now: float) -> None:
+        self.limit = limit
+        self.tokens = limit.burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token; returns 0 on success, else seconds until one is available."""
+        self.tokens = min(self.limit.burst, self.tokens + (now - self.updated) * self.limit.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.limit.rate
+
+    def refund(self) -> None:
+        self.tokens = min(self.limit.burst, self.tokens + 1.0)
+
+
+class RateLimiter:
+    """Per-session and process-wide buckets for each command class."""
+
+    def __init__(
+        self,
+        session_limits: Optional[Dict[str, RateLimit]] = None,
+        global_limits: Optional[Dict[str, RateLimit]] = None,
+        clock=time.monotonic,
+    ) -> None:
+        self.session_limits = (
+            _limits_from_env("SESSION", _SESSION_DEFAULTS) if session_limits is None else session_limits
+        )
+        self.global_limits = _limits_from_env("GLOBAL", _GLOBAL_DEFAULTS) if global_limits is None else global_limits
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self._global = {name: TokenBucket(limit, now) for name, limit in self.global_limits.items()}
+        self._sessions: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def admit(self, session_id: str, rate_class: str) -> float:
+        """
+        Charge one command of *rate_class* to *session_id*.
+
+        Returns:
+            0 if the command may run, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            now = self._clock()
+            session_bucket = self._session_bucket_locked(session_id, rate_class, now)
+            if session_bucket is not None:
+                wait = session_bucket.take(now)
+                if wait:
+                    return wait
+            global_bucket = self._global.get(rate_class)
+            if global_bucket is not None:
+                wait = global_bucket.take(now)
+                if wait:
+                    # The command does not run, so the session keeps its token.
+                    if session_bucket is not None:
+                        session_bucket.refund()
+                    return wait
+            return 0.0
+
+    def _session_bucket_locked(self, session_id: str, rate_class: str, now: float) -> Optional[TokenBucket]:
+        limit = self.session_limits.get(rate_class)
+        if limit is None:
+            return None
+        key = (session_id, rate_class)
+        bucket = self._sessions.get(key)
+        if bucket is None:
+            bucket = self._sessions[key] = TokenBucket(limit, now)
+            while len(self._sessions) > MAX_TRACKED_SESSIONS * len(RATE_CLASSES):
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(key)
+        return bucket
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """The limiter shared by every router in this process, or None if disabled."""
+    global _limiter
+    if not RATE_LIMITS_ENABLED:
+        return None
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
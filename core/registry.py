@@ -3,19 +3,46 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable, Dict, Iterable, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional
 
 from core.errors import CommandError
+from core.ratelimit import EXEC, MONITOR, RATE_CLASSES, READ, WRITE
 from core.session import SessionContext
 
 
 @dataclass(frozen=True)
-class CommandSpec:
-    """Specification for a command handler."""
+class PathAccess:
+    """Paths a command invocation reads and writes (subtrees included)."""
 
-    handler: Callable[[SessionContext, List[str]], str]
+    reads: FrozenSet[Path] = frozenset()
+    writes: FrozenSet[Path] = frozenset()
+
+
+AccessFn = Callable[[SessionContext, List[str]], PathAccess]
+
+
+def no_path_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    """Access function for commands that touch no workspace paths."""
+    return PathAccess()
+
+
+class CommandSpec(NamedTuple):
+    """Specification for a command handler.
+
+    ``access`` reports the paths an invocation touches. Commands without one
+    (or that change session state such as the cwd) are treated as touching
+    everything. ``structured`` handlers return :class:`core.output.Records`
+    and accept ``--json``. ``rate_class`` picks the rate-limit buckets the
+    command draws from.
+    """
+
+    handler: Callable[[SessionContext, List[str]], Any]
     usage: str
     description: str
+    access: Optional[AccessFn] = None
+    structured: bool = False
+    rate_class: str = READ
 
 
 class CommandRegistry:
@@ -23,15 +50,33 @@ class CommandRegistry:
 
     def __init__(self) -> None:
         self._commands: Dict[str, CommandSpec] = {}
+        self._sorted_names: Optional[List[str]] = None
+        self.version = 0
 
-    def register(self, name: str, handler: Callable[..., dict], usage: str, description: str) -> None:
-        self._commands[name] = CommandSpec(handler, usage, description)
+    def register(
+        self,
+        name: str,
+        handler: Callable[..., dict],
+        usage: str,
+        description: str,
+        access: Optional[AccessFn] = None,
+        *,
+        structured: bool = False,
+        rate_class: str = READ,
+    ) -> None:
+        if rate_class not in RATE_CLASSES:
+            raise ValueError(f"Unknown rate class: {rate_class}")
+        self._commands[name] = CommandSpec(handler, usage, description, access, structured, rate_class)
+        self._sorted_names = None
+        self.version += 1
 
     def get(self, name: str) -> Optional[CommandSpec]:
         return self._commands.get(name)
 
     def list_commands(self) -> List[str]:
-        return sorted(self._commands.keys())
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._commands.keys())
+        return list(self._sorted_names)
 
     def __contains__(self, name: str) -> bool:  # pragma: no cover - helper
         return name in self._commands
@@ -39,25 +84,151 @@ class CommandRegistry:
 
 def create_default_registry() -> CommandRegistry:
     """Create a registry populated with built-in commands."""
+    from core import subprocess_adapter
+    from core.output import Records
+    from fs import archive as fs_archive
+    from fs import dedupe as fs_dedupe
+    from fs import hashing as fs_hashing
     from fs import ops as fs_ops
+    from fs import sortops as fs_sortops
+    from fs import textops as fs_textops
     from monitor import stats as monitor_stats
 
     registry = CommandRegistry()
 
-    registry.register("pwd", fs_ops.pwd_handler, "pwd", "Print the current working directory.")
+    registry.register("pwd", fs_ops.pwd_handler, "pwd", "Print the current working directory.", no_path_access)
     registry.register("cd", fs_ops.cd_handler, "cd <path>", "Change into a directory within the workspace.")
-    registry.register("ls", fs_ops.ls_handler, "ls [path] [--all]", "List directory contents.")
-    registry.register("mkdir", fs_ops.mkdir_handler, "mkdir <name>", "Create a directory.")
+    registry.register(
+        "ls",
+        fs_ops.ls_handler,
+        "ls [path] [--all] [--json]",
+        "List directory contents.",
+        fs_ops.read_access,
+        structured=True,
+    )
+    registry.register(
+        "mkdir", fs_ops.mkdir_handler, "mkdir <name>", "Create a directory.", fs_ops.write_access, rate_class=WRITE
+    )
     registry.register(
         "rm",
         fs_ops.rm_handler,
         "rm <path> [-r]",
         "Removes a file. Use -r to remove directories recursively. This action cannot be undone.",
+        fs_ops.write_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "mv",
+        fs_ops.mv_handler,
+        "mv <src> <dst>",
+        "Move or rename files and directories.",
+        fs_ops.move_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "cp",
+        fs_ops.cp_handler,
+        "cp <src> <dst> [-r]",
+        "Copy files and directories.",
+        fs_ops.copy_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "touch",
+        fs_ops.touch_handler,
+        "touch <file>",
+        "Create an empty file or update its timestamp.",
+        fs_ops.write_access,
+        rate_class=WRITE,
+    )
+    registry.register("cat", fs_ops.cat_handler, "cat <file>", "Show the contents of a file.", fs_ops.read_access)
+    registry.register(
+        "head",
+        fs_textops.head_handler,
+        "head [-n N | -c N] <file>...",
+        "Show the first lines of files.",
+        fs_textops.head_tail_access,
+    )
+    registry.register(
+        "tail",
+        fs_textops.tail_handler,
+        "tail [-n N | -n +N | -c N] [-f] <file>...",
+        "Show the last lines of files; -f follows a growing file (streaming sessions only).",
+        fs_textops.head_tail_access,
+    )
+    registry.register(
+        "wc",
+        fs_textops.wc_handler,
+        "wc [-l] [-w] [-c] [--json] <file>...",
+        "Count lines, words and bytes in files.",
+        fs_textops.wc_access,
+        structured=True,
+    )
+    registry.register(
+        "sha256sum",
+        fs_hashing.sha256sum_handler,
+        "sha256sum <path>... [--json] | sha256sum --check <manifest>",
+        "Print or verify SHA-256 checksums; directories are hashed recursively.",
+        fs_hashing.hashsum_access,
+        structured=True,
+    )
+    registry.register(
+        "hashsum",
+        fs_hashing.hashsum_handler,
+        fs_hashing.USAGE,
+        "Print or verify checksums with any hashlib algorithm (default sha256).",
+        fs_hashing.hashsum_access,
+        structured=True,
+    )
+    registry.register(
+        "dedupe",
+        fs_dedupe.dedupe_handler,
+        fs_dedupe.USAGE,
+        "Find duplicate files by size, edge hash, then full hash; --hardlink links copies to one file.",
+        fs_dedupe.dedupe_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "archive",
+        fs_archive.archive_handler,
+        fs_archive.ARCHIVE_USAGE,
+        "Stream files and directories into a tar, tar.gz (compressed in parallel) or zip archive.",
+        fs_archive.archive_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "extract",
+        fs_archive.extract_handler,
+        fs_archive.EXTRACT_USAGE,
+        "Extract a tar, tar.gz or zip archive; members outside the destination are refused.",
+        fs_archive.extract_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "sort",
+        fs_sortops.sort_handler,
+        fs_sortops.SORT_USAGE,
+        "Sort lines of files; inputs larger than SORT_MEMORY_BYTES are merge-sorted on disk.",
+        fs_sortops.sort_access,
+        rate_class=WRITE,
+    )
+    registry.register(
+        "uniq",
+        fs_sortops.uniq_handler,
+        fs_sortops.UNIQ_USAGE,
+        "Collapse adjacent repeated lines; -c prefixes each with its count.",
+        fs_sortops.uniq_access,
+        rate_class=WRITE,
+    )
+
+    registry.register(
+        "exec",
+        subprocess_adapter.exec_handler,
+        "exec <command> [args...]",
+        "Run an external command in the workspace (requires ALLOW_SUBPROCESS).",
+        subprocess_adapter.exec_access,
+        rate_class=EXEC,
     )
-    registry.register("mv", fs_ops.mv_handler, "mv <src> <dst>", "Move or rename files and directories.")
-    registry.register("cp", fs_ops.cp_handler, "cp <src> <dst> [-r]", "Copy files and directories.")
-    registry.register("touch", fs_ops.touch_handler, "touch <file>", "Create an empty file or update its timestamp.")
-    registry.register("cat", fs_ops.cat_handler, "cat <file>", "Show the contents of a file (truncated).")
 
     def cpu_handler(ctx, args):
         return monitor_stats.cpu()
@@ -82,11 +253,19 @@ def create_default_registry() -> CommandRegistry:
                 top = max(1, int(args[0]))
             else:
                 raise CommandError("Usage: ps [--top <n>]")
-        return monitor_stats.ps(top)
+        return Records(monitor_stats.ps_rows(top), monitor_stats.format_processes)
 
-    registry.register("cpu", cpu_handler, "cpu", "Show CPU utilisation.")
-    registry.register("mem", mem_handler, "mem", "Show memory utilisation.")
-    registry.register("disk", disk_handler, "disk", "Show disk utilisation.")
-    registry.register("ps", ps_handler, "ps [--top <n>]", "List top processes by CPU usage.")
+    registry.register("cpu", cpu_handler, "cpu", "Show CPU utilisation.", no_path_access, rate_class=MONITOR)
+    registry.register("mem", mem_handler, "mem", "Show memory utilisation.", no_path_access, rate_class=MONITOR)
+    registry.register("disk", disk_handler, "disk", "Show disk utilisation.", no_path_access, rate_class=MONITOR)
+    registry.register(
+        "ps",
+        ps_handler,
+        "ps [--top <n>] [--json]",
+        "List top processes by CPU usage.",
+        no_path_access,
+        structured=True,
+        rate_class=MONITOR,
+    )
 
     return registry
@@ -6,20 +6,136 @@ import shlex
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
-from core.errors import AboveRootError, RootEscapeError, CommandError
-from core.registry import CommandRegistry
+from core.errors import AboveRootError, CommandError, CommandFailedError, RootEscapeError
+from core.locks import get_lock_manager
+from core.output import Records
+from core.pager import Page
+from core.ratelimit import READ, RateLimiter, get_rate_limiter
+from core.registry import CommandRegistry, CommandSpec
 from core.session import SessionContext
+from fs import paths
+from fs.paths import resolution_cache
+
+# Filesystem commands that never rename or remove path components, so a run of
+# them can safely share one path-resolution cache inside a batch.
+BATCH_GROUPABLE = frozenset({"pwd", "ls", "mkdir", "touch", "cp", "cat"})
+# Commands that may invalidate resolved paths; they close the current group.
+BATCH_GROUP_TERMINATORS = frozenset({"cd", "mv", "rm"})
+# Asks a command with structured output for its records as JSON.
+JSON_FLAG = "--json"
 
 
-@dataclass
 class Response:
-    stdout: str = ""
-    stderr: str = ""
-    status: str = "ok"
-    new_cwd: Optional[Path] = None
-    meta: dict = field(default_factory=dict)
+    """Outcome of one command.
+
+    Responses are slotted and build as little as possible up front: ``meta``
+    is only materialised when read (``exec_ms``, which every response has,
+    lives in its own slot), and when a handler returned ``records`` the
+    ``stdout`` text is formatted from them on first access.
+    """
+
+    __slots__ = ("_stdout", "stderr", "status", "new_cwd", "records", "exec_ms", "_meta")
+
+    def __init__(
+        self,
+        stdout: str = "",
+        stderr: str = "",
+        status: str = "ok",
+        new_cwd: Optional[Path] = None,
+        meta: Optional[dict] = None,
+        *,
+        records: Optional[Records] = None,
+        exec_ms: Optional[float] = None,
+    ) -> None:
+        self._stdout: Optional[str] = None if records is not None and not stdout else stdout
+        self.stderr = stderr
+        self.status = status
+        self.new_cwd = new_cwd
+        self.records = records
+        self._meta: Optional[dict] = dict(meta) if meta else None
+        if exec_ms is None and meta:
+            exec_ms = meta.get("exec_ms")
+        self.exec_ms = exec_ms
+
+    @property
+    def stdout(self) -> str:
+        if self._stdout is None:
+            self._stdout = self.records.text() if self.records is not None else ""
+        return self._stdout
+
+    @stdout.setter
+    def stdout(self, value: str) -> None:
+        self._stdout = value
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            self._meta = {}
+        if self.exec_ms is not None:
+            self._meta.setdefault("exec_ms", self.exec_ms)
+        return self._meta
+
+    @meta.setter
+    def meta(self, value: dict) -> None:
+        self._meta = value
+
+    def meta_value(self, key: str, default: Any = None) -> Any:
+        """Read one meta entry without materialising ``meta``."""
+        if key == "exec_ms" and self.exec_ms is not None:
+            return self.exec_ms
+        return self._meta.get(key, default) if self._meta else default
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Response):
+            return NotImplemented
+        return (self.stdout, self.stderr, self.status, self.new_cwd, self.meta) == (
+            other.stdout, other.stderr, other.status, other.new_cwd, other.meta
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Response(stdout={self.stdout!r}, stderr={self.stderr!r}, status={self.status!r}, "
+            f"new_cwd={self.new_cwd!r}, meta={self.meta!r})"
+        )
+
+
+@dataclass
+class BatchResult:
+    results: List[Response] = field(default_factory=list)
+    timing: Dict[str, float] = field(default_factory=dict)
+    cwd: Optional[Path] = None
+
+    @property
+    def status(self) -> str:
+        return "ok" if all(result.status == "ok" for result in self.results) else "error"
+
+
+def _page_meta(page: Page) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {"page": page.number, "pages": page.pages}
+    if page.cursor is not None:
+        meta["cursor"] = page.cursor
+    return meta
+
+
+def _group_batch(names: List[str]) -> List[Tuple[int, int]]:
+    """Split a batch into ``(start, end)`` runs of groupable commands.
+
+    A run may end with one terminator; every other command forms its own group.
+    """
+    groups: List[Tuple[int, int]] = []
+    idx = 0
+    while idx < len(names):
+        end = idx + 1
+        if names[idx] in BATCH_GROUPABLE:
+            while end < len(names) and names[end] in BATCH_GROUPABLE:
+                end += 1
+            if end < len(names) and names[end] in BATCH_GROUP_TERMINATORS:
+                end += 1
+        groups.append((idx, end))
+        idx = end
+    return groups
 
 
 class CommandRouter:
@@ -28,6 +144,7 @@ class CommandRouter:
     def __init__(self, registry: CommandRegistry, session: SessionContext) -> None:
         self.registry = registry
         self.session = session
+        self.limiter: Optional[RateLimiter] = get_rate_limiter()
 
     def parse_input(self, input_str: str) -> tuple[str, List[str]]:
         if not input_str.strip():
@@ -37,24 +154,128 @@ class CommandRouter:
             return "", []
         return tokens[0], tokens[1:]
 
-    def execute(self, input_str: str) -> Response:
+    def execute(self, input_str: str, *, paginate: bool = True) -> Response:
+        """
+        Run one command line.
+
+        With *paginate*, output longer than a page is kept in the session's
+        output buffers and only its first page is returned; ``meta`` then
+        holds the ``cursor`` that ``more`` takes to fetch the next one.
+        """
         trimmed = input_str.strip()
         if not trimmed:
             return Response()
 
         start = time.perf_counter()
-        command_name, args = self.parse_input(trimmed)
+        try:
+            command_name, args = self.parse_input(trimmed)
+        except ValueError as exc:
+            # shlex: unbalanced quotes or a trailing escape.
+            elapsed = (time.perf_counter() - start) * 1000
+            return Response(stderr=f"Invalid syntax in {trimmed!r}: {exc}", status="error", exec_ms=elapsed)
 
         if not command_name:
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(meta={"exec_ms": elapsed})
+            return Response(exec_ms=elapsed)
 
         self.session.add_to_history(trimmed)
+        response = self.dispatch(command_name, args, start)
+        return self.paginate(response) if paginate else response
+
+    def more(self, cursor: str, start: Optional[float] = None) -> Response:
+        """The page of buffered output that *cursor* points at."""
+        start = time.perf_counter() if start is None else start
+        try:
+            page = self.session.outputs.fetch(cursor)
+        except CommandError as exc:
+            elapsed = (time.perf_counter() - start) * 1000
+            return Response(stderr=str(exc), status="error", exec_ms=elapsed)
+        elapsed = (time.perf_counter() - start) * 1000
+        return Response(stdout=page.text, meta=_page_meta(page), exec_ms=elapsed)
+
+    def paginate(self, response: Response) -> Response:
+        """Replace output longer than one page with its first page and a cursor."""
+        outputs = self.session.outputs
+        # Streaming clients already receive the output incrementally.
+        if self.session.sink is not None or not outputs.needs_paging(response.stdout):
+            return response
+        page = outputs.store(response.stdout)
+        response.stdout = page.text
+        response.meta.update(_page_meta(page))
+        return response
+
+    def execute_batch(self, commands: List[str], stop_on_error: bool = True) -> BatchResult:
+        """Run several commands in one call.
+
+        All commands are parsed before any of them runs, so a syntax error
+        anywhere fails fast without side effects. Consecutive filesystem
+        commands share one path-resolution cache, and history is written once
+        for everything that actually ran.
+        """
+        batch_start = time.perf_counter()
+        parsed: List[Tuple[str, str, List[str]]] = []
+        for raw in commands:
+            trimmed = raw.strip()
+            try:
+                command_name, args = self.parse_input(trimmed)
+            except ValueError as exc:
+                raise CommandError(f"Invalid syntax in {trimmed!r}: {exc}") from exc
+            parsed.append((trimmed, command_name, args))
+        parse_done = time.perf_counter()
+
+        results: List[Response] = []
+        pending_history: List[str] = []
+        history_ms = 0.0
+        groups = _group_batch([command_name for _, command_name, _ in parsed])
+        stopped = False
+        for group in groups:
+            with resolution_cache():
+                for trimmed, command_name, args in parsed[group[0]:group[1]]:
+                    if not command_name:
+                        results.append(Response())
+                        continue
+                    pending_history.append(trimmed)
+                    if command_name == "history":
+                        # `history` must see everything queued before it, itself included.
+                        flush_start = time.perf_counter()
+                        self.session.extend_history(pending_history)
+                        pending_history = []
+                        history_ms += (time.perf_counter() - flush_start) * 1000
+                    response = self.paginate(self.dispatch(command_name, args))
+                    results.append(response)
+                    if stop_on_error and response.status != "ok":
+                        stopped = True
+                        break
+            if stopped:
+                break
+        exec_done = time.perf_counter()
+
+        self.session.extend_history(pending_history)
+        finished = time.perf_counter()
+        history_ms += (finished - exec_done) * 1000
+
+        timing = {
+            "parse_ms": (parse_done - batch_start) * 1000,
+            "exec_ms": (finished - parse_done) * 1000 - history_ms,
+            "history_ms": history_ms,
+            "total_ms": (finished - batch_start) * 1000,
+            "groups": len(groups),
+        }
+        return BatchResult(results=results, timing=timing, cwd=self.session.cwd)
+
+    def dispatch(self, command_name: str, args: List[str], start: Optional[float] = None) -> Response:
+        """Run an already parsed command without touching history."""
+        if start is None:
+            start = time.perf_counter()
+
+        rejected = self._check_rate(command_name, start)
+        if rejected is not None:
+            return rejected
 
         for arg in args:
             if arg.startswith("<") and arg.endswith(">"):
                 elapsed = (time.perf_counter() - start) * 1000
-                return Response(stderr="Missing required argument.", status="error", meta={"exec_ms": elapsed})
+                return Response(stderr="Missing required argument.", status="error", exec_ms=elapsed)
 
         if command_name == "help":
             try:
@@ -66,7 +287,7 @@ class CommandRouter:
                 stderr = str(exc)
                 status = "error"
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stdout=stdout, stderr=stderr, status=status, meta={"exec_ms": elapsed})
+            return Response(stdout=stdout, stderr=stderr, status=status, exec_ms=elapsed)
 
         if command_name == "history":
             try:
@@ -78,7 +299,13 @@ class CommandRouter:
                 stderr = str(exc)
                 status = "error"
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stdout=stdout, stderr=stderr, status=status, meta={"exec_ms": elapsed})
+            return Response(stdout=stdout, stderr=stderr, status=status, exec_ms=elapsed)
+
+        if command_name == "more":
+            if len(args) != 1:
+                elapsed = (time.perf_counter() - start) * 1000
+                return Response(stderr="Usage: more <cursor>", status="error", exec_ms=elapsed)
+            return self.more(args[0], start)
 
         spec = self.registry.get(command_name)
         if spec is None:
@@ -86,30 +313,75 @@ class CommandRouter:
             return Response(
                 stderr="Command not found. Try `help`.",
                 status="error",
-                meta={"exec_ms": elapsed},
+                exec_ms=elapsed,
             )
 
         ctx = self.session
 
         try:
-            output = spec.handler(ctx, args)
-            stdout = output or ""
+            as_json = spec.structured and JSON_FLAG in args
+            if as_json:
+                args = [arg for arg in args if arg != JSON_FLAG]
+            reads, writes = self._lock_paths(spec, args)
+            with get_lock_manager().hold(reads, writes):
+                output = spec.handler(ctx, args)
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stdout=stdout, status="ok", new_cwd=ctx.cwd, meta={"exec_ms": elapsed})
+            if isinstance(output, Records):
+                stdout = output.to_json() if as_json else ""
+                return Response(stdout=stdout, status="ok", new_cwd=ctx.cwd, records=output, exec_ms=elapsed)
+            stdout = str(output) if output else ""
+            return Response(
+                stdout=stdout, status="ok", new_cwd=ctx.cwd, meta=getattr(output, "meta", None), exec_ms=elapsed
+            )
         except RootEscapeError:
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stderr="Access denied: path escapes workspace root.", status="error", meta={"exec_ms": elapsed})
+            return Response(stderr="Access denied: path escapes workspace root.", status="error", exec_ms=elapsed)
         except AboveRootError:
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stderr="Cannot navigate above workspace root.", status="error", meta={"exec_ms": elapsed})
+            return Response(stderr="Cannot navigate above workspace root.", status="error", exec_ms=elapsed)
+        except CommandFailedError as exc:
+            elapsed = (time.perf_counter() - start) * 1000
+            stderr = "\n".join(part for part in (exc.stderr.rstrip(), str(exc)) if part)
+            return Response(stdout=exc.stdout, stderr=stderr, status="error", meta=exc.meta, exec_ms=elapsed)
         except FileNotFoundError as exc:
             filename = getattr(exc, "filename", None) or (exc.args[0] if exc.args else "file")
             filename_str = Path(filename).name if isinstance(filename, (Path, str)) else str(filename)
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stderr=f"File not found: {filename_str}", status="error", meta={"exec_ms": elapsed})
+            return Response(stderr=f"File not found: {filename_str}", status="error", exec_ms=elapsed)
         except Exception as exc:
             elapsed = (time.perf_counter() - start) * 1000
-            return Response(stderr=str(exc), status="error", meta={"exec_ms": elapsed})
+            retry_after = getattr(exc, "retry_after", None)
+            meta = {"retry_after": round(retry_after, 3)} if retry_after is not None else None
+            return Response(stderr=str(exc), status="error", meta=meta, exec_ms=elapsed)
+
+    def _check_rate(self, command_name: str, start: float) -> Optional[Response]:
+        """A rejection if *command_name* is over its rate limit, else None."""
+        if self.limiter is None:
+            return None
+        spec = self.registry.get(command_name)
+        rate_class = spec.rate_class if spec is not None else READ
+        retry_after = self.limiter.admit(self.session.session_id, rate_class)
+        if not retry_after:
+            return None
+        elapsed = (time.perf_counter() - start) * 1000
+        return Response(
+            stderr=f"Rate limit exceeded for {rate_class} commands; retry in {retry_after:.2f}s.",
+            status="error",
+            meta={"retry_after": round(retry_after, 3), "rate_class": rate_class},
+            exec_ms=elapsed,
+        )
+
+    def _lock_paths(self, spec: CommandSpec, args: List[str]) -> Tuple[FrozenSet[Path], FrozenSet[Path]]:
+        """Paths to lock shared and exclusive while *spec* runs."""
+        if spec.access is not None:
+            try:
+                access = spec.access(self.session, args)
+                return access.reads, access.writes
+            except Exception:
+                # The handler will report the bad arguments itself.
+                pass
+        # Unknown effects: hold the whole workspace exclusively.
+        return frozenset(), frozenset({paths.WORKSPACE_ROOT})
 
     def _handle_help(self, args: List[str]) -> str:
         if not args:
@@ -131,6 +403,17 @@ class CommandRouter:
         return "\n".join([f"Usage: {spec.usage}", description])
 
     def _handle_history(self, args: List[str]) -> str:
+        if args and args[0] == "search":
+            if len(args) < 2:
+                raise CommandError("Usage: history search <text>")
+            matches = [
+                command
+                for command in self.session.search_history(" ".join(args[1:]), limit=21)
+                if not command.startswith("history search")
+            ][:20]
+            if not matches:
+                return "No matching commands."
+            return "\n".join(matches)
         if args:
             raise CommandError("History command takes no arguments.")
 
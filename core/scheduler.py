@@ -0,0 +1,179 @@
+"""Process-wide admission control for external commands.
+
+At most ``max_concurrent`` child processes run at once. Callers beyond that
+wait in per-session queues that are served by deficit round robin, so a
+session firing many commands cannot starve one that fires a few. Once more
+than ``max_queue`` callers are waiting, new ones are turned away instead of
+piling up.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, Optional
+
+from core.errors import CommandError
+
+__all__ = ["ExecutionScheduler", "SchedulerBusyError", "Ticket", "get_scheduler"]
+
+MAX_CONCURRENT = int(os.getenv("SUBPROCESS_MAX_CONCURRENT", str(os.cpu_count() or 1)))
+MAX_QUEUE = int(os.getenv("SUBPROCESS_MAX_QUEUE", "64"))
+QUEUE_TIMEOUT = float(os.getenv("SUBPROCESS_QUEUE_TIMEOUT", "30"))
+# Credit a session earns each time its turn comes round; a command costs at
+# least one quantum.
+QUANTUM = 1.0
+
+
+class SchedulerBusyError(CommandError):
+    """Raised when the execution queue is full or a caller waited too long."""
+
+    def __init__(self, message: str, retry_after: float = 1.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    """One admitted caller; ``queue_ms`` is how long it waited for a slot."""
+
+    session_id: str
+    cost: float
+    enqueued: float
+    granted: bool = False
+    queue_ms: float = 0.0
+
+
+class ExecutionScheduler:
+    """Bounded concurrency with per-session deficit-round-robin queues."""
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT,
+        max_queue: int = MAX_QUEUE,
+        queue_timeout: float = QUEUE_TIMEOUT,
+        quantum: float = QUANTUM,
+    ) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.quantum = quantum
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._queues: Dict[str, Deque[Ticket]] = {}
+        self._deficit: Dict[str, float] = {}
+        # Sessions with queued callers, in round-robin order.
+        self._active: Deque[str] = deque()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @contextmanager
+    def slot(self, session_id: str, cost: float = QUANTUM) -> Iterator[Ticket]:
+        """Hold one execution slot for the duration of the ``with`` block."""
+        ticket = self.acquire(session_id, cost)
+        try:
+            yield ticket
+        finally:
+            self.release()
+
+    def acquire(self, session_id: str, cost: float = QUANTUM, timeout: Optional[float] = None) -> Ticket:
+        """
+        Wait for an execution slot.
+
+        Args:
+            session_id: Queue the caller is charged to
+            cost: Relative cost of the command; heavier ones get turns less often
+            timeout: Seconds to wait before giving up (defaults to ``queue_timeout``)
+
+        Raises:
+            SchedulerBusyError: If the queue is full or the wait times out
+        """
+        ticket = Ticket(session_id=session_id, cost=max(cost, self.quantum), enqueued=time.monotonic())
+        with self._cond:
+            if self._running < self.max_concurrent and not self._waiting:
+                self._running += 1
+                ticket.granted = True
+                return ticket
+            if self._waiting >= self.max_queue:
+                raise SchedulerBusyError(
+                    f"Server busy: {self._waiting} commands already queued; retry shortly."
+                )
+            queue = self._queues.get(session_id)
+            if queue is None:
+                queue = self._queues[session_id] = deque()
+                self._deficit[session_id] = 0.0
+                self._active.append(session_id)
+            queue.append(ticket)
+            self._waiting += 1
+            self._dispatch_locked()
+            limit = self.queue_timeout if timeout is None else timeout
+            if not self._cond.wait_for(lambda: ticket.granted, timeout=limit):
+                self._withdraw_locked(ticket)
+                raise SchedulerBusyError(f"Server busy: no execution slot freed up within {limit:g}s; retry shortly.")
+        ticket.queue_ms = (time.monotonic() - ticket.enqueued) * 1000
+        return ticket
+
+    def release(self) -> None:
+        with self._cond:
+            self._running -= 1
+            self._dispatch_locked()
+
+    def _dispatch_locked(self) -> None:
+        granted = False
+        while self._running < self.max_concurrent and self._active:
+            session_id = self._active[0]
+            queue = self._queues[session_id]
+            head = queue[0]
+            if self._deficit[session_id] < head.cost:
+                self._deficit[session_id] += self.quantum
+                if self._deficit[session_id] < head.cost:
+                    self._active.rotate(-1)
+                    continue
+            queue.popleft()
+            self._deficit[session_id] -= head.cost
+            self._waiting -= 1
+            self._running += 1
+            head.granted = True
+            granted = True
+            if not queue:
+                # An idle session does not bank credit for later.
+                self._active.popleft()
+                del self._queues[session_id], self._deficit[session_id]
+            elif self._deficit[session_id] < queue[0].cost:
+                self._active.rotate(-1)
+        if granted:
+            self._cond.notify_all()
+
+    def _withdraw_locked(self, ticket: Ticket) -> None:
+        queue = self._queues.get(ticket.session_id)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self._waiting -= 1
+        if not queue:
+            self._active.remove(ticket.session_id)
+            del self._queues[ticket.session_id], self._deficit[ticket.session_id]
+
+
+_scheduler: Optional[ExecutionScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ExecutionScheduler:
+    """The scheduler shared by every session in this process."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ExecutionScheduler()
+        return _scheduler
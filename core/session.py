@@ -2,16 +2,142 @@
 Session management for command execution context.
 """
 
+import os
+import threading
+import time
+import uuid
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from core.history import HistoryStore
+from core.pager import OutputBuffers
+
+HISTORY_LIMIT = int(os.getenv("HISTORY_LIMIT", "1000"))
+
+
+class UsageTotals:
+    """
+    Resources used by the child processes of one session.
+
+    Lifetime totals are kept alongside the CPU time of recent commands, so a
+    session can be throttled on what it used lately rather than ever.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.commands = 0
+        self.cpu_seconds = 0.0
+        self.max_rss_bytes = 0
+        self.block_reads = 0
+        self.block_writes = 0
+        self._recent: Deque[Tuple[float, float]] = deque()
+
+    def record(
+        self,
+        cpu_seconds: float,
+        max_rss_bytes: int = 0,
+        block_reads: int = 0,
+        block_writes: int = 0,
+        now: Optional[float] = None,
+    ) -> None:
+        """Add one finished command's usage."""
+        stamp = time.monotonic() if now is None else now
+        with self._lock:
+            self.commands += 1
+            self.cpu_seconds += cpu_seconds
+            self.max_rss_bytes = max(self.max_rss_bytes, max_rss_bytes)
+            self.block_reads += block_reads
+            self.block_writes += block_writes
+            self._recent.append((stamp, cpu_seconds))
+
+    def recent_cpu(self, window: float, now: Optional[float] = None) -> float:
+        """CPU seconds used by commands that finished in the last *window* seconds."""
+        stamp = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(stamp - window)
+            return sum(cpu for _, cpu in self._recent)
+
+    def retry_after(self, budget: float, window: float, now: Optional[float] = None) -> float:
+        """
+        Seconds until recent CPU use drops below *budget*; 0 if it already is.
+        
+        Args:
+            budget: CPU seconds a session may use per window
+            window: Length of the sliding window in seconds
+            now: Monotonic timestamp (defaults to the current time)
+        """
+        stamp = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(stamp - window)
+            used = sum(cpu for _, cpu in self._recent)
+            if used < budget:
+                return 0.0
+            # Find the oldest command whose expiry brings usage back under budget.
+            for finished, cpu in self._recent:
+                used -= cpu
+                if used < budget:
+                    return max(0.0, finished + window - stamp)
+            return window
+
+    def mean_cpu(self) -> float:
+        """Average CPU seconds per recorded command."""
+        with self._lock:
+            return self.cpu_seconds / self.commands if self.commands else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "commands": self.commands,
+                "cpu_seconds": round(self.cpu_seconds, 6),
+                "max_rss_bytes": self.max_rss_bytes,
+                "block_reads": self.block_reads,
+                "block_writes": self.block_writes,
+            }
+
+    def _expire(self, cutoff: float) -> None:
+        while self._recent and self._recent[0][0] <= cutoff:
+            self._recent.popleft()
 
 
 @dataclass
 class SessionContext:
     """Context for a command execution session."""
     cwd: Path = Path(".").resolve()
-    history: List[str] = field(default_factory=list)
+    history: Deque[str] = field(default_factory=lambda: deque(maxlen=HISTORY_LIMIT))
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # Optional persistent log shared by every session of the same user.
+    history_store: Optional[HistoryStore] = field(default=None, repr=False, compare=False)
+    # Set while a command runs under a streaming client; handlers may push
+    # ``(event, data)`` pairs through it instead of buffering their output.
+    sink: Optional[Callable[[str, Any], None]] = field(default=None, repr=False, compare=False)
+    # Resources used by processes this session started through ``exec``.
+    usage: UsageTotals = field(default_factory=UsageTotals, repr=False, compare=False)
+    # Full text of recent outputs too long for one page, read back with ``more``.
+    outputs: OutputBuffers = field(default_factory=OutputBuffers, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        if not isinstance(self.history, deque) or self.history.maxlen != HISTORY_LIMIT:
+            self.history = deque(self.history, maxlen=HISTORY_LIMIT)
+        if self.history_store is not None and not self.history:
+            self.history.extend(self.history_store.recent(HISTORY_LIMIT))
+    
+    def emit(self, event: str, data: Any) -> bool:
+        """
+        Push an incremental event to the attached stream, if any.
+        
+        Args:
+            event: Event name, e.g. ``"output"`` or ``"progress"``
+            data: JSON-serialisable payload
+            
+        Returns:
+            True if a stream consumed the event, False if none is attached
+        """
+        if self.sink is None:
+            return False
+        self.sink(event, data)
+        return True
     
     def add_to_history(self, command: str) -> None:
         """
@@ -24,5 +150,41 @@ class SessionContext:
         if not token:
             return
         self.history.append(token)
-        if len(self.history) > 50:
-            del self.history[:-50]
+        if self.history_store is not None:
+            self.history_store.append(token)
+    
+    def extend_history(self, commands: Iterable[str]) -> None:
+        """
+        Add several commands to the session history in one step.
+        
+        Args:
+            commands: Command strings in execution order
+        """
+        tokens = [command.strip() for command in commands if command.strip()]
+        if not tokens:
+            return
+        self.history.extend(tokens)
+        if self.history_store is not None:
+            self.history_store.extend(tokens)
+    
+    def search_history(self, substring: str, limit: int = 20) -> List[str]:
+        """
+        Find previous commands containing a substring, newest first.
+        
+        Args:
+            substring: Text to look for (case-insensitive)
+            limit: Maximum number of distinct commands to return
+            
+        Returns:
+            Matching commands, most recent first
+        """
+        if self.history_store is not None:
+            return [command for _, _, command in self.history_store.search(substring, limit)]
+        needle = substring.lower()
+        matches: List[str] = []
+        for command in reversed(self.history):
+            if needle in command.lower() and command not in matches:
+                matches.append(command)
+                if len(matches) >= limit:
+                    break
+        return matches
@@ -0,0 +1,321 @@
+"""Shared storage for session state across server processes.
+
+Only the part of a :class:`SessionContext` that must survive a request
+landing on another worker is stored: the cwd (relative to the workspace
+root) and the tail of the history. Versions are allocated by the store: a
+save is a compare-and-set that succeeds only if the stored version is still
+the one the caller last saw. A worker whose copy is behind learns so from
+the failed save instead of overwriting a newer state, and
+:func:`commit_state` then replays its change on top of the newer one. A
+worker refreshes its copy with one conditional read that returns nothing
+when its copy is current.
+
+Two backends are provided. :class:`MemorySessionStore` serves a single
+process. :class:`SqliteSessionStore` is a WAL-mode database file shared by
+the processes on one host. Saves that arrive while another thread is
+writing are committed together in its next transaction (group commit), and
+reads go through an LRU cache of decoded states.
+"""
+
+from __future__ import annotations
+
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.session import SessionContext
+
+__all__ = [
+    "MemorySessionStore",
+    "SessionState",
+    "SessionStore",
+    "SqliteSessionStore",
+    "commit_state",
+    "create_session_store",
+]
+
+DEFAULT_STORE_PATH = Path(os.getenv("SESSION_STORE_PATH", "~/.codemate/sessions.db")).expanduser()
+STATE_HISTORY = int(os.getenv("SESSION_STATE_HISTORY", "200"))
+# Stored sessions untouched for this long are deleted.
+STORE_TTL = float(os.getenv("SESSION_STORE_TTL", str(24 * 3600)))
+CACHE_SIZE = 4096
+# Compare-and-set attempts before a save gives up on a session that keeps changing.
+COMMIT_ATTEMPTS = 5
+
+
+@dataclass
+class SessionState:
+    """The portable part of a session."""
+
+    session_id: str
+    cwd: str = "."
+    history: List[str] = field(default_factory=list)
+    version: int = 0
+
+    @classmethod
+    def capture(cls, ctx: SessionContext, root: Path, version: int = 0) -> "SessionState":
+        try:
+            cwd = Path(ctx.cwd).resolve().relative_to(root).as_posix()
+        except ValueError:
+            cwd = "."
+        history = list(ctx.history)[-STATE_HISTORY:] if STATE_HISTORY > 0 else []
+        return cls(session_id=ctx.session_id, cwd=cwd, history=history, version=version)
+
+    def apply(self, ctx: SessionContext, root: Path) -> None:
+        """Copy this state onto *ctx*; a cwd that no longer exists falls back to *root*."""
+        cwd = (root / self.cwd).resolve()
+        ctx.cwd = cwd if cwd.is_dir() else root
+        ctx.history.clear()
+        ctx.history.extend(self.history)
+
+    def dumps(self) -> str:
+        return json.dumps({"c": self.cwd, "h": self.history}, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, session_id: str, version: int, data: str) -> "SessionState":
+        payload = json.loads(data)
+        return cls(session_id=session_id, cwd=payload.get("c", "."), history=payload.get("h", []), version=version)
+
+    def rebase(self, synced: Sequence[str], current: "SessionState") -> "SessionState":
+        """
+        This state replayed on top of *current*, a newer stored state.
+
+        The cwd is ours, as it is the latest change. The history is
+        *current*'s, followed by the commands added here since *synced*, the
+        history as it was last saved or loaded.
+        """
+        history = list(current.history) + _added_since(synced, self.history)
+        history = history[-STATE_HISTORY:] if STATE_HISTORY > 0 else []
+        return SessionState(session_id=self.session_id, cwd=self.cwd, history=history, version=current.version)
+
+
+def _added_since(synced: Sequence[str], history: Sequence[str]) -> List[str]:
+    """Entries at the end of *history* that are not in *synced*, allowing for its head being trimmed."""
+    for start in range(len(synced) + 1):
+        tail = list(synced[start:])
+        if list(history[:len(tail)]) == tail:
+            return list(history[len(tail):])
+    return list(history)
+
+
+class SessionStore(abc.ABC):
+    """Interface shared by the store backends."""
+
+    @abc.abstractmethod
+    def load(self, session_id: str, newer_than: int = -1) -> Optional[SessionState]:
+        """
+        Stored state for *session_id* if its version is above *newer_than*.
+
+        Returns:
+            The state, or None if it is unknown or not newer than *newer_than*
+        """
+
+    @abc.abstractmethod
+    def save(self, state: SessionState) -> bool:
+        """
+        Store *state* if the stored version is still ``state.version``.
+
+        A session that is not stored yet has version 0. On success the store
+        allocates the next version and sets ``state.version`` to it.
+
+        Returns:
+            True if *state* was stored, False if another writer got there first
+        """
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Forget *session_id*."""
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store; states are kept serialised so callers never share them."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._states: Dict[str, Tuple[int, str]] = {}
+
+    def load(self, session_id: str, newer_than: int = -1) -> Optional[SessionState]:
+        with self._lock:
+            stored = self._states.get(session_id)
+        if stored is None or stored[0] <= newer_than:
+            return None
+        return SessionState.loads(session_id, stored[0], stored[1])
+
+    def save(self, state: SessionState) -> bool:
+        with self._lock:
+            current = self._states.get(state.session_id)
+            if (current[0] if current is not None else 0) != state.version:
+                return False
+            state.version += 1
+            self._states[state.session_id] = (state.version, state.dumps())
+            return True
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._states.pop(session_id, None)
+
+
+class _Write:
+    """One save waiting for the transaction that commits it."""
+
+    __slots__ = ("state", "done", "stored")
+
+    def __init__(self, state: SessionState) -> None:
+        self.state = state
+        self.done = False
+        self.stored = False
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    SQLite WAL store shared by the processes on one host.
+
+    ``save`` is a compare-and-set on the stored version. A thread that finds
+    the database busy with another thread's transaction leaves its write
+    queued; whichever thread writes next commits every queued write in one
+    transaction, so concurrent saves share a commit without anyone waiting
+    on a timer. ``load`` answers from the cache when the database has
+    nothing newer, at the cost of one indexed ``SELECT``.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path) if path is not None else DEFAULT_STORE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, version INTEGER NOT NULL, updated REAL NOT NULL, state TEXT NOT NULL)"
+        )
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._queue: List[_Write] = []
+        self._cache: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._last_prune = 0.0
+
+    def load(self, session_id: str, newer_than: int = -1) -> Optional[SessionState]:
+        with self._lock:
+            cached = self._cache.get(session_id)
+        known = max(newer_than, cached.version if cached is not None else -1)
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT version, state FROM sessions WHERE id = ? AND version > ?", (session_id, known)
+            ).fetchone()
+        if row is not None:
+            cached = SessionState.loads(session_id, row[0], row[1])
+            self._remember(cached)
+        if cached is None or cached.version <= newer_than:
+            return None
+        return cached
+
+    def save(self, state: SessionState) -> bool:
+        write = _Write(state)
+        with self._lock:
+            self._queue.append(write)
+        with self._db_lock:
+            # Committed by another thread while this one waited for the lock.
+            if not write.done:
+                self._commit_queue_locked()
+        if write.stored:
+            self._remember(state)
+        return write.stored
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._cache.pop(session_id, None)
+        with self._db_lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._db.close()
+
+    def _commit_queue_locked(self) -> None:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        now = time.time()
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                versions = [self._compare_and_set_locked(write.state, now) for write in batch]
+                if now - self._last_prune > STORE_TTL / 24:
+                    self._db.execute("DELETE FROM sessions WHERE updated < ?", (now - STORE_TTL,))
+                    self._last_prune = now
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            for write, version in zip(batch, versions):
+                if version is not None:
+                    write.state.version = version
+                    write.stored = True
+        finally:
+            for write in batch:
+                write.done = True
+
+    def _compare_and_set_locked(self, state: SessionState, now: float) -> Optional[int]:
+        if state.version == 0:
+            cursor = self._db.execute(
+                "INSERT INTO sessions (id, version, updated, state) VALUES (?, 1, ?, ?) ON CONFLICT(id) DO NOTHING",
+                (state.session_id, now, state.dumps()),
+            )
+        else:
+            cursor = self._db.execute(
+                "UPDATE sessions SET version = version + 1, updated = ?, state = ? WHERE id = ? AND version = ?",
+                (now, state.dumps(), state.session_id, state.version),
+            )
+        return state.version + 1 if cursor.rowcount == 1 else None
+
+    def _remember(self, state: SessionState) -> None:
+        with self._lock:
+            cached = self._cache.get(state.session_id)
+            if cached is not None and cached.version > state.version:
+                return
+            self._cache[state.session_id] = state
+            self._cache.move_to_end(state.session_id)
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+
+def commit_state(store: SessionStore, state: SessionState, synced: Sequence[str]) -> Optional[SessionState]:
+    """
+    Save *state*, rebasing it onto any newer stored state until the save sticks.
+
+    Args:
+        state: Captured at the version the caller last saved or loaded
+        synced: The history as of that version
+
+    Returns:
+        The state as stored: *state* itself, or a rebased copy that the caller
+        should apply since it includes changes made elsewhere. None if the
+        session was deleted or kept changing for ``COMMIT_ATTEMPTS`` tries.
+    """
+    for _ in range(COMMIT_ATTEMPTS):
+        if store.save(state):
+            return state
+        current = store.load(state.session_id)
+        if current is None:
+            return None
+        state, synced = state.rebase(synced, current), current.history
+    return None
+
+
+def create_session_store(kind: Optional[str] = None, path: Optional[Path] = None) -> SessionStore:
+    """Store selected by ``SESSION_STORE`` (``memory`` or ``sqlite``)."""
+    backend = (kind or os.getenv("SESSION_STORE", "memory")).strip().lower()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SqliteSessionStore(path)
+    raise ValueError(f"Unknown session store: {backend}")
@@ -0,0 +1,196 @@
+"""Bounded event streams for pushing command output to remote clients."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Iterator, Optional, Tuple
+
+from core.errors import CommandError
+from core.router import CommandRouter
+
+__all__ = ["OutputStream", "StreamClosedError", "format_sse", "stream_command"]
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+DEFAULT_MAX_EVENTS = 64
+DEFAULT_MAX_BYTES = 256 * 1024
+DEFAULT_PUT_TIMEOUT = 30.0
+
+_DONE = object()
+
+
+class StreamClosedError(CommandError):
+    """Raised in the producer when the consumer went away or stopped reading."""
+
+
+def _event_size(data: Any) -> int:
+    if isinstance(data, str):
+        return len(data)
+    return 64
+
+
+class OutputStream:
+    """Single-producer, single-consumer queue bounded by event count and bytes.
+
+    ``put`` blocks while the buffer is full, so a slow client slows the command
+    down instead of letting the server accumulate its output. A producer that is
+    blocked for longer than ``put_timeout`` gives up with ``StreamClosedError``.
+    """
+
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        put_timeout: float = DEFAULT_PUT_TIMEOUT,
+    ) -> None:
+        self.max_events = max(1, max_events)
+        self.max_bytes = max(1, max_bytes)
+        self.put_timeout = put_timeout
+        self._events: Deque[Tuple[str, Any, int]] = deque()
+        self._bytes = 0
+        self._closed = False
+        self._finished = False
+        self._cond = threading.Condition()
+        self.output_events = 0
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._bytes
+
+    def put(self, event: str, data: Any) -> None:
+        size = _event_size(data)
+        deadline = time.monotonic() + self.put_timeout
+        with self._cond:
+            # A single oversized event is admitted on an empty buffer so it can't wedge the stream.
+            while not self._closed and self._events and (
+                len(self._events) >= self.max_events or self._bytes + size > self.max_bytes
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._closed = True
+                    self._cond.notify_all()
+                    raise StreamClosedError("Stream consumer is too slow; output aborted.")
+                self._cond.wait(remaining)
+            if self._closed:
+                raise StreamClosedError("Stream closed by client.")
+            self._events.append((event, data, size))
+            self._bytes += size
+            if event == "output":
+                self.output_events += 1
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        """Mark the end of the stream once all events have been put."""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Called by the consumer to abandon the stream and unblock the producer."""
+        with self._cond:
+            self._closed = True
+            self._events.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+
+    def events(self, poll_interval: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """Yield ``(event, data)`` pairs until the producer finishes.
+
+        With ``poll_interval`` set, ``("ping", None)`` is yielded whenever no event
+        arrives in time so servers can emit keep-alives.
+        """
+        while True:
+            with self._cond:
+                while not self._events and not self._finished and not self._closed:
+                    if not self._cond.wait(poll_interval) and poll_interval is not None:
+                        break
+                if self._events:
+                    event, data, size = self._events.popleft()
+                    self._bytes -= size
+                    self._cond.notify_all()
+                elif self._finished or self._closed:
+                    return
+                else:
+                    event, data = "ping", None
+            yield event, data
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _chunks(text: str, size: int) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def stream_command(
+    router: CommandRouter,
+    command: str,
+    lock: Optional[threading.Lock] = None,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_events: int = DEFAULT_MAX_EVENTS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    put_timeout: float = DEFAULT_PUT_TIMEOUT,
+    keepalive: float = 15.0,
+    on_done: Optional[Callable[[], None]] = None,
+) -> Iterator[str]:
+    """Run *command* on a worker thread and yield its events as SSE frames.
+
+    Handlers that know how to stream push ``output``/``progress`` events while
+    they run; everything else has its buffered stdout sent as ``output`` chunks
+    after it returns. The last event is always ``status``. ``on_done`` runs
+    after the command, still under *lock*.
+    """
+    stream = OutputStream(max_events=max_events, max_bytes=max_bytes, put_timeout=put_timeout)
+
+    def produce() -> None:
+        session = router.session
+        try:
+            if lock is not None:
+                lock.acquire()
+            try:
+                session.sink = stream.put
+                try:
+                    response = router.execute(command)
+                finally:
+                    session.sink = None
+                if on_done is not None:
+                    on_done()
+            finally:
+                if lock is not None:
+                    lock.release()
+            if response.stdout and not stream.output_events:
+                for chunk in _chunks(response.stdout, chunk_size):
+                    stream.put("output", chunk)
+            if response.stderr:
+                stream.put("error", response.stderr)
+            status = {
+                "status": response.status,
+                "cwd": str(response.new_cwd) if response.new_cwd is not None else None,
+                "exec_ms": float(response.meta_value("exec_ms", 0.0)),
+            }
+            for key in ("rusage", "queue_ms", "retry_after"):
+                value = response.meta_value(key)
+                if value is not None:
+                    status[key] = value
+            stream.put("status", status)
+        except StreamClosedError:
+            pass
+        finally:
+            stream.finish()
+
+    worker = threading.Thread(target=produce, name="stream-command", daemon=True)
+    worker.start()
+    try:
+        for event, data in stream.events(poll_interval=keepalive):
+            if event == "ping":
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(event, data)
+    finally:
+        stream.close()
@@ -2,11 +2,35 @@
 Secure subprocess adapter with read-only whitelist and workspace jail.
 """
 
+import codecs
+import os
+import selectors
+import shutil
+import signal
 import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
-from .errors import CommandError
-from fs.paths import is_within_workspace, resolve_path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:  # pragma: no cover - not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from .errors import (
+    CommandError,
+    CommandFailedError,
+    CommandTimeoutError,
+    RootEscapeError,
+    SessionThrottledError,
+)
+from .native_commands import run_native
+from .output import CommandOutput
+from .registry import PathAccess
+from .scheduler import QUANTUM, get_scheduler
+from fs import paths
 
 
 # Whitelist of allowed commands in read-only mode
@@ -22,65 +46,661 @@ DANGEROUS_COMMANDS = {
     'node', 'nodejs', 'bash', 'sh', 'zsh', 'perl', 'ruby', 'php', 'awk', 'sed'
 }
 
+# Programs the ``exec`` builtin may start unless ``SUBPROCESS_ALLOWLIST`` says
+# otherwise. Commands that run other programs (env, xargs, find -exec) or
+# change permissions are left out on purpose.
+DEFAULT_EXEC_ALLOWLIST = frozenset(READONLY_WHITELIST - {'find', 'chmod', 'chown', 'top'})
+
+# Programs that only transform their operands as strings and never open them,
+# so the workspace jail has nothing to check.
+STRING_ONLY_COMMANDS = frozenset({'echo', 'basename', 'dirname'})
+
+DEFAULT_TIMEOUT = float(os.getenv("SUBPROCESS_TIMEOUT", "30"))
+# Bytes kept per stream; beyond this only the first and last halves survive.
+DEFAULT_MAX_OUTPUT_BYTES = int(os.getenv("SUBPROCESS_MAX_OUTPUT_BYTES", str(1024 * 1024)))
+READ_SIZE = 64 * 1024
+# Time a process group gets to exit after SIGTERM before it is killed.
+KILL_GRACE = 1.0
+# CPU seconds one session's commands may use per sliding window before
+# further ``exec`` calls are refused.
+SESSION_CPU_BUDGET = float(os.getenv("SUBPROCESS_SESSION_CPU_SECONDS", "60"))
+SESSION_CPU_WINDOW = float(os.getenv("SUBPROCESS_SESSION_WINDOW", "60"))
+
+OutputCallback = Callable[[str, str], None]
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def subprocess_allowed() -> bool:
+    return _env_flag("ALLOW_SUBPROCESS")
+
+
+def readonly_mode_enabled() -> bool:
+    return _env_flag("READONLY_MODE")
+
+
+def exec_allowlist() -> frozenset:
+    """Basenames ``exec`` may run: ``SUBPROCESS_ALLOWLIST`` (comma-separated) or the default."""
+    configured = os.getenv("SUBPROCESS_ALLOWLIST")
+    if configured is None:
+        return DEFAULT_EXEC_ALLOWLIST
+    return frozenset(name.strip() for name in configured.split(",") if name.strip())
+
+
+def native_commands_enabled() -> bool:
+    return os.getenv("SUBPROCESS_NATIVE", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+
+class _CappedBuffer:
+    """Keeps the first and last ``limit // 2`` bytes written to it."""
+
+    def __init__(self, limit: int) -> None:
+        self.head_limit = max(0, limit) // 2
+        self.tail_limit = max(0, limit) - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
 
-def run_secure_command(command: List[str], readonly_mode: bool = False) -> tuple:
+    @property
+    def head_full(self) -> bool:
+        return len(self.head) >= self.head_limit
+
+    def write(self, data: bytes) -> bytes:
+        """Store *data*; return the part that went into the head."""
+        room = self.head_limit - len(self.head)
+        taken = data[:max(0, room)]
+        self.head += taken
+        rest = data[len(taken):]
+        if rest:
+            self.tail += rest
+            overflow = len(self.tail) - self.tail_limit
+            if overflow > 0:
+                del self.tail[:overflow]
+                self.dropped += overflow
+        return taken
+
+    def tail_text(self) -> str:
+        tail = bytes(self.tail)
+        if self.dropped:
+            # The cut may have landed inside a multi-byte character.
+            start = 0
+            while start < len(tail) and start < 3 and (tail[start] & 0xC0) == 0x80:
+                start += 1
+            tail = tail[start:]
+        return tail.decode("utf-8", errors="replace")
+
+
+def _env_limit(name: str, default: int) -> Optional[int]:
+    value = int(os.getenv(name, str(default)))
+    return value if value > 0 else None
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
     """
-    Run a command securely with sandboxing and restrictions.
-    
-    Args:
-        command: Command to execute as a list of arguments
-        readonly_mode: If True, enforce read-only restrictions
-        
-    Returns:
-        Tuple of (returncode, stdout, stderr)
-        
+    Per-process ``setrlimit`` caps applied in the child before it execs.
+
+    ``None`` leaves a limit as inherited. A limit is never raised above the
+    hard limit the server itself runs under.
+    """
+
+    cpu_seconds: Optional[int] = None
+    address_space_bytes: Optional[int] = None
+    open_files: Optional[int] = None
+    # Largest file the command may write; pipe output is capped separately.
+    file_size_bytes: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        return cls(
+            cpu_seconds=_env_limit("SUBPROCESS_CPU_SECONDS", 10),
+            address_space_bytes=_env_limit("SUBPROCESS_MEMORY_BYTES", 1024 * 1024 * 1024),
+            open_files=_env_limit("SUBPROCESS_OPEN_FILES", 256),
+            file_size_bytes=_env_limit("SUBPROCESS_MAX_FILE_BYTES", 64 * 1024 * 1024),
+        )
+
+    def apply(self) -> None:
+        """Lower this process's limits; meant to run as a ``preexec_fn``."""
+        if resource is None:  # pragma: no cover - Windows
+            return
+        for name, value in (
+            ("RLIMIT_CPU", self.cpu_seconds),
+            ("RLIMIT_AS", self.address_space_bytes),
+            ("RLIMIT_NOFILE", self.open_files),
+            ("RLIMIT_FSIZE", self.file_size_bytes),
+        ):
+            which = getattr(resource, name, None)
+            if value is None or which is None:
+                continue
+            _, hard = resource.getrlimit(which)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            if name == "RLIMIT_CPU":
+                # SIGXCPU at the soft limit, SIGKILL one second later.
+                cap = value + 1 if hard == resource.RLIM_INFINITY else min(value + 1, hard)
+                resource.setrlimit(which, (value, cap))
+            else:
+                resource.setrlimit(which, (value, value))
+
+    def as_meta(self) -> Dict[str, Optional[int]]:
+        return {
+            "cpu_seconds": self.cpu_seconds,
+            "address_space_bytes": self.address_space_bytes,
+            "open_files": self.open_files,
+            "file_size_bytes": self.file_size_bytes,
+        }
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """Rusage of one finished child process."""
+
+    user_cpu: float = 0.0
+    sys_cpu: float = 0.0
+    max_rss_bytes: int = 0
+    block_reads: int = 0
+    block_writes: int = 0
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.user_cpu + self.sys_cpu
+
+    @classmethod
+    def from_rusage(cls, usage: Any) -> "ResourceUsage":
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        return cls(
+            user_cpu=usage.ru_utime,
+            sys_cpu=usage.ru_stime,
+            max_rss_bytes=usage.ru_maxrss * scale,
+            block_reads=usage.ru_inblock,
+            block_writes=usage.ru_oublock,
+        )
+
+    def as_meta(self) -> Dict[str, Any]:
+        return {
+            "user_cpu": round(self.user_cpu, 6),
+            "sys_cpu": round(self.sys_cpu, 6),
+            "max_rss_bytes": self.max_rss_bytes,
+            "block_reads": self.block_reads,
+            "block_writes": self.block_writes,
+        }
+
+
+@dataclass
+class ProcessResult:
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    dropped_bytes: int = 0
+    elapsed: float = 0.0
+    # None where the platform cannot report it (no ``os.wait4``) and for
+    # commands that ran in-process.
+    usage: Optional[ResourceUsage] = field(default=None)
+    native: bool = False
+    # Time spent waiting for an execution slot.
+    queue_ms: float = 0.0
+
+
+class StreamingProcess:
+    """
+    Run a command and yield ``("stdout" | "stderr", text)`` chunks as they arrive.
+
+    Both pipes are read concurrently through a selector and decoded with
+    incremental UTF-8 decoders, so multi-byte characters split across reads
+    come out whole. Each stream keeps at most ``max_output_bytes``: the head is
+    streamed live, and once it is full only the tail is kept and emitted, after
+    a truncation marker, when the process ends. On timeout the whole process
+    group is terminated and the output read so far is still reported.
+    ``limits`` are applied in the child before it execs, and the child is
+    reaped with ``wait4`` so its rusage ends up in ``result``, which is set
+    once iteration finishes.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        *,
+        cwd: Optional[Path] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        limits: Optional[ResourceLimits] = None,
+    ) -> None:
+        self.command = command
+        self.cwd = cwd
+        self.timeout = timeout
+        self.max_output_bytes = max_output_bytes
+        self.limits = limits
+        self.result: Optional[ProcessResult] = None
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        proc = subprocess.Popen(
+            self.command,
+            shell=False,
+            cwd=str(self.cwd) if self.cwd is not None else None,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+            preexec_fn=self.limits.apply if self.limits is not None else None,
+        )
+        usage: Optional[ResourceUsage] = None
+        buffers = {name: _CappedBuffer(self.max_output_bytes) for name in ("stdout", "stderr")}
+        decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in buffers}
+        chunks: Dict[str, List[str]] = {name: [] for name in buffers}
+        selector = selectors.DefaultSelector()
+        selector.register(proc.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(proc.stderr, selectors.EVENT_READ, "stderr")
+        timed_out = False
+        try:
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not timed_out:
+                    timed_out = True
+                    usage = _terminate_group(proc)
+                    # Give the pipes a moment to hit EOF after the kill.
+                    deadline = time.monotonic() + KILL_GRACE
+                    continue
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(timeout=remaining):
+                    name = key.data
+                    data = os.read(key.fd, READ_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        continue
+                    buffer = buffers[name]
+                    head = buffer.write(data)
+                    if head:
+                        text = decoders[name].decode(head, final=buffer.head_full)
+                        if text:
+                            chunks[name].append(text)
+                            yield name, text
+            if not timed_out:
+                try:
+                    usage = _reap(proc, timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    usage = _terminate_group(proc)
+            if proc.returncode is None:
+                usage = _reap(proc)
+            dropped = 0
+            for name, buffer in buffers.items():
+                text = decoders[name].decode(b"", final=True)
+                if buffer.tail:
+                    if buffer.dropped:
+                        text += f"\n[... {buffer.dropped} bytes of {name} truncated ...]\n"
+                    text += buffer.tail_text()
+                dropped += buffer.dropped
+                if text:
+                    chunks[name].append(text)
+                    yield name, text
+            self.result = ProcessResult(
+                returncode=proc.returncode,
+                stdout="".join(chunks["stdout"]),
+                stderr="".join(chunks["stderr"]),
+                timed_out=timed_out,
+                dropped_bytes=dropped,
+                elapsed=time.monotonic() - started,
+                usage=usage,
+            )
+        finally:
+            selector.close()
+            if proc.returncode is None:
+                _terminate_group(proc)
+                if proc.returncode is None:
+                    _reap(proc)
+            proc.stdout.close()
+            proc.stderr.close()
+
+
+def _reap(proc: subprocess.Popen, timeout: Optional[float] = None) -> Optional[ResourceUsage]:
+    """
+    Wait for *proc* like ``Popen.wait`` but through ``wait4``, keeping its rusage.
+
+    Raises:
+        subprocess.TimeoutExpired: If *proc* is still running after *timeout*
+    """
+    if not hasattr(os, "wait4"):  # pragma: no cover - Windows
+        proc.wait(timeout=timeout)
+        return None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        try:
+            pid, status, rusage = os.wait4(proc.pid, 0 if deadline is None else os.WNOHANG)
+        except ChildProcessError:
+            # Someone else reaped it; the exit status is all that is left.
+            proc.wait()
+            return None
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return ResourceUsage.from_rusage(rusage)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+
+def _terminate_group(proc: subprocess.Popen) -> Optional[ResourceUsage]:
+    """
+    SIGTERM the process group, then SIGKILL whatever is left after a grace period.
+
+    Returns the leader's rusage if it exited within the grace period.
+    """
+    if not hasattr(os, "killpg"):  # pragma: no cover - Windows
+        proc.kill()
+        return None
+    usage = None
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return None
+    try:
+        usage = _reap(proc, timeout=KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return usage
+
+
+def check_command(command: List[str], readonly_mode: bool = False, cwd: Optional[Path] = None) -> None:
+    """
+    Validate a command against the blacklist, read-only whitelist and workspace jail.
+
     Raises:
         CommandError: If command is dangerous or not allowed
     """
     if not command:
         raise CommandError("Empty command")
-    
-    # Check if command is dangerous
-    cmd_name = command[0]
+
+    # Check if command is dangerous; "/bin/rm" is still rm
+    cmd_name = os.path.basename(command[0])
     if cmd_name in DANGEROUS_COMMANDS:
         raise CommandError(f"Dangerous command not allowed: {cmd_name}")
-    
+
     # If in read-only mode, block destructive commands
     if readonly_mode:
         destructive_commands = {'rm', 'mv', 'cp', 'touch'}
         if cmd_name in destructive_commands:
             raise CommandError("Read-only mode enabled. Command not allowed.")
-    
+
     # Check if command is in whitelist (when in read-only mode)
     if readonly_mode and cmd_name not in READONLY_WHITELIST:
         raise CommandError(f"Command not allowed in read-only mode: {cmd_name}")
-    
-    # Enforce workspace jail for filesystem commands
-    if cmd_name in {'ls', 'cat', 'find', 'grep', 'stat', 'chmod', 'chown'}:
-        # Validate all path arguments are within workspace
-        for arg in command[1:]:
-            if arg.startswith('-'):  # Skip flags
-                continue
+
+    # Enforce the workspace jail on every operand and flag value of every
+    # command that may open files, whether or not the operand is meant as a path.
+    if cmd_name in STRING_ONLY_COMMANDS:
+        return
+    base = cwd if cwd is not None else paths.WORKSPACE_ROOT
+    for arg in command[1:]:
+        for value in _path_candidates(arg):
             try:
-                path = Path(arg)
-                # Resolve the path to check if it's within workspace
-                resolved_path = resolve_path(path)
-                if not is_within_workspace(resolved_path):
-                    raise CommandError(f"Path not within workspace: {arg}")
-            except Exception:
-                raise CommandError(f"Path not within workspace: {arg}")
-    
-    # Execute command with shell=False for security
-    try:
-        result = subprocess.run(
-            command,
-            shell=False,
-            capture_output=True,
-            text=True,
-            timeout=30  # Prevent hanging
+                paths.resolve_in_root(value, base)
+            except RootEscapeError as exc:
+                raise CommandError(f"Path not within workspace: {arg}") from exc
+
+
+def _path_candidates(arg: str) -> List[str]:
+    """The parts of *arg* that a program may open: operands and flag values."""
+    if arg == "-" or not arg.startswith("-"):
+        return [arg] if arg != "-" else []
+    if arg.startswith("--"):
+        # --opt=value
+        return [arg.split("=", 1)[1]] if "=" in arg else []
+    # -fVALUE: a short option with its value attached
+    value = arg[2:]
+    return [value] if value and (os.sep in value or value.startswith(".")) else []
+
+
+def run_command(
+    command: List[str],
+    readonly_mode: bool = False,
+    *,
+    cwd: Optional[Path] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    limits: Optional[ResourceLimits] = None,
+    on_output: Optional[OutputCallback] = None,
+    native: Optional[bool] = None,
+    session_id: str = "",
+    cost: float = QUANTUM,
+) -> ProcessResult:
+    """
+    Check and run a command, returning its full result, timeouts included.
+
+    Commands with an in-process implementation in ``core.native_commands``
+    skip the fork and exec unless they use flags it does not support. Real
+    processes are only started once the shared scheduler grants a slot.
+
+    Args:
+        command: Command to execute as a list of arguments
+        readonly_mode: If True, enforce read-only restrictions
+        cwd: Working directory (defaults to the workspace root)
+        timeout: Seconds before the process group is killed
+        max_output_bytes: Per-stream cap; the head and tail are kept
+        limits: ``setrlimit`` caps for the child (defaults to the env settings)
+        on_output: Called with ``("stdout" | "stderr", text)`` as output arrives
+        native: Allow in-process implementations (defaults to ``SUBPROCESS_NATIVE``)
+        session_id: Scheduler queue the command waits in
+        cost: Relative weight of the command for fair scheduling
+
+    Raises:
+        CommandError: If command is dangerous or not allowed, or cannot be started
+        SchedulerBusyError: If too many commands are already waiting for a slot
+    """
+    check_command(command, readonly_mode, cwd)
+    if native if native is not None else native_commands_enabled():
+        started = time.monotonic()
+        handled = run_native(command, cwd if cwd is not None else paths.WORKSPACE_ROOT, max_output_bytes)
+        if handled is not None:
+            returncode, stdout_bytes, stderr = handled
+            stdout = stdout_bytes.decode("utf-8", errors="replace")
+            if on_output is not None:
+                for stream, text in (("stdout", stdout), ("stderr", stderr)):
+                    if text:
+                        on_output(stream, text)
+            return ProcessResult(
+                returncode=returncode,
+                stdout=stdout,
+                stderr=stderr,
+                elapsed=time.monotonic() - started,
+                native=True,
+            )
+    process = StreamingProcess(
+        command,
+        cwd=cwd if cwd is not None else paths.WORKSPACE_ROOT,
+        timeout=timeout,
+        max_output_bytes=max_output_bytes,
+        limits=limits if limits is not None else ResourceLimits.from_env(),
+    )
+    with get_scheduler().slot(session_id, cost) as ticket:
+        try:
+            for stream, text in process:
+                if on_output is not None:
+                    on_output(stream, text)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise CommandError(f"Command execution failed: {str(e)}") from e
+    assert process.result is not None
+    process.result.queue_ms = ticket.queue_ms
+    return process.result
+
+
+def run_secure_command(
+    command: List[str],
+    readonly_mode: bool = False,
+    *,
+    cwd: Optional[Path] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    limits: Optional[ResourceLimits] = None,
+    on_output: Optional[OutputCallback] = None,
+) -> tuple:
+    """
+    Run a command securely with sandboxing and restrictions.
+
+    Args:
+        command: Command to execute as a list of arguments
+        readonly_mode: If True, enforce read-only restrictions
+        cwd: Working directory (defaults to the workspace root)
+        timeout: Seconds before the process group is killed
+        max_output_bytes: Per-stream cap; the head and tail are kept
+        limits: ``setrlimit`` caps for the child (defaults to the env settings)
+        on_output: Called with ``("stdout" | "stderr", text)`` as output arrives
+
+    Returns:
+        Tuple of (returncode, stdout, stderr)
+
+    Raises:
+        CommandError: If command is dangerous or not allowed
+        CommandTimeoutError: If the command timed out; carries the partial output
+    """
+    result = run_command(
+        command,
+        readonly_mode,
+        cwd=cwd,
+        timeout=timeout,
+        max_output_bytes=max_output_bytes,
+        limits=limits,
+        on_output=on_output,
+    )
+    if result.timed_out:
+        raise CommandTimeoutError(
+            f"Command timed out after {timeout:g}s", stdout=result.stdout, stderr=result.stderr
         )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        raise CommandError("Command timed out")
-    except Exception as e:
-        raise CommandError(f"Command execution failed: {str(e)}")
+    return result.returncode, result.stdout, result.stderr
+
+
+# Signals the kernel sends when a ``setrlimit`` cap is hit.
+_LIMIT_SIGNALS = {
+    getattr(signal, "SIGXCPU", None): "CPU time limit exceeded",
+    getattr(signal, "SIGXFSZ", None): "File size limit exceeded",
+}
+
+
+def _failure_message(returncode: Optional[int]) -> str:
+    if returncode is not None and returncode < 0:
+        reason = _LIMIT_SIGNALS.get(-returncode)
+        if reason is not None:
+            return f"{reason}; command killed by signal {-returncode}"
+        return f"Command killed by signal {-returncode}"
+    return f"Command exited with status {returncode}"
+
+
+def resolve_allowed(name: str) -> str:
+    """
+    The program ``exec`` runs for *name*, checked against ``exec_allowlist()``.
+
+    *name* is looked up with ``shutil.which`` and the basename of what it
+    resolves to must be allowed. A path such as ``/bin/ls`` is accepted only if
+    it is the same file that ``ls`` resolves to on ``PATH``.
+
+    Returns:
+        The allowed basename, to run as argv[0]
+
+    Raises:
+        CommandError: If *name* is not found or not allowed
+    """
+    resolved = shutil.which(name)
+    if resolved is None:
+        raise CommandError(f"Command not found: {name}")
+    program = os.path.basename(resolved)
+    if program not in exec_allowlist():
+        raise CommandError(f"Command not allowed: {program} (see SUBPROCESS_ALLOWLIST)")
+    if os.sep in name:
+        on_path = shutil.which(program)
+        if on_path is None or not os.path.samefile(on_path, resolved):
+            raise CommandError(f"Command not allowed: {name} (only programs on PATH can run)")
+    return program
+
+
+def exec_access(ctx, args: List[str]) -> PathAccess:
+    """
+    ``exec``: read the whole workspace in read-only mode; otherwise write the
+    cwd and every operand that names a workspace path.
+    """
+    if readonly_mode_enabled():
+        return PathAccess(reads=frozenset({paths.WORKSPACE_ROOT}))
+    writes = {Path(ctx.cwd).resolve()}
+    for arg in args[1:]:
+        if arg.startswith("-"):
+            continue
+        try:
+            writes.add(paths.resolve_in_root(arg, ctx.cwd))
+        except RootEscapeError:
+            continue
+    return PathAccess(writes=frozenset(writes))
+
+
+def exec_handler(ctx, args: List[str]) -> str:
+    """
+    Run an external command in the session's cwd.
+
+    Disabled unless ``ALLOW_SUBPROCESS`` is set, and only programs on the
+    allowlist can run (see ``resolve_allowed``); ``READONLY_MODE`` further
+    restricts it to the read-only whitelist. With a streaming sink attached,
+    stdout and stderr are forwarded as ``output`` and ``stderr`` events while
+    the command runs. The child's rusage and the time it waited for an execution slot are
+    reported under ``rusage`` and ``queue_ms`` in the response meta, and the
+    rusage is added to the session's totals; a session that used more than
+    its CPU budget in the last window is refused until enough of it expires.
+    """
+    if not subprocess_allowed():
+        raise CommandError("Subprocess execution is disabled. Set ALLOW_SUBPROCESS=true to enable it.")
+    if not args:
+        raise ValueError("Usage: exec <command> [args...]")
+    args = [resolve_allowed(args[0])] + list(args[1:])
+
+    retry_after = ctx.usage.retry_after(SESSION_CPU_BUDGET, SESSION_CPU_WINDOW)
+    if retry_after > 0:
+        raise SessionThrottledError(
+            f"Session used its {SESSION_CPU_BUDGET:g}s CPU budget; retry in {retry_after:.1f}s.",
+            retry_after=retry_after,
+        )
+
+    streaming = ctx.sink is not None
+
+    def forward(stream: str, text: str) -> None:
+        ctx.emit("output" if stream == "stdout" else "stderr", text)
+
+    limits = ResourceLimits.from_env()
+    result = run_command(
+        args,
+        readonly_mode_enabled(),
+        cwd=ctx.cwd,
+        limits=limits,
+        on_output=forward if streaming else None,
+        session_id=ctx.session_id,
+        # Sessions whose commands burn more CPU get proportionally fewer turns.
+        cost=QUANTUM + ctx.usage.mean_cpu(),
+    )
+    meta: Dict[str, Any] = {"limits": limits.as_meta(), "native": result.native, "queue_ms": result.queue_ms}
+    if result.usage is not None:
+        ctx.usage.record(
+            result.usage.cpu_seconds,
+            result.usage.max_rss_bytes,
+            result.usage.block_reads,
+            result.usage.block_writes,
+        )
+        meta["rusage"] = result.usage.as_meta()
+    meta["session_usage"] = ctx.usage.snapshot()
+
+    stdout = "" if streaming else result.stdout
+    stderr = "" if streaming else result.stderr
+    if result.timed_out:
+        raise CommandTimeoutError(
+            f"Command timed out after {DEFAULT_TIMEOUT:g}s", stdout=stdout, stderr=stderr, meta=meta
+        )
+    if result.returncode != 0:
+        raise CommandFailedError(_failure_message(result.returncode), stdout=stdout, stderr=stderr, meta=meta)
+    return CommandOutput(stdout + stderr, meta)
@@ -0,0 +1,388 @@
+"""Streaming ``archive`` and ``extract`` handlers for tar, tar.gz and zip.
+
+Neither direction holds an archive in memory. ``archive`` walks its sources
+and streams each file into the archive. For ``.tar.gz`` the tar stream is
+cut into ``BLOCK_BYTES`` blocks, which a thread pool compresses as separate
+gzip members (as ``pigz`` does) while the next blocks are read; ``zlib``
+releases the GIL while it compresses. Concatenated members make a valid gzip
+file that ``gzip``, ``tar`` and :mod:`gzip` all read. At most two blocks per
+worker are in flight, so memory stays bounded.
+
+``extract`` reads tar archives as a stream and zip archives entry by entry.
+It writes regular files and directories only. Every member path goes through
+``resolve_in_root`` and must land inside the destination, so ``../`` and
+absolute names are rejected before anything is written. Hard links are
+recreated when they point at a member extracted earlier; symlinks and
+special files are skipped.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import secrets
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+
+from core.errors import CommandError, RootEscapeError
+from core.output import CommandOutput
+from core.registry import PathAccess
+from core.session import SessionContext
+from fs.name_index import record_added
+from fs.paths import resolve_in_root
+from ui.render import humanize_bytes
+
+__all__ = [
+    "ParallelGzipWriter",
+    "UnsafeMemberError",
+    "archive_access",
+    "archive_handler",
+    "extract_access",
+    "extract_handler",
+]
+
+ARCHIVE_WORKERS = int(os.getenv("ARCHIVE_WORKERS", str(min(8, os.cpu_count() or 1))))
+BLOCK_BYTES = int(os.getenv("ARCHIVE_BLOCK_BYTES", str(1024 * 1024)))
+COMPRESS_LEVEL = 6
+COPY_CHUNK = 1024 * 1024
+ARCHIVE_USAGE = "archive <output.tar.gz|.tgz|.tar|.zip> <path>..."
+EXTRACT_USAGE = "extract <archive> [destination]"
+
+
+class UnsafeMemberError(CommandError):
+    """Raised for an archive member that would land outside the destination."""
+
+
+class ParallelGzipWriter:
+    """Write-only file object that gzips each ``block_size`` block as its own member."""
+
+    def __init__(
+        self, raw: BinaryIO, workers: int = ARCHIVE_WORKERS, block_size: int = BLOCK_BYTES, level: int = COMPRESS_LEVEL
+    ) -> None:
+        self._raw = raw
+        self._block_size = max(1, block_size)
+        self._level = level
+        self._workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self._workers)
+        self._pending: Deque[Future] = deque()
+        self._buffer = bytearray()
+        self._members = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self.bytes_in += len(data)
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[:self._block_size]))
+            del self._buffer[:self._block_size]
+        return len(data)
+
+    def close(self) -> None:
+        try:
+            if self._buffer or not self._members:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, block: bytes) -> None:
+        # mtime=0 keeps the output reproducible.
+        self._pending.append(self._pool.submit(gzip.compress, block, self._level, mtime=0))
+        self._members += 1
+        while len(self._pending) > 2 * self._workers:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        member = self._pending.popleft().result()
+        self._raw.write(member)
+        self.bytes_out += len(member)
+
+
+def _format(name: str) -> str:
+    lowered = name.lower()
+    if lowered.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if lowered.endswith(".tar"):
+        return "tar"
+    if lowered.endswith(".zip"):
+        return "zip"
+    raise CommandError(f"Unsupported archive type: {name}\nUsage: {ARCHIVE_USAGE}")
+
+
+def _arcname(target: Path, ctx: SessionContext) -> str:
+    try:
+        relative = target.relative_to(ctx.cwd.resolve())
+    except ValueError:
+        return target.name
+    return relative.as_posix() if relative.parts else ""
+
+
+def _walk(target: Path, arcname: str, skip: Tuple[Path, ...]) -> Iterator[Tuple[Path, str]]:
+    """*target* and everything under it in sorted order; symlinks are left out."""
+    if target.is_symlink() or target in skip:
+        return
+    if arcname:
+        yield target, arcname
+    if not target.is_dir():
+        return
+    with os.scandir(target) as entries:
+        children = sorted(entries, key=lambda entry: entry.name)
+    for entry in children:
+        yield from _walk(Path(entry.path), f"{arcname}/{entry.name}" if arcname else entry.name, skip)
+
+
+def _sources(ctx: SessionContext, names: List[str], skip: Tuple[Path, ...]) -> Iterator[Tuple[Path, str]]:
+    for name in names:
+        target = resolve_in_root(name, ctx.cwd)
+        if not target.exists():
+            raise FileNotFoundError(target)
+        yield from _walk(target, _arcname(target, ctx), skip)
+
+
+def _write_tar(handle: BinaryIO, members: Iterator[Tuple[Path, str]]) -> Tuple[int, int]:
+    files = total = 0
+    with tarfile.open(fileobj=handle, mode="w|", format=tarfile.PAX_FORMAT) as archive:
+        for path, arcname in members:
+            # gettarinfo turns repeated inodes into hard link members.
+            info = archive.gettarinfo(str(path), arcname)
+            if info.isreg():
+                with open(path, "rb") as source:
+                    archive.addfile(info, source)
+                files += 1
+                total += info.size
+            elif info.isdir() or info.islnk():
+                archive.addfile(info)
+    return files, total
+
+
+def _write_zip(handle: BinaryIO, members: Iterator[Tuple[Path, str]]) -> Tuple[int, int]:
+    files = total = 0
+    with zipfile.ZipFile(handle, "w", zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL) as archive:
+        for path, arcname in members:
+            if path.is_file():
+                archive.write(path, arcname)
+                files += 1
+                total += path.stat().st_size
+            elif path.is_dir():
+                archive.write(path, arcname + "/")
+    return files, total
+
+
+def _throughput(nbytes: int, elapsed: float) -> float:
+    return round(nbytes / (1024 * 1024) / max(elapsed, 1e-9), 1)
+
+
+def _parse_archive(args: List[str]) -> Tuple[str, List[str]]:
+    names = [arg for arg in args if not arg.startswith("-")]
+    unknown = [arg for arg in args if arg.startswith("-")]
+    if unknown:
+        raise CommandError(f"Unknown option: {unknown[0]}\nUsage: {ARCHIVE_USAGE}")
+    if len(names) < 2:
+        raise ValueError("Missing required argument.")
+    return names[0], names[1:]
+
+
+def archive_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    output, sources = _parse_archive(args)
+    return PathAccess(
+        reads=frozenset(resolve_in_root(name, ctx.cwd) for name in sources),
+        writes=frozenset({resolve_in_root(output, ctx.cwd)}),
+    )
+
+
+def archive_handler(ctx: SessionContext, args: List[str]) -> CommandOutput:
+    output_name, sources = _parse_archive(args)
+    kind = _format(output_name)
+    output = resolve_in_root(output_name, ctx.cwd)
+    if output.is_dir():
+        raise CommandError(f"Not a file: {output_name}")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    fd, temp_name = tempfile.mkstemp(prefix=f".{output.name}.", dir=str(output.parent))
+    temp = Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            members = _sources(ctx, sources, skip=(output, temp))
+            if kind == "zip":
+                files, total = _write_zip(handle, members)
+            elif kind == "tar":
+                files, total = _write_tar(handle, members)
+            else:
+                writer = ParallelGzipWriter(handle)
+                try:
+                    files, total = _write_tar(writer, members)
+                finally:
+                    writer.close()
+        os.replace(temp, output)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    record_added(output)
+    elapsed = time.perf_counter() - started
+    size = output.stat().st_size
+    meta = {
+        "files": files,
+        "bytes": total,
+        "archive_bytes": size,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "mb_per_s": _throughput(total, elapsed),
+    }
+    text = (
+        f"Archived {files} files, {humanize_bytes(total)} -> {humanize_bytes(size)} in {output_name} "
+        f"({meta['mb_per_s']} MB/s)"
+    )
+    return CommandOutput(text, meta)
+
+
+def _member_target(name: str, destination: Path) -> Path:
+    """Where member *name* goes under *destination*; raises if that is anywhere else."""
+    if not name or os.path.isabs(name) or name.startswith(("/", "\\")):
+        raise UnsafeMemberError(f"Unsafe path in archive: {name}")
+    try:
+        target = resolve_in_root(name, destination)
+    except RootEscapeError:
+        raise UnsafeMemberError(f"Unsafe path in archive: {name}") from None
+    if target != destination and destination not in target.parents:
+        raise UnsafeMemberError(f"Unsafe path in archive: {name}")
+    return target
+
+
+def _write_member(source: BinaryIO, target: Path, mode: Optional[int], mtime: Optional[float]) -> int:
+    """Copy *source* to a temp file next to *target*, then rename it into place."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            shutil.copyfileobj(source, handle, COPY_CHUNK)
+            written = handle.tell()
+        if mode:
+            # No setuid bits or group/other write, as tarfile's "data" filter does.
+            os.chmod(temp_name, (mode & 0o755) | 0o600)
+        if mtime is not None:
+            os.utime(temp_name, (mtime, mtime))
+        os.replace(temp_name, target)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+    return written
+
+
+def _link_member(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f".{target.name}.{secrets.token_hex(4)}.link")
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copy2(source, temp)
+    os.replace(temp, target)
+
+
+def _extract_tar(handle: BinaryIO, destination: Path) -> Tuple[int, int, int]:
+    files = total = skipped = 0
+    with tarfile.open(fileobj=handle, mode="r|") as archive:
+        for member in archive:
+            target = _member_target(member.name, destination)
+            if member.isdir():
+                target.mkdir(parents=True, exist_ok=True)
+            elif member.isreg():
+                total += _write_member(archive.extractfile(member), target, member.mode, member.mtime)
+                files += 1
+            elif member.islnk():
+                source = _member_target(member.linkname, destination)
+                if not source.is_file():
+                    raise CommandError(f"Hard link to a missing member: {member.name} -> {member.linkname}")
+                _link_member(source, target)
+                files += 1
+            else:
+                skipped += 1
+    return files, total, skipped
+
+
+def _extract_zip(path: Path, destination: Path) -> Tuple[int, int, int]:
+    files = total = skipped = 0
+    with zipfile.ZipFile(path) as archive:
+        entries = archive.infolist()
+        # The central directory lists every name up front, so check them all first.
+        targets = [_member_target(entry.filename, destination) for entry in entries]
+        for entry, target in zip(entries, targets):
+            mode = (entry.external_attr >> 16) & 0o170777
+            if entry.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+            elif mode and (mode & 0o170000) not in {0, 0o100000}:
+                # Symlinks and special files stored by Unix zip tools.
+                skipped += 1
+            else:
+                mtime = time.mktime(entry.date_time + (0, 0, -1))
+                with archive.open(entry) as source:
+                    total += _write_member(source, target, mode & 0o777, mtime)
+                files += 1
+    return files, total, skipped
+
+
+def _parse_extract(args: List[str]) -> Tuple[str, str]:
+    names = [arg for arg in args if not arg.startswith("-")]
+    unknown = [arg for arg in args if arg.startswith("-")]
+    if unknown:
+        raise CommandError(f"Unknown option: {unknown[0]}\nUsage: {EXTRACT_USAGE}")
+    if not names:
+        raise ValueError("Missing required argument.")
+    if len(names) > 2:
+        raise CommandError(f"Usage: {EXTRACT_USAGE}")
+    return names[0], names[1] if len(names) == 2 else "."
+
+
+def extract_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    source, destination = _parse_extract(args)
+    return PathAccess(
+        reads=frozenset({resolve_in_root(source, ctx.cwd)}),
+        writes=frozenset({resolve_in_root(destination, ctx.cwd)}),
+    )
+
+
+def extract_handler(ctx: SessionContext, args: List[str]) -> CommandOutput:
+    source_name, destination_name = _parse_extract(args)
+    source = resolve_in_root(source_name, ctx.cwd)
+    if not source.is_file():
+        raise FileNotFoundError(source)
+    destination = resolve_in_root(destination_name, ctx.cwd)
+    destination.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with source.open("rb") as handle:
+        magic = handle.read(2)
+        is_zip = zipfile.is_zipfile(handle)
+        handle.seek(0)
+        if is_zip:
+            files, total, skipped = _extract_zip(source, destination)
+        elif magic == b"\x1f\x8b":
+            # GzipFile reads every member; tarfile's own "r|gz" stops after the first.
+            with gzip.GzipFile(fileobj=handle, mode="rb") as stream:
+                files, total, skipped = _extract_tar(stream, destination)
+        else:
+            try:
+                files, total, skipped = _extract_tar(handle, destination)
+            except tarfile.ReadError as exc:
+                raise CommandError(f"Not a tar, tar.gz or zip archive: {source_name}") from exc
+    record_added(destination)
+    elapsed = time.perf_counter() - started
+    meta: Dict[str, object] = {
+        "files": files,
+        "bytes": total,
+        "archive_bytes": source.stat().st_size,
+        "skipped": skipped,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "mb_per_s": _throughput(total, elapsed),
+    }
+    text = f"Extracted {files} files, {humanize_bytes(total)} to {destination_name} ({meta['mb_per_s']} MB/s)"
+    if skipped:
+        text += f"; skipped {skipped} symlinks or special files"
+    return CommandOutput(text, meta)
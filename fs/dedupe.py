@@ -0,0 +1,287 @@
+"""``dedupe``: find duplicate files in stages, optionally replacing them with hard links.
+
+Candidates are narrowed cheaply before anything is read in full:
+
+1. Directories are scanned in parallel with ``os.scandir``. Files are grouped
+   by size, and a size shared by no other file rules a file out.
+2. Files that share a size are grouped by a hash of their first and last
+   ``EDGE_BYTES``. Files no larger than two edges are read whole here, so
+   this digest already decides them; only one file of each such group is
+   hashed again, so that every group is reported by its SHA-256.
+3. Files that still collide get a full SHA-256 from :mod:`fs.hashing`, on its
+   thread pool and through its persistent cache.
+
+Names sharing an inode are already linked, so they count as a single file.
+``--hardlink`` keeps the first name of each group (in sorted order). It links
+every other name to that file through a temporary name and ``os.replace``, so
+a path never goes missing. A file that changed since it was hashed is left
+alone.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import secrets
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.errors import CommandError
+from core.output import CommandOutput
+from core.registry import PathAccess
+from core.session import SessionContext
+from fs import hashing
+from fs.paths import resolve_in_root
+from monitor import stats as monitor_stats
+from ui.render import humanize_bytes
+
+__all__ = [
+    "DuplicateGroup",
+    "dedupe_access",
+    "dedupe_handler",
+    "find_duplicates",
+    "format_groups",
+]
+
+EDGE_BYTES = 64 * 1024
+USAGE = "dedupe [path] [--hardlink]"
+
+
+class FileInfo(NamedTuple):
+    path: Path
+    name: str
+    size: int
+    dev: int
+    ino: int
+    nlink: int
+    mtime_ns: int
+
+
+class DuplicateGroup(NamedTuple):
+    """Files with identical content; ``files[0]`` is the one ``--hardlink`` keeps."""
+
+    size: int
+    digest: str
+    files: Tuple[FileInfo, ...]
+
+
+def _file_info(path: Path, name: str, info: os.stat_result) -> FileInfo:
+    return FileInfo(path, name, info.st_size, info.st_dev, info.st_ino, info.st_nlink, info.st_mtime_ns)
+
+
+def _child_name(name: str, child: str) -> str:
+    return f"{name.rstrip('/')}/{child}" if name not in {"", "."} else child
+
+
+def _scan_dir(job: Tuple[Path, str]) -> Tuple[List[FileInfo], List[Tuple[Path, str]]]:
+    directory, name = job
+    files: List[FileInfo] = []
+    subdirs: List[Tuple[Path, str]] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Symlinks are neither followed nor deduplicated.
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((Path(entry.path), _child_name(name, entry.name)))
+                elif entry.is_file(follow_symlinks=False):
+                    info = entry.stat(follow_symlinks=False)
+                    files.append(_file_info(Path(entry.path), _child_name(name, entry.name), info))
+    except (FileNotFoundError, PermissionError, NotADirectoryError):
+        pass
+    return files, subdirs
+
+
+def scan(target: Path, name: str, workers: int) -> List[FileInfo]:
+    """Regular files under *target*, one directory level at a time across *workers*."""
+    if not target.is_dir():
+        return [_file_info(target, name, target.stat())]
+    files: List[FileInfo] = []
+    level = [(target, name)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while level:
+            next_level: List[Tuple[Path, str]] = []
+            for found, subdirs in pool.map(_scan_dir, level):
+                files.extend(found)
+                next_level.extend(subdirs)
+            level = next_level
+    files.sort(key=lambda info: info.name)
+    return files
+
+
+def edge_digest(path: Path, size: int) -> Optional[str]:
+    """Hash of the first and last ``EDGE_BYTES`` of *path*; all of it when that is no more."""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb", buffering=0) as handle:
+            if size <= 2 * EDGE_BYTES:
+                digest.update(handle.read())
+            else:
+                digest.update(handle.read(EDGE_BYTES))
+                handle.seek(size - EDGE_BYTES)
+                digest.update(handle.read(EDGE_BYTES))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _collisions(groups: Dict[object, List[FileInfo]]) -> Iterable[List[FileInfo]]:
+    return (files for files in groups.values() if len(files) > 1)
+
+
+def find_duplicates(files: Sequence[FileInfo], workers: int, stats: Optional[dict] = None) -> List[DuplicateGroup]:
+    """
+    Group *files* by content, reading as little of them as possible.
+
+    Args:
+        stats: If given, receives how many files reached each stage
+    """
+    by_size: Dict[int, List[FileInfo]] = defaultdict(list)
+    seen_inodes = set()
+    for info in files:
+        if info.size == 0 or (info.dev, info.ino) in seen_inodes:
+            continue
+        seen_inodes.add((info.dev, info.ino))
+        by_size[info.size].append(info)
+    candidates = [info for group in _collisions(by_size) for info in group]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        edges = list(pool.map(lambda info: edge_digest(info.path, info.size), candidates))
+    by_edge: Dict[Tuple[int, str], List[FileInfo]] = defaultdict(list)
+    for info, digest in zip(candidates, edges):
+        if digest is not None:
+            by_edge[(info.size, digest)].append(info)
+
+    final: Dict[Tuple[int, str], List[FileInfo]] = {}
+    small: List[List[FileInfo]] = []
+    needs_full: List[FileInfo] = []
+    for (size, digest), group in by_edge.items():
+        if len(group) < 2:
+            continue
+        if size <= 2 * EDGE_BYTES:
+            small.append(group)
+        else:
+            needs_full.extend(group)
+    cache = hashing.get_hash_cache()
+    full, _ = hashing.hash_files([info.path for info in needs_full], "sha256", cache, workers)
+    for info, digest in zip(needs_full, full):
+        if digest is not None:
+            final.setdefault((info.size, digest), []).append(info)
+    labels, _ = hashing.hash_files([group[0].path for group in small], "sha256", cache, workers)
+    for group, digest in zip(small, labels):
+        if digest is not None:
+            final[(group[0].size, digest)] = group
+
+    if stats is not None:
+        stats.update(scanned=len(files), edge_hashed=len(candidates), full_hashed=len(needs_full))
+    groups = [
+        DuplicateGroup(size, digest, tuple(sorted(group, key=lambda info: info.name)))
+        for (size, digest), group in final.items()
+        if len(group) > 1
+    ]
+    groups.sort(key=lambda group: (-group.size * (len(group.files) - 1), group.files[0].name))
+    return groups
+
+
+def _unchanged(info: FileInfo) -> Optional[os.stat_result]:
+    try:
+        current = os.stat(info.path, follow_symlinks=False)
+    except OSError:
+        return None
+    same = (current.st_dev, current.st_ino, current.st_size, current.st_mtime_ns) == (
+        info.dev,
+        info.ino,
+        info.size,
+        info.mtime_ns,
+    )
+    return current if same else None
+
+
+def hardlink(original: FileInfo, duplicate: FileInfo) -> Optional[int]:
+    """
+    Replace *duplicate* with a hard link to *original*.
+
+    Returns:
+        Bytes freed (0 if the duplicate's data has other links), or None if
+        either file changed since it was scanned or the link failed
+    """
+    if _unchanged(original) is None:
+        return None
+    current = _unchanged(duplicate)
+    if current is None:
+        return None
+    temp = duplicate.path.with_name(f".{duplicate.path.name}.{secrets.token_hex(4)}.link")
+    try:
+        os.link(original.path, temp)
+    except OSError:
+        # Different filesystems, or links are not supported here.
+        return None
+    try:
+        os.replace(temp, duplicate.path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return duplicate.size if current.st_nlink == 1 else 0
+
+
+def format_groups(groups: Sequence[DuplicateGroup], reclaimed: Optional[int] = None) -> str:
+    """``dedupe`` text: each group with its files, then a summary line."""
+    if not groups:
+        return "No duplicate files found."
+    lines: List[str] = []
+    for group in groups:
+        lines.append(f"{len(group.files)} copies of {humanize_bytes(group.size)} (sha256 {group.digest[:12]}):")
+        lines.extend(f"  {info.name}" for info in group.files)
+    wasted = sum(group.size * (len(group.files) - 1) for group in groups)
+    summary = f"{len(groups)} duplicate groups, {humanize_bytes(wasted)} reclaimable"
+    if reclaimed is not None:
+        summary += f"; {humanize_bytes(reclaimed)} reclaimed with hard links"
+    lines.append(summary)
+    return "\n".join(lines)
+
+
+def _parse(args: List[str]) -> Tuple[str, bool]:
+    names: List[str] = []
+    link = False
+    for arg in args:
+        if arg == "--hardlink":
+            link = True
+        elif arg.startswith("-"):
+            raise CommandError(f"Unknown option: {arg}\nUsage: {USAGE}")
+        else:
+            names.append(arg)
+    if len(names) > 1:
+        raise CommandError(f"Usage: {USAGE}")
+    return (names[0] if names else "."), link
+
+
+def dedupe_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    name, link = _parse(args)
+    target = frozenset({resolve_in_root(name, ctx.cwd)})
+    return PathAccess(writes=target) if link else PathAccess(reads=target)
+
+
+def dedupe_handler(ctx: SessionContext, args: List[str]) -> CommandOutput:
+    name, link = _parse(args)
+    target = resolve_in_root(name, ctx.cwd)
+    if not target.exists():
+        raise FileNotFoundError(target)
+    workers = max(1, hashing.HASH_WORKERS)
+    stats: dict = {}
+    groups = find_duplicates(scan(target, name, workers), workers, stats)
+    reclaimed: Optional[int] = None
+    if link:
+        reclaimed = linked = 0
+        for group in groups:
+            original = group.files[0]
+            for duplicate in group.files[1:]:
+                freed = hardlink(original, duplicate)
+                if freed is not None:
+                    linked += 1
+                    reclaimed += freed
+        monitor_stats.record_reclaimed(reclaimed)
+        stats.update(linked=linked, reclaimed_bytes=reclaimed)
+    stats["duplicate_groups"] = len(groups)
+    stats["duplicate_bytes"] = sum(group.size * (len(group.files) - 1) for group in groups)
+    return CommandOutput(format_groups(groups, reclaimed), stats)
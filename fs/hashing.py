@@ -0,0 +1,341 @@
+"""Parallel file checksums with a persistent digest cache.
+
+Files are hashed in chunks on a thread pool; ``hashlib`` releases the GIL
+while it digests, so hashing scales across cores. Each digest is stored in
+a SQLite cache keyed by the file's device, inode, size and ``mtime_ns``. A
+file whose key is unchanged is not read again, so re-hashing an unchanged
+tree costs one ``stat`` per file.
+
+Files modified within the last ``RACY_SECONDS`` are hashed but not cached:
+a write landing in the same mtime tick as the hash could otherwise leave a
+stale digest behind an unchanged key.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.errors import CommandError, CommandFailedError, RootEscapeError
+from core.output import Records
+from core.registry import PathAccess
+from core.session import SessionContext
+from fs.paths import resolve_in_root
+
+__all__ = [
+    "HashCache",
+    "HashEntry",
+    "format_digests",
+    "get_hash_cache",
+    "hash_files",
+    "hashsum_access",
+    "hashsum_handler",
+    "sha256sum_handler",
+]
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(8, os.cpu_count() or 1))))
+HASH_CACHE_PATH = os.getenv("HASH_CACHE_PATH", "~/.codemate/hashes.db")
+CHUNK_SIZE = 1024 * 1024
+RACY_SECONDS = 2.0
+# Cached digests not looked up for this long are pruned.
+CACHE_TTL = 30 * 86400
+USAGE = "hashsum [--algo <name>] <path>... | hashsum [--algo <name>] --check <manifest>"
+
+FileKey = Tuple[int, int, int, int]
+
+
+class HashEntry(NamedTuple):
+    digest: str
+    name: str
+
+
+def format_digests(rows: Sequence[HashEntry]) -> str:
+    """Lines in the ``sha256sum`` format, which ``--check`` reads back."""
+    return "\n".join(f"{row.digest}  {row.name}" for row in rows)
+
+
+def _file_key(info: os.stat_result) -> FileKey:
+    return (info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns)
+
+
+class HashCache:
+    """Digests by ``(algorithm, dev, inode, size, mtime_ns)`` in a SQLite file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            "algo TEXT NOT NULL, dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL, used REAL NOT NULL, "
+            "PRIMARY KEY (algo, dev, ino))"
+        )
+        self._last_prune = 0.0
+
+    def get_many(self, algo: str, keys: Iterable[FileKey]) -> Dict[FileKey, str]:
+        found: Dict[FileKey, str] = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                row = self._db.execute(
+                    "SELECT digest FROM digests WHERE algo = ? AND dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                    (algo, *key),
+                ).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+            if found:
+                self._db.executemany(
+                    "UPDATE digests SET used = ? WHERE algo = ? AND dev = ? AND ino = ?",
+                    [(now, algo, key[0], key[1]) for key in found],
+                )
+        return found
+
+    def put_many(self, algo: str, digests: Dict[FileKey, str]) -> None:
+        if not digests:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO digests (algo, dev, ino, size, mtime_ns, digest, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(algo, *key, digest, now) for key, digest in digests.items()],
+                )
+                if now - self._last_prune > 86400:
+                    self._db.execute("DELETE FROM digests WHERE used < ?", (now - CACHE_TTL,))
+                    self._last_prune = now
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[HashCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_hash_cache() -> Optional[HashCache]:
+    """The cache shared by this process, or None when ``HASH_CACHE_PATH`` is empty."""
+    global _cache
+    if not HASH_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HashCache(Path(HASH_CACHE_PATH))
+        return _cache
+
+
+def _new_hash(algo: str):
+    try:
+        digest = hashlib.new(algo)
+    except (ValueError, TypeError):
+        raise CommandError(f"Unknown hash algorithm: {algo}") from None
+    if digest.digest_size == 0:
+        raise CommandError(f"Variable-length algorithm not supported: {algo}")
+    return digest
+
+
+def hash_file(path: Path, algo: str) -> str:
+    digest = _new_hash(algo)
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as handle:
+        while True:
+            read = handle.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def hash_files(
+    files: Sequence[Path],
+    algo: str = "sha256",
+    cache: Optional[HashCache] = None,
+    workers: Optional[int] = None,
+) -> Tuple[List[Optional[str]], int]:
+    """
+    Digest every file in *files*, in order.
+
+    Returns:
+        ``(digests, cached)``: a hex digest per file (None if it could not be
+        read) and how many came from the cache
+    """
+    _new_hash(algo)
+    workers = HASH_WORKERS if workers is None else workers
+    keys: List[Optional[FileKey]] = []
+    for path in files:
+        try:
+            keys.append(_file_key(os.stat(path)))
+        except OSError:
+            keys.append(None)
+    known = cache.get_many(algo, {key for key in keys if key is not None}) if cache is not None else {}
+    digests: List[Optional[str]] = [known.get(key) if key is not None else None for key in keys]
+    missing = [idx for idx, key in enumerate(keys) if key is not None and digests[idx] is None]
+
+    def work(idx: int) -> Optional[str]:
+        try:
+            return hash_file(files[idx], algo)
+        except OSError:
+            return None
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            for idx, digest in zip(missing, pool.map(work, missing)):
+                digests[idx] = digest
+    if cache is not None:
+        settled = time.time() - RACY_SECONDS
+        fresh = {
+            keys[idx]: digests[idx]
+            for idx in missing
+            if digests[idx] is not None and keys[idx][3] / 1e9 < settled
+        }
+        cache.put_many(algo, fresh)
+    return digests, sum(1 for key in keys if key is not None and key in known)
+
+
+def _walk(target: Path, name: str) -> Iterator[Tuple[Path, str]]:
+    """Files under *target* in sorted order, paired with their display names."""
+    if not target.is_dir():
+        yield target, name
+        return
+    with os.scandir(target) as entries:
+        children = sorted(entries, key=lambda entry: entry.name)
+    for entry in children:
+        child_name = f"{name.rstrip('/')}/{entry.name}" if name not in {"", "."} else entry.name
+        if entry.is_symlink():
+            try:
+                resolve_in_root(entry.path, target)
+            except RootEscapeError:
+                # Links out of the workspace are not followed.
+                continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(Path(entry.path), child_name)
+        elif entry.is_file():
+            yield Path(entry.path), child_name
+
+
+def _parse(args: List[str]) -> Tuple[str, Optional[str], List[str]]:
+    algo = "sha256"
+    check: Optional[str] = None
+    names: List[str] = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg in {"--algo", "-a", "--check", "-c"}:
+            if idx + 1 >= len(args):
+                raise CommandError(f"Usage: {USAGE}")
+            if arg in {"--algo", "-a"}:
+                algo = args[idx + 1].lower()
+            else:
+                check = args[idx + 1]
+            idx += 1
+        elif arg.startswith("--algo="):
+            algo = arg.split("=", 1)[1].lower()
+        elif arg.startswith("-"):
+            raise CommandError(f"Unknown option: {arg}\nUsage: {USAGE}")
+        else:
+            names.append(arg)
+        idx += 1
+    if check is None and not names:
+        raise ValueError("Missing required argument.")
+    if check is not None and names:
+        raise CommandError(f"Usage: {USAGE}")
+    return algo, check, names
+
+
+def hashsum_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    _, check, names = _parse(args)
+    if check is not None:
+        # Manifest entries are resolved against the cwd.
+        return PathAccess(reads=frozenset({resolve_in_root(check, ctx.cwd), ctx.cwd}))
+    return PathAccess(reads=frozenset(resolve_in_root(name, ctx.cwd) for name in names))
+
+
+def hashsum_handler(ctx: SessionContext, args: List[str]) -> Records:
+    algo, check, names = _parse(args)
+    _new_hash(algo)
+    if check is not None:
+        return _check_manifest(ctx, algo, check)
+    files: List[Tuple[Path, str]] = []
+    for name in names:
+        target = resolve_in_root(name, ctx.cwd)
+        if not target.exists():
+            raise FileNotFoundError(target)
+        files.extend(_walk(target, name))
+    digests, _ = hash_files([path for path, _ in files], algo, get_hash_cache())
+    unreadable = [name for (_, name), digest in zip(files, digests) if digest is None]
+    if unreadable:
+        raise CommandError(f"Cannot read: {', '.join(unreadable)}")
+    rows = [HashEntry(digest, name) for (_, name), digest in zip(files, digests)]
+    return Records(rows, format_digests)
+
+
+def sha256sum_handler(ctx: SessionContext, args: List[str]) -> Records:
+    if any(arg in {"--algo", "-a"} or arg.startswith("--algo=") for arg in args):
+        raise CommandError("sha256sum always uses sha256; use hashsum --algo for others.")
+    return hashsum_handler(ctx, args)
+
+
+class CheckResult(NamedTuple):
+    name: str
+    status: str
+
+
+def _format_check(rows: Sequence[CheckResult]) -> str:
+    return "\n".join(f"{row.name}: {row.status}" for row in rows)
+
+
+def _check_manifest(ctx: SessionContext, algo: str, manifest: str) -> Records:
+    source = resolve_in_root(manifest, ctx.cwd)
+    if not source.is_file():
+        raise FileNotFoundError(source)
+    expected: List[Tuple[str, str]] = []
+    for number, line in enumerate(source.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        digest, sep, name = line.partition(" ")
+        if not sep or name[:1] not in {" ", "*"} or not digest:
+            raise CommandError(f"{manifest}:{number}: improperly formatted checksum line")
+        expected.append((digest.lower(), name[1:]))
+    paths: List[Path] = []
+    inside: List[int] = []
+    for idx, (_, name) in enumerate(expected):
+        # Entries outside the workspace are reported as unreadable, never opened.
+        try:
+            paths.append(resolve_in_root(name, ctx.cwd))
+            inside.append(idx)
+        except RootEscapeError:
+            continue
+    hashed, _ = hash_files(paths, algo, get_hash_cache())
+    digests: List[Optional[str]] = [None] * len(expected)
+    for idx, digest in zip(inside, hashed):
+        digests[idx] = digest
+    rows = []
+    for (want, name), got in zip(expected, digests):
+        if got is None:
+            rows.append(CheckResult(name, "FAILED open or read"))
+        else:
+            rows.append(CheckResult(name, "OK" if got == want else "FAILED"))
+    failed = sum(row.status != "OK" for row in rows)
+    records = Records(rows, _format_check)
+    if failed:
+        raise CommandFailedError(
+            f"{failed} of {len(rows)} computed checksums did NOT match", stdout=records.text()
+        )
+    return records
@@ -0,0 +1,356 @@
+"""In-memory trigram index over workspace file and directory names."""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+from core.errors import CommandError
+
+__all__ = [
+    "AmbiguousPathError",
+    "NameIndex",
+    "NameMatch",
+    "UnresolvedPathError",
+    "get_name_index",
+    "record_added",
+    "record_removed",
+]
+
+NGRAM = 3
+LOOKUP_BUDGET = float(os.getenv("NAME_INDEX_BUDGET_MS", "5")) / 1000.0
+# Fraction of the query's trigrams a name must share to be considered.
+MIN_OVERLAP = 0.5
+MIN_SCORE = 0.3
+# Scores closer than this to the best one make a lookup ambiguous.
+AMBIGUITY_MARGIN = 0.05
+CWD_BONUS = 0.1
+# Candidates are gathered from posting lists until this many are collected.
+MAX_CANDIDATES = 512
+SCAN_CHUNK = 1024
+
+
+class AmbiguousPathError(CommandError):
+    """Raised when a name matches several paths equally well."""
+
+    def __init__(self, query: str, candidates: Sequence[str]) -> None:
+        self.query = query
+        self.candidates = list(candidates)
+        super().__init__(f"Ambiguous name '{query}': " + ", ".join(self.candidates))
+
+
+class UnresolvedPathError(CommandError):
+    """Raised when a name that must match exactly names no entry."""
+
+    def __init__(self, query: str, suggestion: Optional[str] = None) -> None:
+        self.query = query
+        self.suggestion = suggestion
+        hint = f" — did you mean {suggestion}?" if suggestion else ""
+        super().__init__(f"No such file: {query}{hint}")
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    path: Path
+    score: float
+    is_dir: bool
+
+
+def _grams(name: str) -> Set[str]:
+    # Padding adds boundary trigrams, which keeps short names and typos near
+    # either end matchable.
+    padded = f" {name} "
+    return {padded[idx:idx + NGRAM] for idx in range(len(padded) - NGRAM + 1)}
+
+
+def _stem(name: str) -> str:
+    stem, dot, _ = name.rpartition(".")
+    return stem if dot and stem else name
+
+
+class NameIndex:
+    """Trigram postings over the lower-cased base names of every workspace entry.
+
+    Posting lists are compact ``array('I')`` runs of entry ids. Removed entries
+    are tombstoned and the postings are rebuilt once tombstones dominate.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root).resolve()
+        self._lock = threading.RLock()
+        self._paths: List[Optional[str]] = []
+        self._is_dir = bytearray()
+        self._ids: Dict[str, int] = {}
+        self._grams: Dict[str, array] = {}
+        self._exact: Dict[str, List[int]] = {}
+        self._dead = 0
+        self.built = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # -- maintenance -----------------------------------------------------------------
+
+    def build(self) -> None:
+        """(Re)index the whole tree under ``root``."""
+        with self._lock:
+            self._reset()
+            stack = [self.root]
+            while stack:
+                directory = stack.pop()
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            self._insert(os.path.relpath(entry.path, self.root), is_dir)
+                            if is_dir:
+                                stack.append(Path(entry.path))
+                except OSError:
+                    continue
+            self.built = True
+
+    def add(self, path: Path) -> None:
+        """Index *path*, any missing ancestors, and its subtree when it is a directory."""
+        rel = self._relative(path)
+        if not rel:
+            return
+        with self._lock:
+            parts = rel.split("/")
+            for depth in range(1, len(parts)):
+                ancestor = "/".join(parts[:depth])
+                if ancestor not in self._ids:
+                    self._insert(ancestor, True)
+            target = self.root / rel
+            is_dir = target.is_dir()
+            if rel not in self._ids:
+                self._insert(rel, is_dir)
+            if is_dir:
+                for dirpath, dirnames, filenames in os.walk(target):
+                    base = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+                    for name in dirnames:
+                        key = f"{base}/{name}"
+                        if key not in self._ids:
+                            self._insert(key, True)
+                    for name in filenames:
+                        key = f"{base}/{name}"
+                        if key not in self._ids:
+                            self._insert(key, False)
+
+    def remove(self, path: Path) -> None:
+        """Forget *path* and everything below it."""
+        rel = self._relative(path)
+        if not rel:
+            return
+        with self._lock:
+            entry_id = self._ids.pop(rel, None)
+            if entry_id is None:
+                return
+            self._tombstone(entry_id)
+            if self._is_dir[entry_id]:
+                prefix = rel + "/"
+                for key in [key for key in self._ids if key.startswith(prefix)]:
+                    self._tombstone(self._ids.pop(key))
+            if self._dead > max(1024, len(self._ids)):
+                self._compact()
+
+    # -- lookup ----------------------------------------------------------------------
+
+    def lookup(
+        self,
+        query: str,
+        cwd: Optional[Path] = None,
+        directories_only: bool = False,
+        limit: int = 5,
+        budget: float = LOOKUP_BUDGET,
+    ) -> List[NameMatch]:
+        """Best-scoring entries whose base name resembles *query*, best first.
+
+        Scoring is trigram Jaccard similarity of base names (an exact name or
+        stem scores 1), plus a bonus for entries directly inside *cwd*. The
+        candidate scan stops once *budget* seconds have elapsed and ranks what
+        it has gathered so far.
+        """
+        deadline = time.perf_counter() + budget
+        needle = query.strip().rstrip("/").lower()
+        directory, _, name = needle.rpartition("/")
+        if not name:
+            return []
+        cwd_rel = self._relative(cwd) if cwd is not None else None
+        with self._lock:
+            scores: Dict[int, float] = {}
+            for entry_id in self._exact.get(name, ()):
+                if self._paths[entry_id] is not None and (self._is_dir[entry_id] or not directories_only):
+                    scores[entry_id] = 1.0
+            if not scores:
+                scores = self._fuzzy(name, deadline)
+            matches = []
+            for entry_id, score in scores.items():
+                rel = self._paths[entry_id]
+                if rel is None or (directories_only and not self._is_dir[entry_id]):
+                    continue
+                parent = rel.rpartition("/")[0]
+                if directory and not ("/" + parent.lower()).endswith("/" + directory):
+                    continue
+                if cwd_rel is not None and parent == cwd_rel:
+                    score += CWD_BONUS
+                matches.append((score, rel.count("/"), rel, bool(self._is_dir[entry_id])))
+        matches.sort(key=lambda item: (-item[0], item[1], item[2]))
+        return [
+            NameMatch(self.root / rel, round(score, 4), is_dir)
+            for score, _, rel, is_dir in matches[:limit]
+            if score >= MIN_SCORE
+        ]
+
+    def resolve(self, query: str, cwd: Optional[Path] = None, directories_only: bool = False) -> Optional[Path]:
+        """Single best path for *query*, or None; raises AmbiguousPathError on near ties."""
+        matches = [m for m in self.lookup(query, cwd, directories_only) if self._still_exists(m.path)]
+        if not matches:
+            return None
+        if len(matches) > 1 and matches[1].score >= matches[0].score - AMBIGUITY_MARGIN:
+            best = matches[0].score
+            tied = [m for m in matches if m.score >= best - AMBIGUITY_MARGIN]
+            raise AmbiguousPathError(query, [self._display(m.path, cwd) for m in tied])
+        return matches[0].path
+
+    # -- internals -------------------------------------------------------------------
+
+    def _fuzzy(self, name: str, deadline: float) -> Dict[int, float]:
+        query = _grams(name)
+        grams = sorted(query, key=lambda gram: len(self._grams.get(gram, ())))
+        if not grams:
+            return {}
+        need = max(1, math.ceil(len(grams) * MIN_OVERLAP))
+        # A name sharing ``need`` trigrams must contain one of the rarest
+        # ``len - need + 1`` of them, so only those postings are scanned for
+        # candidates, rarest first, until the candidate cap or the budget hits.
+        candidates: Set[int] = set()
+        for gram in grams[: len(grams) - need + 1]:
+            posting = self._grams.get(gram, ())
+            for start in range(0, len(posting), SCAN_CHUNK):
+                candidates.update(posting[start:start + SCAN_CHUNK])
+                if len(candidates) >= MAX_CANDIDATES or time.perf_counter() > deadline:
+                    break
+            if len(candidates) >= MAX_CANDIDATES or time.perf_counter() > deadline:
+                break
+        compare_stem = "." not in name
+        scores: Dict[int, float] = {}
+        for entry_id in candidates:
+            rel = self._paths[entry_id]
+            if rel is None:
+                continue
+            base = rel.rsplit("/", 1)[-1].lower()
+            own = _grams(_stem(base) if compare_stem else base)
+            shared = len(query & own)
+            if shared >= need:
+                scores[entry_id] = shared / len(query | own)
+        return scores
+
+    def _reset(self) -> None:
+        self._paths = []
+        self._is_dir = bytearray()
+        self._ids = {}
+        self._grams = {}
+        self._exact = {}
+        self._dead = 0
+
+    def _insert(self, rel: str, is_dir: bool) -> None:
+        rel = rel.replace(os.sep, "/")
+        entry_id = len(self._paths)
+        self._paths.append(rel)
+        self._is_dir.append(1 if is_dir else 0)
+        self._ids[rel] = entry_id
+        name = rel.rsplit("/", 1)[-1].lower()
+        for key in {name, _stem(name)}:
+            self._exact.setdefault(key, []).append(entry_id)
+        for gram in _grams(name):
+            posting = self._grams.get(gram)
+            if posting is None:
+                posting = self._grams[gram] = array("I")
+            posting.append(entry_id)
+
+    def _tombstone(self, entry_id: int) -> None:
+        rel = self._paths[entry_id]
+        self._paths[entry_id] = None
+        self._dead += 1
+        if rel is not None:
+            name = rel.rsplit("/", 1)[-1].lower()
+            for key in {name, _stem(name)}:
+                ids = self._exact.get(key)
+                if ids is not None and entry_id in ids:
+                    ids.remove(entry_id)
+                    if not ids:
+                        del self._exact[key]
+
+    def _compact(self) -> None:
+        live = [(rel, self._is_dir[entry_id]) for entry_id, rel in enumerate(self._paths) if rel is not None]
+        self._reset()
+        for rel, is_dir in live:
+            self._insert(rel, bool(is_dir))
+
+    def _relative(self, path: Optional[Path]) -> Optional[str]:
+        if path is None:
+            return None
+        try:
+            rel = Path(path).resolve().relative_to(self.root)
+        except ValueError:
+            return None
+        text = rel.as_posix()
+        return "" if text == "." else text
+
+    def _still_exists(self, path: Path) -> bool:
+        if os.path.lexists(path):
+            return True
+        self.remove(path)
+        return False
+
+    def _display(self, path: Path, cwd: Optional[Path]) -> str:
+        base = cwd.resolve() if cwd is not None else self.root
+        return os.path.relpath(path, base)
+
+
+_indexes: Dict[str, NameIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_name_index(root: Path) -> NameIndex:
+    """Shared index for *root*, built on first use."""
+    key = str(Path(root).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = NameIndex(Path(key))
+    if not index.built:
+        with index._lock:
+            if not index.built:
+                index.build()
+    return index
+
+
+def _index_for(path: Path) -> Optional[NameIndex]:
+    if not _indexes:
+        return None
+    resolved = str(Path(path).resolve())
+    for key, index in list(_indexes.items()):
+        if resolved == key or resolved.startswith(key + os.sep):
+            return index
+    return None
+
+
+def record_added(path: Path) -> None:
+    """Tell an already built index that *path* (and its subtree) now exists."""
+    index = _index_for(path)
+    if index is not None and index.built:
+        index.add(path)
+
+
+def record_removed(path: Path) -> None:
+    """Tell an already built index that *path* (and its subtree) is gone."""
+    index = _index_for(path)
+    if index is not None and index.built:
+        index.remove(path)
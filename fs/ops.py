@@ -2,18 +2,23 @@
 
 from __future__ import annotations
 
+import os
 import shutil
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, NamedTuple, Sequence
 
 from core.errors import AboveRootError, CommandError, RootEscapeError
+from core.output import Records
+from core.registry import PathAccess
 from core.session import SessionContext
+from fs.name_index import record_added, record_removed
 from fs.paths import WORKSPACE_ROOT, resolve_in_root
-from ui.render import truncate
 
 __all__ = [
     "pwd_handler",
     "cd_handler",
+    "DirEntry",
+    "format_listing",
     "ls_handler",
     "mkdir_handler",
     "rm_handler",
@@ -21,15 +26,59 @@ __all__ = [
     "cp_handler",
     "touch_handler",
     "cat_handler",
+    "read_access",
+    "write_access",
+    "copy_access",
+    "move_access",
 ]
 
 
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
 def _check_placeholders(args: Iterable[str]) -> None:
     for arg in args:
         if arg and arg.startswith("<") and arg.endswith(">"):
             raise ValueError("Missing required argument.")
 
 
+def _positional(args: Iterable[str]) -> List[str]:
+    return [arg for arg in args if not arg.startswith("-")]
+
+
+def read_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    """``ls``/``cat``: read the first path argument (the cwd by default)."""
+    targets = _positional(args) or ["."]
+    return PathAccess(reads=frozenset({resolve_in_root(targets[0], ctx.cwd)}))
+
+
+def write_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    """``mkdir``/``touch``/``rm``: write the first path argument."""
+    targets = _positional(args)
+    if not targets:
+        raise ValueError("Missing required argument.")
+    return PathAccess(writes=frozenset({resolve_in_root(targets[0], ctx.cwd)}))
+
+
+def copy_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    """``cp``: read the source; a file copied into an existing directory writes only its new entry."""
+    targets = _positional(args)
+    if len(targets) != 2:
+        raise ValueError("Usage: cp <src> <dst> [-r]")
+    src = resolve_in_root(targets[0], ctx.cwd)
+    dst = resolve_in_root(targets[1], ctx.cwd)
+    if dst.is_dir() and not src.is_dir():
+        dst = dst / src.name
+    return PathAccess(reads=frozenset({src}), writes=frozenset({dst}))
+
+
+def move_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    targets = _positional(args)
+    if len(targets) != 2:
+        raise ValueError("Usage: mv <src> <dst>")
+    return PathAccess(writes=frozenset(resolve_in_root(target, ctx.cwd) for target in targets))
+
+
 def pwd_handler(ctx: SessionContext, args: List[str]) -> str:
     _check_placeholders(args)
     return str(ctx.cwd.resolve())
@@ -51,7 +100,17 @@ def cd_handler(ctx: SessionContext, args: List[str]) -> str:
     return ""
 
 
-def ls_handler(ctx: SessionContext, args: List[str]) -> str:
+class DirEntry(NamedTuple):
+    name: str
+    is_dir: bool
+
+
+def format_listing(rows: Sequence[DirEntry]) -> str:
+    """``ls`` text: one name per line, directories marked with a trailing slash."""
+    return "\n".join(f"{row.name}/" if row.is_dir else row.name for row in rows)
+
+
+def ls_handler(ctx: SessionContext, args: List[str]) -> Records:
     _check_placeholders(args)
     show_all = False
     target_arg = None
@@ -69,14 +128,14 @@ def ls_handler(ctx: SessionContext, args: List[str]) -> str:
     if not target.is_dir():
         raise NotADirectoryError(target)
 
-    entries: List[str] = []
-    for item in sorted(target.iterdir(), key=lambda p: p.name.lower()):
-        if not show_all and item.name.startswith("."):
-            continue
-        name = f"{item.name}/" if item.is_dir() else item.name
-        entries.append(name)
-
-    return "\n".join(entries)
+    with os.scandir(target) as entries:
+        rows = [
+            DirEntry(entry.name, entry.is_dir())
+            for entry in entries
+            if show_all or not entry.name.startswith(".")
+        ]
+    rows.sort(key=lambda row: row.name.lower())
+    return Records(rows, format_listing)
 
 
 def mkdir_handler(ctx: SessionContext, args: List[str]) -> str:
@@ -85,6 +144,7 @@ def mkdir_handler(ctx: SessionContext, args: List[str]) -> str:
     _check_placeholders(args)
     target = resolve_in_root(args[0], ctx.cwd)
     target.mkdir(parents=True, exist_ok=False)
+    record_added(target)
     return ""
 
 
@@ -116,6 +176,7 @@ def rm_handler(ctx: SessionContext, args: List[str]) -> str:
             target.rmdir()
     else:
         target.unlink()
+    record_removed(target)
     return ""
 
 
@@ -132,6 +193,8 @@ def mv_handler(ctx: SessionContext, args: List[str]) -> str:
     destination = dst / src.name if dst.exists() and dst.is_dir() else dst
     destination.parent.mkdir(parents=True, exist_ok=True)
     shutil.move(str(src), str(destination))
+    record_removed(src)
+    record_added(destination)
     return ""
 
 
@@ -156,12 +219,16 @@ def cp_handler(ctx: SessionContext, args: List[str]) -> str:
     if src_path.is_dir():
         if not recursive:
             raise CommandError("Use -r to copy directories recursively.")
-        shutil.copytree(src_path, dst_path, dirs_exist_ok=True)
+        if ctx.sink is None:
+            shutil.copytree(src_path, dst_path, dirs_exist_ok=True)
+        else:
+            shutil.copytree(src_path, dst_path, dirs_exist_ok=True, copy_function=_progress_copier(ctx, src_path))
     else:
         if dst_path.exists() and dst_path.is_dir():
             dst_path = dst_path / src_path.name
         dst_path.parent.mkdir(parents=True, exist_ok=True)
         shutil.copy2(src_path, dst_path)
+    record_added(dst_path)
     return ""
 
 
@@ -172,6 +239,7 @@ def touch_handler(ctx: SessionContext, args: List[str]) -> str:
     target = resolve_in_root(args[0], ctx.cwd)
     target.parent.mkdir(parents=True, exist_ok=True)
     target.touch(exist_ok=True)
+    record_added(target)
     return ""
 
 
@@ -185,5 +253,38 @@ def cat_handler(ctx: SessionContext, args: List[str]) -> str:
     if not target.is_file():
         raise CommandError(f"Not a file: {target}")
 
-    text = target.read_text(encoding="utf-8")
-    return truncate(text)
+    if ctx.sink is not None:
+        _stream_file(ctx, target)
+        return ""
+
+    # Long files come back a page at a time through the router's output buffers.
+    return target.read_text(encoding="utf-8")
+
+
+def _stream_file(ctx: SessionContext, target: Path) -> None:
+    with target.open("r", encoding="utf-8") as handle:
+        while True:
+            chunk = handle.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            ctx.emit("output", chunk)
+
+
+def _progress_copier(ctx: SessionContext, src_root: Path):
+    copied = {"files": 0, "bytes": 0}
+
+    def copy(src: str, dst: str) -> str:
+        result = shutil.copy2(src, dst)
+        copied["files"] += 1
+        copied["bytes"] += Path(dst).stat().st_size
+        ctx.emit(
+            "progress",
+            {
+                "files": copied["files"],
+                "bytes": copied["bytes"],
+                "path": str(Path(src).relative_to(src_root)),
+            },
+        )
+        return result
+
+    return copy
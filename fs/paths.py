@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Union
+from typing import Dict, Iterator, Optional, Tuple, Union
 
 from core.errors import RootEscapeError
 
-__all__ = ["WORKSPACE_ROOT", "resolve_in_root", "is_within_workspace"]
+__all__ = ["WORKSPACE_ROOT", "resolve_in_root", "is_within_workspace", "resolution_cache"]
 
 _env_root = os.getenv("WORKSPACE_ROOT", "./workspace")
 _root = Path(_env_root).expanduser()
@@ -19,12 +21,37 @@ WORKSPACE_ROOT: Path = _root
 WORKSPACE_ROOT.mkdir(parents=True, exist_ok=True)
 
 
+_resolution_cache: ContextVar[Optional[Dict[Tuple[str, str], Path]]] = ContextVar(
+    "resolution_cache", default=None
+)
+
+
+@contextmanager
+def resolution_cache() -> Iterator[None]:
+    """Memoise ``resolve_in_root`` results for the duration of the block.
+
+    Only safe while no path component is renamed or removed in between.
+    """
+    token = _resolution_cache.set({})
+    try:
+        yield
+    finally:
+        _resolution_cache.reset(token)
+
+
 def _coerce(path: Union[str, Path]) -> Path:
     return path if isinstance(path, Path) else Path(path).expanduser()
 
 
 def resolve_in_root(raw: Union[str, Path], cwd: Path) -> Path:
     """Resolve *raw* against *cwd* ensuring the result stays within the workspace."""
+    cache = _resolution_cache.get()
+    if cache is not None:
+        key = (str(raw), str(cwd))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     base = (
         cwd.resolve(strict=False)
         if cwd.is_absolute()
@@ -43,6 +70,8 @@ def resolve_in_root(raw: Union[str, Path], cwd: Path) -> Path:
     except ValueError as exc:
         raise RootEscapeError("Access denied: path escapes workspace root.") from exc
 
+    if cache is not None:
+        cache[key] = resolved
     return resolved
 
 
@@ -0,0 +1,290 @@
+"""``sort`` and ``uniq`` handlers with bounded memory.
+
+``sort`` keeps lines in memory up to ``SORT_MEMORY_BYTES``. Past that it
+writes each sorted chunk to a run file in a hidden temporary directory
+under the workspace root and k-way merges the runs with ``heapq.merge``.
+Runs are merged ``MERGE_FAN_IN`` at a time, so a huge input never needs
+thousands of open files. ``uniq`` only ever holds the current line.
+
+Both commands write to a file instead of returning text when given one
+(``sort -o out``, ``uniq in out``). Without it, the whole result is
+returned as output.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from core.errors import CommandError
+from core.output import CommandOutput
+from core.registry import PathAccess
+from core.session import SessionContext
+from fs import paths
+from fs.name_index import record_added
+from fs.paths import resolve_in_root
+
+__all__ = [
+    "external_sort",
+    "sort_access",
+    "sort_handler",
+    "uniq_access",
+    "uniq_handler",
+]
+
+SORT_MEMORY_BYTES = int(os.getenv("SORT_MEMORY_BYTES", str(64 * 1024 * 1024)))
+MERGE_FAN_IN = 64
+# Rough per-line cost of a str in a list on top of its characters.
+LINE_OVERHEAD = 64
+SORT_USAGE = "sort [-n] [-r] [-u] [-k N] [-o <output>] <file>..."
+UNIQ_USAGE = "uniq [-c] <file> [output]"
+_FIELD = re.compile(r"[ \t]*[^ \t]*")
+_NUMBER = re.compile(r"\s*(-?(?:\d+(?:\.\d*)?|\.\d+))")
+
+
+class SortOptions(NamedTuple):
+    numeric: bool
+    reverse: bool
+    unique: bool
+    field: int
+    output: Optional[str]
+    files: List[str]
+
+
+def _parse_sort(args: List[str]) -> SortOptions:
+    numeric = reverse = unique = False
+    field = 1
+    output: Optional[str] = None
+    files: List[str] = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg in {"-k", "-o"}:
+            if idx + 1 >= len(args):
+                raise CommandError(f"Usage: {SORT_USAGE}")
+            value = args[idx + 1]
+            idx += 1
+            if arg == "-o":
+                output = value
+            elif value.isdigit() and int(value) > 0:
+                field = int(value)
+            else:
+                raise CommandError(f"Invalid field: {value}\nUsage: {SORT_USAGE}")
+        elif arg.startswith("-") and len(arg) > 1 and set(arg[1:]) <= set("nru"):
+            numeric = numeric or "n" in arg
+            reverse = reverse or "r" in arg
+            unique = unique or "u" in arg
+        elif arg.startswith("-"):
+            raise CommandError(f"Unknown option: {arg}\nUsage: {SORT_USAGE}")
+        else:
+            files.append(arg)
+        idx += 1
+    if not files:
+        raise ValueError("Missing required argument.")
+    return SortOptions(numeric, reverse, unique, field, output, files)
+
+
+def _field(line: str, field: int) -> str:
+    """
+    Field *field* (1-based) through the end of *line*.
+
+    As in coreutils without ``-b``, a field is the blanks before it plus the
+    non-blanks that follow, so the key starts where the previous field ends.
+    """
+    position = 0
+    for _ in range(field - 1):
+        position = _FIELD.match(line, position).end()
+    return line[position:]
+
+
+def _number(text: str) -> float:
+    match = _NUMBER.match(text)
+    return float(match.group(1)) if match else 0.0
+
+
+def sort_key(numeric: bool = False, field: int = 1, unique: bool = False) -> Optional[Callable[[str], Any]]:
+    """
+    Key function for ``sort``; None means the line itself.
+
+    Lines with equal keys are ordered by the whole line, as coreutils does.
+    With *unique* they keep their input order instead, so that ``-u``
+    outputs the first line of each group of equal keys.
+    """
+    if numeric:
+        number = lambda line: _number(_field(line, field))  # noqa: E731
+        return number if unique else lambda line: (number(line), line)
+    if field > 1:
+        return (lambda line: _field(line, field)) if unique else lambda line: (_field(line, field), line)
+    return None
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8", errors="surrogateescape", newline="\n") as handle:
+        for line in handle:
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def _write_lines(path: Path, lines: Iterable[str]) -> None:
+    with path.open("w", encoding="utf-8", errors="surrogateescape", newline="\n") as handle:
+        handle.writelines(line + "\n" for line in lines)
+
+
+class _Runs:
+    """Sorted run files in one spool directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.paths: List[Path] = []
+        self.created = 0
+
+    def write(self, lines: Iterable[str]) -> Path:
+        path = self.directory / f"run-{self.created:06d}"
+        self.created += 1
+        _write_lines(path, lines)
+        return path
+
+
+def external_sort(
+    lines: Iterable[str],
+    key: Optional[Callable[[str], Any]] = None,
+    reverse: bool = False,
+    memory_bytes: int = SORT_MEMORY_BYTES,
+    spool_dir: Optional[Path] = None,
+    stats: Optional[dict] = None,
+) -> Iterator[str]:
+    """
+    Yield *lines* sorted, holding at most about *memory_bytes* of them at once.
+
+    Args:
+        spool_dir: Directory for run files; required once input exceeds the budget
+        stats: If given, receives ``runs``, the number of run files written
+    """
+    chunk: List[str] = []
+    size = 0
+    runs = _Runs(spool_dir) if spool_dir is not None else None
+    for line in lines:
+        chunk.append(line)
+        size += len(line) + LINE_OVERHEAD
+        if size >= memory_bytes:
+            if runs is None:
+                raise CommandError("Input exceeds the sort memory budget and no spool directory was given.")
+            chunk.sort(key=key, reverse=reverse)
+            runs.paths.append(runs.write(chunk))
+            chunk, size = [], 0
+    chunk.sort(key=key, reverse=reverse)
+    if stats is not None:
+        stats["runs"] = runs.created if runs is not None else 0
+    if runs is None or not runs.paths:
+        yield from chunk
+        return
+    while len(runs.paths) + 1 > MERGE_FAN_IN:
+        batch, rest = runs.paths[:MERGE_FAN_IN], runs.paths[MERGE_FAN_IN:]
+        # Runs hold consecutive slices of the input. Keeping the merged run in
+        # front keeps equal keys in input order, which ``-u`` relies on.
+        merged = runs.write(heapq.merge(*(_read_lines(path) for path in batch), key=key, reverse=reverse))
+        runs.paths = [merged] + rest
+        for path in batch:
+            path.unlink()
+        if stats is not None:
+            stats["runs"] = runs.created
+    yield from heapq.merge(*(_read_lines(path) for path in runs.paths), chunk, key=key, reverse=reverse)
+
+
+def _unique(lines: Iterable[str], key: Optional[Callable[[str], Any]]) -> Iterator[str]:
+    """First line of each run of lines whose keys compare equal."""
+    previous: Any = object()
+    for line in lines:
+        current = key(line) if key is not None else line
+        if current != previous:
+            previous = current
+            yield line
+
+
+@contextmanager
+def _spool_dir() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory(prefix=".sort-", dir=str(paths.WORKSPACE_ROOT)) as directory:
+        yield Path(directory)
+
+
+def _replace_with(target: Path, lines: Iterable[str]) -> None:
+    """Write *lines* to a sibling temp file, then rename it over *target*."""
+    fd, name = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+    os.close(fd)
+    try:
+        _write_lines(Path(name), lines)
+        os.replace(name, target)
+    except BaseException:
+        Path(name).unlink(missing_ok=True)
+        raise
+    record_added(target)
+
+
+def _input_file(ctx: SessionContext, name: str) -> Path:
+    target = resolve_in_root(name, ctx.cwd)
+    if not target.exists():
+        raise FileNotFoundError(target)
+    if not target.is_file():
+        raise CommandError(f"Not a file: {name}")
+    return target
+
+
+def sort_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    options = _parse_sort(args)
+    writes = frozenset({resolve_in_root(options.output, ctx.cwd)}) if options.output else frozenset()
+    return PathAccess(reads=frozenset(resolve_in_root(name, ctx.cwd) for name in options.files), writes=writes)
+
+
+def sort_handler(ctx: SessionContext, args: List[str]) -> str:
+    options = _parse_sort(args)
+    inputs = [_input_file(ctx, name) for name in options.files]
+    output = resolve_in_root(options.output, ctx.cwd) if options.output else None
+    key = sort_key(options.numeric, options.field, options.unique)
+    stats: dict = {}
+    with _spool_dir() as spool:
+        lines = itertools.chain.from_iterable(_read_lines(path) for path in inputs)
+        ordered = external_sort(lines, key, options.reverse, SORT_MEMORY_BYTES, spool, stats)
+        if options.unique:
+            ordered = _unique(ordered, key)
+        if output is not None:
+            _replace_with(output, ordered)
+            text = ""
+        else:
+            text = "\n".join(ordered)
+    return CommandOutput(text, {"sort_runs": stats.get("runs", 0)})
+
+
+def _parse_uniq(args: List[str]) -> tuple:
+    unknown = [arg for arg in args if arg.startswith("-") and arg != "-c"]
+    if unknown:
+        raise CommandError(f"Unknown option: {unknown[0]}\nUsage: {UNIQ_USAGE}")
+    names = [arg for arg in args if not arg.startswith("-")]
+    if not names:
+        raise ValueError("Missing required argument.")
+    if len(names) > 2:
+        raise CommandError(f"Usage: {UNIQ_USAGE}")
+    return "-c" in args, names[0], names[1] if len(names) == 2 else None
+
+
+def uniq_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    _, source, output = _parse_uniq(args)
+    writes = frozenset({resolve_in_root(output, ctx.cwd)}) if output else frozenset()
+    return PathAccess(reads=frozenset({resolve_in_root(source, ctx.cwd)}), writes=writes)
+
+
+def uniq_handler(ctx: SessionContext, args: List[str]) -> str:
+    counted, source, output = _parse_uniq(args)
+    groups = itertools.groupby(_read_lines(_input_file(ctx, source)))
+    if counted:
+        lines: Iterable[str] = (f"{sum(1 for _ in group):7d} {line}" for line, group in groups)
+    else:
+        lines = (line for line, _ in groups)
+    if output is not None:
+        _replace_with(resolve_in_root(output, ctx.cwd), lines)
+        return ""
+    return "\n".join(lines)
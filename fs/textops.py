@@ -0,0 +1,326 @@
+"""Streaming ``head``, ``tail`` and ``wc`` handlers.
+
+Unlike ``cat`` these never load a whole file. ``head`` stops reading as soon
+as it has its lines, and ``tail`` seeks backwards from the end in blocks, so
+both cost O(output) however large the file is. ``wc`` must see every byte,
+but it does so through ``mmap`` in large chunks that it counts with
+``bytes.count``, without building Python objects per line.
+"""
+
+from __future__ import annotations
+
+import codecs
+import mmap
+import os
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from core.errors import CommandError
+from core.output import Records
+from core.registry import PathAccess
+from core.session import SessionContext
+from fs.paths import resolve_in_root
+
+__all__ = [
+    "WordCount",
+    "format_counts",
+    "head_handler",
+    "head_tail_access",
+    "tail_handler",
+    "wc_access",
+    "wc_handler",
+]
+
+READ_BLOCK = 64 * 1024
+COUNT_CHUNK = 8 * 1024 * 1024
+FOLLOW_INTERVAL = float(os.getenv("TAIL_FOLLOW_INTERVAL", "0.25"))
+# ``tail -f`` returns after this long even if the client is still reading.
+FOLLOW_SECONDS = float(os.getenv("TAIL_FOLLOW_SECONDS", "600"))
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+
+
+class _Options(NamedTuple):
+    unit: str
+    count: int
+    from_start: bool
+    follow: bool
+    headers: Optional[bool]
+    files: List[str]
+
+
+def _parse_count(text: str, usage: str, allow_plus: bool) -> Tuple[int, bool]:
+    from_start = allow_plus and text.startswith("+")
+    digits = text[1:] if from_start else text
+    if not digits.isdigit():
+        raise CommandError(f"Invalid count: {text}\nUsage: {usage}")
+    return int(digits), from_start
+
+
+def _parse_options(args: List[str], usage: str, tail: bool) -> _Options:
+    unit, count, from_start, follow = "lines", 10, False, False
+    headers: Optional[bool] = None
+    files: List[str] = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg in {"-n", "-c"}:
+            if idx + 1 >= len(args):
+                raise CommandError(f"Usage: {usage}")
+            unit = "lines" if arg == "-n" else "bytes"
+            count, from_start = _parse_count(args[idx + 1], usage, tail)
+            idx += 1
+        elif arg[:2] in {"-n", "-c"} and len(arg) > 2:
+            unit = "lines" if arg[1] == "n" else "bytes"
+            count, from_start = _parse_count(arg[2:], usage, tail)
+        elif tail and arg.startswith("+") and arg[1:].isdigit():
+            unit, count, from_start = "lines", int(arg[1:]), True
+        elif arg.startswith("-") and arg[1:].isdigit():
+            unit, count, from_start = "lines", int(arg[1:]), False
+        elif tail and arg in {"-f", "--follow"}:
+            follow = True
+        elif arg in {"-q", "--quiet"}:
+            headers = False
+        elif arg in {"-v", "--verbose"}:
+            headers = True
+        elif arg.startswith("-"):
+            raise CommandError(f"Unknown option: {arg}\nUsage: {usage}")
+        else:
+            files.append(arg)
+        idx += 1
+    if not files:
+        raise ValueError("Missing required argument.")
+    if follow and len(files) != 1:
+        raise CommandError("tail -f follows exactly one file.")
+    return _Options(unit, count, from_start, follow, headers, files)
+
+
+def _open_file(ctx: SessionContext, name: str) -> Path:
+    target = resolve_in_root(name, ctx.cwd)
+    if not target.exists():
+        raise FileNotFoundError(target)
+    if not target.is_file():
+        raise CommandError(f"Not a file: {name}")
+    return target
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def read_head(handle, unit: str, count: int, limit: Optional[int] = None) -> bytes:
+    """
+    The first *count* lines or bytes of *handle*, reading no further than needed.
+
+    Args:
+        limit: Stop once more than this many bytes are in hand; the result is
+            then longer than *limit* and incomplete
+    """
+    if unit == "bytes":
+        return handle.read(count if limit is None else min(count, limit + 1))
+    chunks: List[bytes] = []
+    remaining = count
+    size = 0
+    while remaining > 0 and (limit is None or size <= limit):
+        block = handle.read(READ_BLOCK)
+        if not block:
+            break
+        found = block.count(b"\n")
+        if found >= remaining:
+            cut = -1
+            for _ in range(remaining):
+                cut = block.index(b"\n", cut + 1)
+            chunks.append(block[:cut + 1])
+            break
+        chunks.append(block)
+        size += len(block)
+        remaining -= found
+    return b"".join(chunks)
+
+
+def read_tail(handle, unit: str, count: int, limit: Optional[int] = None) -> bytes:
+    """
+    The last *count* lines or bytes of *handle*, read backwards from the end.
+
+    Args:
+        limit: As for ``read_head``
+    """
+    size = os.fstat(handle.fileno()).st_size
+    if unit == "bytes":
+        take = count if limit is None else min(count, limit + 1)
+        handle.seek(max(0, size - take))
+        return handle.read()
+    if count == 0 or size == 0:
+        return b""
+    # A newline that ends the file does not start another line.
+    handle.seek(size - 1)
+    wanted = count + 1 if handle.read(1) == b"\n" else count
+    blocks: List[bytes] = []
+    found = 0
+    position = size
+    while position > 0 and found < wanted and (limit is None or size - position <= limit):
+        step = min(READ_BLOCK, position)
+        position -= step
+        handle.seek(position)
+        block = handle.read(step)
+        blocks.append(block)
+        found += block.count(b"\n")
+    data = b"".join(reversed(blocks))
+    cut = len(data) - 1 if data.endswith(b"\n") else len(data)
+    for _ in range(count):
+        cut = data.rfind(b"\n", 0, cut)
+        if cut < 0:
+            return data
+    return data[cut + 1:]
+
+
+def skip_lines(handle, count: int) -> None:
+    """Position *handle* at the start of line *count* (1-based)."""
+    remaining = count - 1
+    while remaining > 0:
+        block = handle.read(READ_BLOCK)
+        if not block:
+            return
+        found = block.count(b"\n")
+        if found >= remaining:
+            cut = -1
+            for _ in range(remaining):
+                cut = block.index(b"\n", cut + 1)
+            handle.seek(cut + 1 - len(block), os.SEEK_CUR)
+            return
+        remaining -= found
+
+
+def _with_headers(options: _Options, bodies: List[Tuple[str, bytes]]) -> str:
+    show = options.headers if options.headers is not None else len(bodies) > 1
+    if not show:
+        return _decode(b"".join(body for _, body in bodies)).rstrip("\n")
+    parts = [f"==> {name} <==\n{_decode(body)}" for name, body in bodies]
+    return "\n".join(parts).rstrip("\n")
+
+
+def head_handler(ctx: SessionContext, args: List[str]) -> str:
+    options = _parse_options(args, "head [-n N | -c N] <file>...", tail=False)
+    bodies = []
+    for name in options.files:
+        with _open_file(ctx, name).open("rb") as handle:
+            bodies.append((name, read_head(handle, options.unit, options.count)))
+    return _with_headers(options, bodies)
+
+
+def head_tail_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    """``head``/``tail`` read their files; ``tail -f`` locks nothing so the file can keep growing."""
+    options = _parse_options(args, "", tail=True)
+    if options.follow:
+        return PathAccess()
+    return PathAccess(reads=frozenset(resolve_in_root(name, ctx.cwd) for name in options.files))
+
+
+def wc_access(ctx: SessionContext, args: List[str]) -> PathAccess:
+    names = [arg for arg in args if not arg.startswith("-")]
+    return PathAccess(reads=frozenset(resolve_in_root(name, ctx.cwd) for name in names))
+
+
+def tail_handler(ctx: SessionContext, args: List[str]) -> str:
+    options = _parse_options(args, "tail [-n N | -n +N | -c N] [-f] <file>...", tail=True)
+    if options.follow and ctx.sink is None:
+        raise CommandError("tail -f needs a streaming session; use the /stream endpoint.")
+    bodies = []
+    for name in options.files:
+        with _open_file(ctx, name).open("rb") as handle:
+            if options.from_start:
+                if options.unit == "bytes":
+                    handle.seek(max(0, options.count - 1))
+                else:
+                    skip_lines(handle, options.count)
+                body = handle.read()
+            else:
+                body = read_tail(handle, options.unit, options.count)
+            bodies.append((name, body))
+            offset = handle.tell() if options.from_start else os.fstat(handle.fileno()).st_size
+    if not options.follow:
+        return _with_headers(options, bodies)
+    ctx.emit("output", _decode(bodies[0][1]))
+    _follow(ctx, _open_file(ctx, options.files[0]), offset)
+    return ""
+
+
+def _follow(ctx: SessionContext, target: Path, offset: int) -> None:
+    """Stream what is appended to *target* after *offset* until the time limit."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    deadline = time.monotonic() + FOLLOW_SECONDS
+    with target.open("rb") as handle:
+        while time.monotonic() < deadline:
+            size = os.fstat(handle.fileno()).st_size
+            if size < offset:
+                # Truncated in place (log rotation by copytruncate): start over.
+                offset = 0
+            if size > offset:
+                handle.seek(offset)
+                while True:
+                    block = handle.read(READ_BLOCK)
+                    if not block:
+                        break
+                    offset += len(block)
+                    text = decoder.decode(block)
+                    if text:
+                        # Raises StreamClosedError once the client goes away.
+                        ctx.emit("output", text)
+            else:
+                time.sleep(FOLLOW_INTERVAL)
+
+
+class WordCount(NamedTuple):
+    lines: int
+    words: int
+    bytes: int
+    name: str
+
+
+def format_counts(rows: Sequence[WordCount], columns: Sequence[str] = ("lines", "words", "bytes")) -> str:
+    """``wc`` text: right-aligned counts followed by the file name."""
+    width = max((len(str(getattr(row, column))) for row in rows for column in columns), default=1)
+    return "\n".join(
+        " ".join(str(getattr(row, column)).rjust(width) for column in columns) + f" {row.name}" for row in rows
+    )
+
+
+def count_file(path: Path, words: bool = True) -> Tuple[int, int, int]:
+    """``(lines, words, bytes)`` of *path*, counted in mmap chunks.
+
+    Splitting out words is most of the work, so ``words=False`` skips it and
+    reports 0.
+    """
+    with path.open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size == 0:
+            return 0, 0, 0
+        lines = word_count = 0
+        previous_in_word = False
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, size, COUNT_CHUNK):
+                chunk = mapped[start:start + COUNT_CHUNK]
+                lines += chunk.count(b"\n")
+                if words:
+                    word_count += len(chunk.split())
+                    # A word cut in two by the chunk boundary was counted twice.
+                    if previous_in_word and chunk[0] not in _WHITESPACE:
+                        word_count -= 1
+                    previous_in_word = chunk[-1] not in _WHITESPACE
+    return lines, word_count, size
+
+
+def wc_handler(ctx: SessionContext, args: List[str]) -> Records:
+    flags = {arg for arg in args if arg.startswith("-")}
+    unknown = flags - {"-l", "-w", "-c"}
+    if unknown:
+        raise CommandError(f"Unknown option: {sorted(unknown)[0]}\nUsage: wc [-l] [-w] [-c] <file>...")
+    names = [arg for arg in args if not arg.startswith("-")]
+    if not names:
+        raise ValueError("Missing required argument.")
+    columns = [column for flag, column in (("-l", "lines"), ("-w", "words"), ("-c", "bytes")) if flag in flags]
+    columns = columns or ["lines", "words", "bytes"]
+    rows = [WordCount(*count_file(_open_file(ctx, name), words="words" in columns), name) for name in names]
+    if len(rows) > 1:
+        rows.append(WordCount(*(sum(getattr(row, column) for row in rows) for column in WordCount._fields[:3]), "total"))
+    return Records(rows, lambda rows: format_counts(rows, columns))
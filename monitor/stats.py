@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
-from typing import List
+import heapq
+import threading
+from typing import List, Mapping, NamedTuple, Sequence
 
 import psutil
 
 from ui.render import format_table, humanize_bytes
 
+# Bytes freed by ``dedupe --hardlink`` since the process started.
+_reclaimed = 0
+_reclaimed_lock = threading.Lock()
+
 
 def _safe_cpu_percent() -> float:
     try:
@@ -41,6 +47,17 @@ def mem() -> str:
         return "Memory: 0 B / 0 B  (0.0%)"
 
 
+def record_reclaimed(nbytes: int) -> None:
+    """Count *nbytes* freed in the workspace towards the ``disk`` summary."""
+    global _reclaimed
+    with _reclaimed_lock:
+        _reclaimed += max(0, int(nbytes))
+
+
+def reclaimed_bytes() -> int:
+    return _reclaimed
+
+
 def disk() -> str:
     """Return disk utilisation summary."""
     try:
@@ -49,33 +66,60 @@ def disk() -> str:
         info = psutil.disk_usage('/')
     used = humanize_bytes(int(info.used))
     total = humanize_bytes(int(info.total))
-    return f"Disk: {used} / {total}  ({info.percent:.1f}%)"
+    summary = f"Disk: {used} / {total}  ({info.percent:.1f}%)"
+    if _reclaimed:
+        summary += f"  |  Reclaimed: {humanize_bytes(_reclaimed)}"
+    return summary
 
 
-def ps(top_n: int = 5) -> str:
-    """Return a table of top processes by CPU usage."""
-    rows: List[List[str]] = [["PID", "NAME", "CPU%", "RSS"]]
+class ProcessInfo(NamedTuple):
+    pid: int
+    name: str
+    cpu_percent: float
+    rss: int
 
-    processes = []
+
+def ps_rows(top_n: int = 5) -> List[ProcessInfo]:
+    """Top processes by CPU usage, busiest first."""
+    processes: List[ProcessInfo] = []
     try:
         for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info']):
             try:
                 info = proc.info
-                name = info.get('name') or "?"
-                rss = info.get('memory_info').rss if info.get('memory_info') else 0
+                memory = info.get('memory_info')
                 processes.append(
-                    [
-                        str(info.get('pid', '?')),
-                        name,
-                        f"{float(info.get('cpu_percent') or 0.0):.1f}",
-                        humanize_bytes(int(rss)),
-                    ]
+                    ProcessInfo(
+                        int(info.get('pid') or 0),
+                        info.get('name') or "?",
+                        round(float(info.get('cpu_percent') or 0.0), 1),
+                        int(memory.rss) if memory else 0,
+                    )
                 )
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
     except Exception:
         processes = []
+    return heapq.nlargest(top_n, processes, key=lambda row: row.cpu_percent)
+
+
+def format_processes(rows: Sequence[ProcessInfo]) -> str:
+    """Fixed-width ``ps`` table with a header row."""
+    table: List[List[str]] = [["PID", "NAME", "CPU%", "RSS"]]
+    table.extend([str(row.pid), row.name, f"{row.cpu_percent:.1f}", humanize_bytes(row.rss)] for row in rows)
+    return format_table(table)
 
-    processes.sort(key=lambda row: float(row[2]), reverse=True)
-    rows.extend(processes[:top_n])
-    return format_table(rows)
+
+def ps(top_n: int = 5) -> str:
+    """Return a table of top processes by CPU usage."""
+    return format_processes(ps_rows(top_n))
+
+
+def scrollback(usage: Mapping[str, int]) -> str:
+    """Return a per-session scrollback memory summary from ``memory_usage()`` numbers."""
+    in_memory = int(usage.get("hot_bytes", 0)) + int(usage.get("compressed_bytes", 0)) + int(usage.get("html_bytes", 0))
+    return (
+        f"Scrollback: {int(usage.get('entries', 0))} entries  |  "
+        f"RAM {humanize_bytes(in_memory)} "
+        f"(zlib {humanize_bytes(int(usage.get('compressed_bytes', 0)))})  |  "
+        f"Disk {humanize_bytes(int(usage.get('spilled_bytes', 0)))}"
+    )
@@ -0,0 +1,306 @@
+"""
+Declarative NL grammar: intents loaded from ``intents.json`` and compiled once.
+
+Each intent names the verbs that can introduce it, a regex pattern with
+``{slot}`` placeholders, the slot types, and the command templates its
+matches expand to. Intents are indexed by verb: a line is scanned once for
+verbs, and only the intents of the verbs it contains are tried, through one
+combined regex per verb combination that is compiled on first use. Adding
+intents for new verbs therefore does not slow down matching of other lines.
+
+A line may hold several clauses ("copy a into backup and then delete a"),
+split on the grammar's ``clause_separator`` and matched one by one. A slot
+whose type is a ``list`` takes several values ("a, b and c"), and every
+template that uses it expands to one command per value.
+"""
+
+import json
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Pattern, Sequence, Set, Tuple, Union
+
+GRAMMAR_PATH = Path(__file__).with_name("intents.json")
+
+# Distinct verb combinations whose combined regex is kept compiled.
+MATCHER_CACHE_SIZE = 256
+
+_SLOT = re.compile(r"\{(\w+)\}")
+
+# Separators between the values of a list slot: "a, b and c", "a, b, and c".
+_LIST_SEPARATOR = re.compile(r"\s*(?:,\s*and\s+|,\s*|\s+and\s+)", re.IGNORECASE)
+
+Plan = Tuple[str, ...]
+Clause = Tuple["Intent", Tuple[str, ...]]
+# Resolves a slot value of the given resolve kind ("any", "dir", "exact" or
+# "exact_dir") to a command argument.
+SlotResolver = Callable[[str, str], str]
+
+
+@dataclass(frozen=True)
+class Intent:
+    """One compiled intent: its verbs, slot-expanded pattern and templates."""
+
+    name: str
+    key: str
+    verbs: Tuple[str, ...]
+    pattern: str
+    slots: Tuple[str, ...]
+    commands: Tuple[str, ...]
+    resolve: Tuple[Optional[str], ...] = ()
+    # Position of the one slot that takes a list of values, if any.
+    list_slot: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        # Slot groups follow the intent group in pattern order, so templates are
+        # rewritten to positional fields filled straight from ``match.groups()``.
+        positions = {slot: idx for idx, slot in enumerate(self.slots)}
+        formats = tuple(_SLOT.sub(lambda m: "{%d}" % positions[m.group(1)], t) for t in self.commands)
+        object.__setattr__(self, "_formats", formats)
+        listed = "{%d}" % self.list_slot if self.list_slot is not None else None
+        object.__setattr__(self, "_repeats", tuple(listed is not None and listed in f for f in formats))
+
+    def slot_values(self, match: "re.Match[str]") -> Tuple[str, ...]:
+        """Slot values in pattern order; optional slots that did not match are empty."""
+        start = match.lastindex or 0
+        return match.groups("")[start:start + len(self.slots)]
+
+    def expand(self, values: Sequence[str], resolver: Optional[SlotResolver] = None) -> Plan:
+        """
+        Fill the command templates, passing resolvable slots through *resolver*.
+
+        A template that uses the list slot yields one command per list value.
+        """
+        values = list(values)
+        items = [""]
+        if self.list_slot is not None:
+            items = split_list(values[self.list_slot])
+        if resolver is not None and self.resolve:
+            values = [
+                resolver(value, kind) if value and kind and idx != self.list_slot else value
+                for idx, (value, kind) in enumerate(zip(values, self.resolve))
+            ]
+            kind = self.resolve[self.list_slot] if self.list_slot is not None else None
+            if kind:
+                items = [resolver(item, kind) for item in items]
+        commands: List[str] = []
+        for template, repeats in zip(self._formats, self._repeats):
+            if not repeats:
+                commands.append(template.format(*values))
+                continue
+            for item in items:
+                values[self.list_slot] = item
+                commands.append(template.format(*values))
+        return tuple(commands)
+
+    def plan(self, match: "re.Match[str]") -> Plan:
+        return self.expand(self.slot_values(match))
+
+
+def split_list(value: str) -> List[str]:
+    """Values of a list slot: ``"a, b and c"`` -> ``["a", "b", "c"]``."""
+    return [item for item in _LIST_SEPARATOR.split(value) if item] or [value]
+
+
+class Grammar:
+    """Verb-indexed set of intents, tried in the order they are declared."""
+
+    def __init__(
+        self,
+        intents: Sequence[Intent],
+        nl_verbs: Iterable[str] = (),
+        clause_separator: Optional[str] = None,
+    ):
+        names = [intent.name for intent in intents]
+        if len(set(names)) != len(names):
+            raise ValueError("Intent names must be unique.")
+        self.intents: Tuple[Intent, ...] = tuple(intents)
+        self._by_key: Dict[str, Intent] = {intent.key: intent for intent in self.intents}
+        self._by_verb: Dict[str, Tuple[int, ...]] = {}
+        for idx, intent in enumerate(self.intents):
+            for verb in intent.verbs:
+                self._by_verb[verb] = self._by_verb.get(verb, ()) + (idx,)
+
+        self.verbs: FrozenSet[str] = frozenset(v.lower() for v in nl_verbs) | frozenset(self._by_verb)
+        # The scan reports the longest verb at each position, so a verb found
+        # inside another one ("move" in "remove") is implied by the longer one.
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            verb: tuple(other for other in self.verbs if other in verb) for verb in self.verbs
+        }
+        self._verb_scan = re.compile("|".join(re.escape(v) for v in sorted(self.verbs, key=len, reverse=True)))
+        self._matchers: Dict[FrozenSet[str], Optional[Pattern[str]]] = {}
+        self._clause_split = re.compile(clause_separator, re.IGNORECASE) if clause_separator else None
+
+    def has_verb(self, text: str) -> bool:
+        return self._verb_scan.search(text.lower()) is not None
+
+    def verbs_in(self, text: str) -> Set[str]:
+        """Verbs occurring anywhere in *text*, as substrings."""
+        return self._expand_verbs(self._verb_scan.findall(text.lower()))
+
+    def match(self, text: str) -> Optional[Plan]:
+        """Plan for the clauses of *text*, or None if they do not all match."""
+        clauses = self.match_clauses(text)
+        return expand_clauses(clauses) if clauses is not None else None
+
+    def match_slots(self, text: str) -> Optional[Clause]:
+        """First declared intent matching *text* and its raw slot values, or None."""
+        return self._match_with_verbs(text, self.verbs_in(text))
+
+    def split_clauses(self, text: str) -> List[str]:
+        """The clauses of *text*; a line without separators between clauses is one clause."""
+        if self._clause_split is None:
+            return [text]
+        clauses = self._clause_split.split(text)
+        # A separator at either end ("delete then") is part of a clause.
+        return clauses if all(clause.strip() for clause in clauses) else [text]
+
+    def match_clauses(self, text: str) -> Optional[Tuple[Clause, ...]]:
+        """
+        Intent and raw slot values for each clause of *text*, in order.
+
+        None unless every clause matches: matching the whole line instead
+        would let a list slot swallow the rest ("delete a and then ...").
+        """
+        found = tuple(self.match_slots(clause) for clause in self.split_clauses(text))
+        return found if all(clause is not None for clause in found) else None
+
+    def match_many(self, lines: Sequence[str]) -> List[Optional[Plan]]:
+        """Match a batch of lines with a single verb scan over all of them."""
+        if not lines:
+            return []
+        blob = "\n".join(lines).lower()
+        starts: List[int] = []
+        position = 0
+        for line in lines:
+            starts.append(position)
+            position += len(line) + 1
+        found: List[List[str]] = [[] for _ in lines]
+        for match in self._verb_scan.finditer(blob):
+            found[bisect_right(starts, match.start()) - 1].append(match.group())
+        plans: List[Optional[Plan]] = []
+        for line, verbs in zip(lines, found):
+            if not verbs:
+                plans.append(None)
+            elif len(self.split_clauses(line)) > 1:
+                # Rare enough that a verb scan per clause costs nothing.
+                plans.append(self.match(line))
+            else:
+                slots = self._match_with_verbs(line, self._expand_verbs(verbs))
+                plans.append(slots[0].expand(slots[1]) if slots is not None else None)
+        return plans
+
+    def _expand_verbs(self, verbs: Iterable[str]) -> Set[str]:
+        present: Set[str] = set()
+        for verb in verbs:
+            present.update(self._implied[verb])
+        return present
+
+    def _match_with_verbs(self, text: str, verbs: Set[str]) -> Optional[Clause]:
+        matcher = self._matcher(frozenset(verbs))
+        match = matcher.search(text) if matcher is not None else None
+        if match is None:
+            return None
+        # Slot groups close before their enclosing intent group, so the last
+        # group to close names the intent.
+        intent = self._by_key[match.lastgroup]
+        return intent, intent.slot_values(match)
+
+    def _matcher(self, verbs: FrozenSet[str]) -> Optional[Pattern[str]]:
+        try:
+            return self._matchers[verbs]
+        except KeyError:
+            pass
+        if len(self._matchers) >= MATCHER_CACHE_SIZE:
+            self._matchers.clear()
+        candidates = sorted({idx for verb in verbs for idx in self._by_verb.get(verb, ())})
+        matcher = compile_intents(self.intents[idx] for idx in candidates) if candidates else None
+        self._matchers[verbs] = matcher
+        return matcher
+
+
+def expand_clauses(clauses: Iterable[Clause], resolver: Optional[SlotResolver] = None) -> Plan:
+    """The commands of each clause, one clause after the other."""
+    return tuple(command for intent, values in clauses for command in intent.expand(values, resolver))
+
+
+def compile_intents(intents: Iterable[Intent]) -> Pattern[str]:
+    """Combine intents into one regex with a named group per intent and slot.
+
+    Every alternative is anchored at the start and skips ahead lazily, so the
+    regex engine tries the intents in order at each candidate position the
+    same way sequential ``search`` calls would, but in a single pass.
+    """
+    alternatives = [f"(?s:.*?)(?P<{intent.key}>{intent.pattern})" for intent in intents]
+    return re.compile(r"\A(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+
+def _slot_type(spec: Union[str, Dict[str, object]]) -> Dict[str, object]:
+    """Slot types are a bare regex or ``{"pattern": ..., "resolve": <kind>, "list": <bool>}``."""
+    return {"pattern": spec} if isinstance(spec, str) else spec
+
+
+def _compile_pattern(name: str, key: str, pattern: str, slots: Dict[str, str], slot_types: Dict[str, str]) -> str:
+    def expand(match: "re.Match[str]") -> str:
+        slot = match.group(1)
+        if slot not in slots:
+            raise ValueError(f"Intent '{name}' uses undeclared slot '{slot}'.")
+        slot_type = slots[slot]
+        if slot_type not in slot_types:
+            raise ValueError(f"Intent '{name}' has unknown slot type '{slot_type}'.")
+        return f"(?P<{key}__{slot}>{_slot_type(slot_types[slot_type])['pattern']})"
+
+    compiled = _SLOT.sub(expand, pattern)
+    try:
+        groups = re.compile(compiled).groups
+    except re.error as exc:
+        raise ValueError(f"Intent '{name}' has an invalid pattern: {exc}") from exc
+    if groups != len(_SLOT.findall(pattern)):
+        raise ValueError(f"Intent '{name}' must use non-capturing groups outside its slots.")
+    return compiled
+
+
+def load_grammar(path: Optional[Path] = None) -> Grammar:
+    """Load and compile a grammar file (``intents.json`` by default)."""
+    with open(path or GRAMMAR_PATH, encoding="utf-8") as handle:
+        data = json.load(handle)
+    slot_types: Dict[str, str] = data.get("slot_types", {})
+    intents = []
+    for spec in data["intents"]:
+        name = spec["name"]
+        slots: Dict[str, str] = spec.get("slots", {})
+        key = f"i{len(intents)}"
+        pattern = _compile_pattern(name, key, spec["pattern"], slots, slot_types)
+        pattern_slots = tuple(_SLOT.findall(spec["pattern"]))
+        commands = tuple(spec["commands"])
+        for template in commands:
+            for slot in _SLOT.findall(template):
+                if slot not in pattern_slots:
+                    raise ValueError(f"Intent '{name}' template uses slot '{slot}' missing from its pattern.")
+        types = [_slot_type(slot_types[slots[slot]]) for slot in pattern_slots]
+        listed = [idx for idx, slot_type in enumerate(types) if slot_type.get("list")]
+        if len(listed) > 1:
+            raise ValueError(f"Intent '{name}' may use at most one list slot.")
+        intents.append(Intent(
+            name=name,
+            key=key,
+            verbs=tuple(verb.lower() for verb in spec["verbs"]),
+            pattern=pattern,
+            slots=pattern_slots,
+            commands=commands,
+            resolve=tuple(slot_type.get("resolve") for slot_type in types),
+            list_slot=listed[0] if listed else None,
+        ))
+    return Grammar(intents, data.get("nl_verbs", ()), data.get("clause_separator"))
+
+
+_default_grammar: Optional[Grammar] = None
+
+
+def default_grammar() -> Grammar:
+    """The bundled grammar, loaded once per process."""
+    global _default_grammar
+    if _default_grammar is None:
+        _default_grammar = load_grammar()
+    return _default_grammar
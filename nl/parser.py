@@ -2,44 +2,129 @@
 Minimal rule-based NL parser for mapping English instructions to commands.
 """
 
-import re
-from typing import List, Optional, Tuple
+import os
+import shlex
+from functools import lru_cache
+from pathlib import Path
+from typing import FrozenSet, Iterable, List, Optional, Tuple
 
-from ui.render import emit_stdout, emit_stderr
-from core.registry import CommandRegistry
-from fs.ops import (
-    pwd_handler, cd_handler, ls_handler, mkdir_handler,
-    rm_handler, mv_handler, cp_handler, touch_handler, cat_handler
-)
+from core.registry import CommandRegistry, create_default_registry
+from core.errors import RootEscapeError
+from fs import paths
+from fs.name_index import AmbiguousPathError, UnresolvedPathError, get_name_index
+from nl.grammar import Clause, Grammar, default_grammar
+from nl.plan import cd_target, run_plan
+
+
+# Router builtins that are not in the registry but are still commands.
+ROUTER_BUILTINS = frozenset({'help', 'history'})
+
+PARSE_CACHE_SIZE = 4096
+
+# Lines matched per verb scan in parse_many.
+PARSE_BATCH_SIZE = 1024
+
+_default_command_names: Optional[FrozenSet[str]] = None
+
+
+def default_command_names() -> FrozenSet[str]:
+    """Command names of the default registry, computed once per process."""
+    global _default_command_names
+    if _default_command_names is None:
+        _default_command_names = frozenset(create_default_registry().list_commands()) | ROUTER_BUILTINS
+    return _default_command_names
+
+
+# Resolve kinds of slots that a destructive command acts on (rm, the mv source).
+EXACT_KINDS = frozenset({"exact", "exact_dir"})
+
+
+def resolve_slot(value: str, kind: str, cwd: Path) -> str:
+    """
+    Map a path slot to a real entry when it does not name one already.
+
+    Slots of the ``exact`` kinds are never guessed: *value* must be, case for
+    case, the full name of an entry relative to *cwd*.
+
+    Raises:
+        UnresolvedPathError: If an ``exact`` slot names no entry; carries the
+            closest fuzzy match as a suggestion
+    """
+    exact = kind in EXACT_KINDS
+    directories_only = kind in {"dir", "exact_dir"}
+    try:
+        base = paths.resolve_in_root(".", cwd)
+        target = paths.resolve_in_root(value, cwd)
+    except RootEscapeError:
+        return value
+    if exact:
+        if _names_entry(value, cwd) and (target.is_dir() or not directories_only):
+            return value
+    elif target.exists():
+        return value
+    index = get_name_index(paths.WORKSPACE_ROOT)
+    if exact:
+        guesses = index.lookup(value, base, directories_only, limit=1)
+        raise UnresolvedPathError(value, os.path.relpath(guesses[0].path, base) if guesses else None)
+    match = index.resolve(value, base, directories_only=directories_only)
+    if match is None:
+        return value
+    return shlex.quote(os.path.relpath(match, base))
+
+
+def _names_entry(value: str, cwd: Path) -> bool:
+    """Whether *value* spells the path of an existing entry under *cwd* exactly, case included."""
+    parts = Path(value).parts
+    if not parts or parts[-1] in {".", ".."} or Path(value).is_absolute():
+        return False
+    current = Path(cwd)
+    for part in parts:
+        if part == ".":
+            continue
+        if part == "..":
+            current = current.parent
+            continue
+        try:
+            if part not in os.listdir(current):
+                return False
+        except OSError:
+            return False
+        current = current / part
+    return True
+
+
+def normalize(input_str: str) -> str:
+    """Collapse runs of whitespace; slot values keep their case."""
+    return " ".join(input_str.split())
 
 
 class NLParser:
     """Rule-based parser for natural language commands."""
     
-    def __init__(self):
-        """Initialize the NL parser with regex rules."""
-        self.rules = [
-            # Create folder rule
-            (
-                re.compile(r"create (?:a|new) folder (?:called|named) (?P<name>\S+)", re.IGNORECASE),
-                lambda match: ["mkdir " + match.group('name')]
-            ),
-            # Move rule
-            (
-                re.compile(r"move (?P<src>\S+) (?:to|into) (?P<dst>\S+)", re.IGNORECASE),
-                lambda match: ["mv " + match.group('src') + " " + match.group('dst') + "/"]
-            ),
-            # List files rule
-            (
-                re.compile(r"list (?:files|everything)(?: in (?P<path>\S+))?", re.IGNORECASE),
-                lambda match: ["ls " + (match.group('path') if match.group('path') else "")]
-            ),
-            # Show file rule
-            (
-                re.compile(r"show (?P<file>\S+)", re.IGNORECASE),
-                lambda match: ["cat " + match.group('file')]
-            )
-        ]
+    def __init__(self, registry: Optional[CommandRegistry] = None, grammar: Optional[Grammar] = None):
+        """
+        Initialize the NL parser with a precompiled grammar.
+        
+        Args:
+            registry: Registry whose command names are never treated as NL;
+                defaults to the built-in command set
+            grammar: Compiled intents; defaults to ``nl/intents.json``
+        """
+        self._registry = registry
+        self._registry_version = -1
+        self._command_names: FrozenSet[str] = frozenset()
+        self.grammar = grammar or default_grammar()
+        self._parse_cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(self._parse_normalized)
+    
+    @property
+    def command_names(self) -> FrozenSet[str]:
+        """Frozen set of names that mark input as a command rather than NL."""
+        if self._registry is None:
+            return default_command_names()
+        if self._registry_version != self._registry.version:
+            self._command_names = frozenset(self._registry.list_commands()) | ROUTER_BUILTINS
+            self._registry_version = self._registry.version
+        return self._command_names
     
     def classify_as_nl(self, input_str: str) -> bool:
         """
@@ -51,109 +136,115 @@ class NLParser:
         Returns:
             True if input appears to be natural language, False otherwise
         """
-        # Common verbs that indicate NL input (not commands)
-        nl_verbs = ['create', 'move', 'list', 'show', 'delete', 'remove', 'copy', 'find']
-        
-        # Check if input contains NL verbs and doesn't start with a known command
         input_lower = input_str.lower().strip()
-        
-        # If it starts with a known command, it's likely not NL
-        registry = CommandRegistry()
-        registry.register("pwd", pwd_handler, "Print working directory", [])
-        registry.register("cd", cd_handler, "Change directory", ["path"])
-        registry.register("ls", ls_handler, "List directory contents", ["path", "--all"])
-        registry.register("mkdir", mkdir_handler, "Create directory", ["name"])
-        registry.register("rm", rm_handler, "Remove file or directory", ["path", "-r"])
-        registry.register("mv", mv_handler, "Move/rename file or directory", ["src", "dst"])
-        registry.register("cp", cp_handler, "Copy file or directory", ["src", "dst", "-r"])
-        registry.register("touch", touch_handler, "Create empty file", ["file"])
-        registry.register("cat", cat_handler, "Display file contents", ["file"])
-        
-        commands = registry.list_commands()
+        if not input_lower:
+            return False
         
         # If input starts with a command, it's not NL
-        if input_lower.split()[0] in commands:
+        if input_lower.split(None, 1)[0] in self.command_names:
             return False
-            
+        
         # If input contains NL verbs, it's likely NL
-        for verb in nl_verbs:
-            if verb in input_lower:
-                return True
-                
-        return False
+        return self.grammar.has_verb(input_lower)
     
-    def parse(self, input_str: str) -> Optional[List[str]]:
+    def parse(self, input_str: str, cwd: Optional[Path] = None) -> Optional[List[str]]:
         """
         Parse natural language input into command plan.
         
+        Clauses are planned in order ("copy a into backup and then go to
+        backup"); slots after a ``cd`` are resolved in the directory it
+        changes into.
+        
         Args:
             input_str: Natural language input
+            cwd: When given, path slots that do not name an existing entry are
+                resolved against the workspace name index ("the readme" ->
+                ``README.md``)
             
         Returns:
             List of commands to execute, or None if no rule matches
+            
+        Raises:
+            AmbiguousPathError: If a path slot matches several entries equally well
+            UnresolvedPathError: If the target of a destructive intent does
+                not exist under exactly that name
         """
-        input_lower = input_str.lower().strip()
+        found = self._parse_cached(normalize(input_str))
+        if found is None:
+            return None
+        plan: List[str] = []
+        where = Path(cwd) if cwd is not None else None
+        for intent, values in found:
+            resolver = None
+            if where is not None:
+                resolver = lambda value, kind, base=where: resolve_slot(value, kind, base)  # noqa: E731
+            commands = intent.expand(values, resolver)
+            plan.extend(commands)
+            for command in commands:
+                if where is not None and command.split(None, 1)[0] == "cd":
+                    try:
+                        where = cd_target(where, shlex.split(command)[1:])
+                    except ValueError:
+                        where = None
+        return plan
+    
+    def cache_info(self):
+        """Hit/miss statistics of the parsed-plan cache."""
+        return self._parse_cached.cache_info()
+    
+    def parse_many(self, lines: Iterable[str], batch_size: int = PARSE_BATCH_SIZE) -> List[Optional[List[str]]]:
+        """
+        Parse a corpus of lines, e.g. a command log, offline.
         
-        for pattern, action in self.rules:
-            match = pattern.search(input_str)
-            if match:
-                return action(match)
+        Lines are normalized and deduplicated, then matched in batches that
+        share one verb scan. The per-call cache is bypassed so a large corpus
+        does not evict interactive entries.
         
-        return None
+        Args:
+            lines: Natural language inputs
+            batch_size: Distinct lines matched per batch
+            
+        Returns:
+            One plan (or None) per input line, in input order
+        """
+        normalized = [normalize(line) for line in lines]
+        distinct = list(dict.fromkeys(normalized))
+        plans = {}
+        for start in range(0, len(distinct), max(1, batch_size)):
+            chunk = distinct[start:start + batch_size]
+            plans.update(zip(chunk, self.grammar.match_many(chunk)))
+        return [list(plans[text]) if plans[text] is not None else None for text in normalized]
+    
+    def _parse_normalized(self, text: str) -> Optional[Tuple[Clause, ...]]:
+        return self.grammar.match_clauses(text)
 
 
 def execute_plan(commands: List[str], router, cwd: str, history: List[str], 
-                scrollback: List[str]) -> Tuple[int, str, str]:
+                scrollback: List[Tuple[str, str]]) -> Tuple[str, str, str]:
     """
-    Execute a plan of commands sequentially and collect results.
+    Execute a plan of commands and collect results.
+    
+    Steps whose paths do not conflict run concurrently (see ``nl.plan``);
+    output is still reported in plan order.
     
     Args:
         commands: List of commands to execute
         router: Command router instance
         cwd: Current working directory
         history: Command history
-        scrollback: Output scrollback
+        scrollback: Output scrollback; receives ``("out" | "err", text)``
+            entries that are rendered to HTML only when displayed
         
     Returns:
         Tuple of (final_status, stdout, stderr)
     """
-    final_status = "ok"
-    stdout_chunks: List[str] = []
-    stderr_chunks: List[str] = []
-    
-    for command in commands:
-        try:
-            # Execute command
-            response = router.execute(command)
-            
-            # Collect output
-            if response.stdout:
-                block = emit_stdout(response.stdout)
-                if block:
-                    scrollback.append(block)
-                stdout_chunks.append(response.stdout.rstrip())
-
-            if response.stderr:
-                block = emit_stderr(response.stderr)
-                if block:
-                    scrollback.append(block)
-                stderr_chunks.append(response.stderr.rstrip())
-
-            if response.status != "ok":
-                final_status = response.status
-                
-        except Exception as e:
-            error_msg = f"Error executing command '{command}': {str(e)}"
-            error_block = emit_stderr(error_msg)
-            if error_block:
-                scrollback.append(error_block)
-            stderr_chunks.append(error_msg.rstrip())
-            final_status = "error"
-            break
-
-    stdout = "\n".join(chunk for chunk in stdout_chunks if chunk).rstrip()
-    stderr = "\n".join(chunk for chunk in stderr_chunks if chunk).rstrip()
-    return final_status, stdout, stderr
+    result = run_plan(router, commands)
+    for block in result.output():
+        scrollback.append(block)
+
+    stdout = "\n".join(r.stdout.rstrip() for r in result.responses if r.stdout).rstrip()
+    stderr = "\n".join(r.stderr.rstrip() for r in result.responses if r.stderr).rstrip()
+    return result.status, stdout, stderr
 
 
 # Global parser instance
@@ -161,7 +252,7 @@ parser = NLParser()
 
 
 def parse_and_execute(input_str: str, router, cwd: str, history: List[str], 
-                      scrollback: List[str]) -> Tuple[int, str, str]:
+                      scrollback: List[Tuple[str, str]]) -> Tuple[Optional[str], str, str]:
     """
     Parse natural language input and execute the resulting plan.
     
@@ -177,8 +268,11 @@ def parse_and_execute(input_str: str, router, cwd: str, history: List[str],
     """
     # Check if input should be treated as NL
     if parser.classify_as_nl(input_str):
-        # Try to parse as NL
-        plan = parser.parse(input_str)
+        # Try to parse as NL, resolving loose file names against the workspace
+        try:
+            plan = parser.parse(input_str, cwd=Path(cwd))
+        except (AmbiguousPathError, UnresolvedPathError) as exc:
+            return "error", "", str(exc)
         if plan:
             # Execute the plan
             return execute_plan(plan, router, cwd, history, scrollback)
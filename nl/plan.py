@@ -0,0 +1,202 @@
+"""
+Dependency-aware execution of multi-step NL command plans.
+
+Each step's read and write path sets come from its command's ``access``
+function. A step depends on every earlier step it conflicts with (one of them
+writes a path the other reads or writes, subtrees included), and steps with no
+known access act as barriers. ``cd`` is always a barrier, and the steps after
+it have their access computed from the directory it changes into. Independent
+steps run concurrently on a worker pool; results are always reported in plan
+order.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from core.errors import RootEscapeError
+from core.registry import PathAccess
+from core.router import CommandRouter, Response
+from core.session import SessionContext
+from fs import paths
+
+PLAN_WORKERS = int(os.getenv("NL_PLAN_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+
+@dataclass
+class PlanStep:
+    command: str
+    name: str = ""
+    args: List[str] = field(default_factory=list)
+    # None means the step's effects are unknown and it must run alone.
+    access: Optional[PathAccess] = None
+    depends_on: Set[int] = field(default_factory=set)
+    error: Optional[str] = None
+
+
+@dataclass
+class PlanResult:
+    steps: List[PlanStep]
+    responses: List[Response]
+
+    @property
+    def status(self) -> str:
+        return next((response.status for response in self.responses if response.status != "ok"), "ok")
+
+    def output(self) -> List[Tuple[str, str]]:
+        """``("out" | "err", text)`` blocks in plan order, ready for a scrollback."""
+        blocks: List[Tuple[str, str]] = []
+        for response in self.responses:
+            if response.stdout:
+                blocks.append(("out", response.stdout))
+            if response.stderr:
+                blocks.append(("err", response.stderr))
+        return blocks
+
+
+def _overlaps(first: FrozenSet[Path], second: FrozenSet[Path]) -> bool:
+    for a in first:
+        for b in second:
+            if a == b or a in b.parents or b in a.parents:
+                return True
+    return False
+
+
+def _conflicts(first: PathAccess, second: PathAccess) -> bool:
+    return (
+        _overlaps(first.writes, second.writes)
+        or _overlaps(first.writes, second.reads)
+        or _overlaps(first.reads, second.writes)
+    )
+
+
+class _PlannedContext:
+    """The session as a later step sees it: the cwd left by an earlier ``cd``."""
+
+    def __init__(self, session: SessionContext, cwd: Path):
+        self._session = session
+        self.cwd = cwd
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
+
+
+def cd_target(cwd: Path, args: List[str]) -> Optional[Path]:
+    """Directory ``cd`` with *args* moves to from *cwd*; None if it would be refused."""
+    if not args:
+        return None
+    try:
+        return paths.resolve_in_root(args[0], cwd)
+    except RootEscapeError:
+        return None
+
+
+def plan_steps(router: CommandRouter, commands: List[str]) -> List[PlanStep]:
+    """Parse *commands* and link each step to the earlier steps it must follow."""
+    steps: List[PlanStep] = []
+    # Where the steps run; None once a ``cd`` is bound to fail.
+    cwd: Optional[Path] = router.session.cwd
+    for command in commands:
+        step = PlanStep(command=command.strip())
+        try:
+            step.name, step.args = router.parse_input(step.command)
+        except ValueError as exc:
+            step.error = f"Invalid syntax in {step.command!r}: {exc}"
+        try:
+            spec = router.registry.get(step.name)
+            if cwd is not None and step.name != "cd" and spec is not None and spec.access is not None:
+                context = router.session if cwd == router.session.cwd else _PlannedContext(router.session, cwd)
+                step.access = spec.access(context, step.args)
+        except Exception:
+            # Let the handler report the problem; until then assume the worst.
+            step.access = None
+        if step.name == "cd" and step.error is None and cwd is not None:
+            cwd = cd_target(cwd, step.args)
+        steps.append(step)
+
+    # Everything after a barrier waits for it, so only steps since the last
+    # barrier need pairwise checks.
+    barrier: Optional[int] = None
+    for idx, step in enumerate(steps):
+        first = 0
+        if barrier is not None:
+            step.depends_on.add(barrier)
+            first = barrier + 1
+        for earlier in range(first, idx):
+            if step.access is None or _conflicts(steps[earlier].access, step.access):
+                step.depends_on.add(earlier)
+        if step.access is None:
+            barrier = idx
+    return steps
+
+
+def run_plan(router: CommandRouter, commands: List[str], max_workers: int = PLAN_WORKERS) -> PlanResult:
+    """
+    Run a plan, overlapping steps whose path sets do not conflict.
+
+    Steps that depend on a failed or skipped step are skipped. Output longer
+    than a page is paged as ``CommandRouter.execute`` does. Executed commands
+    are added to the session history once, in plan order.
+    """
+    steps = plan_steps(router, commands)
+    responses: Dict[int, Response] = {}
+    failed: Set[int] = set()
+    skipped: Set[int] = set()
+
+    def finish(idx: int, response: Response) -> None:
+        responses[idx] = response
+        if response.status != "ok":
+            failed.add(idx)
+
+    def blocked_by(idx: int) -> Optional[int]:
+        return next((dep for dep in sorted(steps[idx].depends_on) if dep in failed), None)
+
+    def skip(idx: int, dep: int) -> None:
+        skipped.add(idx)
+        finish(idx, Response(stderr=f"Skipped '{steps[idx].command}': step {dep + 1} failed.", status="error"))
+
+    pending = set(range(len(steps)))
+    if max_workers <= 1 or all(step.depends_on for step in steps[1:]):
+        # Nothing can overlap; run inline without a pool.
+        for idx in range(len(steps)):
+            dep = blocked_by(idx)
+            if dep is None:
+                finish(idx, _run_step(router, steps[idx]))
+            else:
+                skip(idx, dep)
+    else:
+        running: Dict[Future, int] = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nl-plan") as pool:
+            while pending or running:
+                for idx in sorted(pending):
+                    if not steps[idx].depends_on <= responses.keys():
+                        continue
+                    pending.discard(idx)
+                    dep = blocked_by(idx)
+                    if dep is None:
+                        running[pool.submit(_run_step, router, steps[idx])] = idx
+                    else:
+                        skip(idx, dep)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result())
+
+    router.session.extend_history(
+        [step.command for idx, step in enumerate(steps) if step.name and idx not in skipped]
+    )
+    return PlanResult(steps=steps, responses=[responses[idx] for idx in range(len(steps))])
+
+
+def _run_step(router: CommandRouter, step: PlanStep) -> Response:
+    if step.error is not None:
+        return Response(stderr=step.error, status="error")
+    if not step.name:
+        return Response()
+    try:
+        return router.paginate(router.dispatch(step.name, step.args))
+    except Exception as exc:  # dispatch maps handler errors; this is a last resort
+        return Response(stderr=f"Error executing command '{step.command}': {exc}", status="error")
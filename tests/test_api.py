@@ -0,0 +1,107 @@
+import pytest
+
+from core.pool import RouterPool, SessionNotFoundError
+
+
+@pytest.fixture
+def client(workspace, monkeypatch):
+    import api.index as api_index
+
+    monkeypatch.setattr(api_index, "pool", RouterPool())
+    api_index.app.config["TESTING"] = True
+    return api_index.app.test_client()
+
+
+def create_session(client) -> str:
+    response = client.post("/api/sessions")
+    assert response.status_code == 201
+    return response.get_json()["session_id"]
+
+
+def test_execute_and_history(client, workspace):
+    session_id = create_session(client)
+
+    response = client.post(f"/api/sessions/{session_id}/execute", json={"command": "mkdir data"})
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ok"
+
+    response = client.post(f"/api/sessions/{session_id}/execute", json={"command": "cd data"})
+    assert response.get_json()["cwd"] == str(workspace / "data")
+
+    response = client.post(f"/api/sessions/{session_id}/execute", json={"command": "pwd"})
+    assert response.get_json()["stdout"] == str(workspace / "data")
+
+    response = client.get(f"/api/sessions/{session_id}/history")
+    assert response.get_json()["history"] == ["mkdir data", "cd data", "pwd"]
+
+
+def test_sessions_are_isolated(client, workspace):
+    first = create_session(client)
+    second = create_session(client)
+    (workspace / "sub").mkdir()
+
+    client.post(f"/api/sessions/{first}/execute", json={"command": "cd sub"})
+    response = client.post(f"/api/sessions/{second}/execute", json={"command": "pwd"})
+    assert response.get_json()["stdout"] == str(workspace)
+
+
+def test_batch_stops_on_error(client):
+    session_id = create_session(client)
+    response = client.post(
+        f"/api/sessions/{session_id}/batch",
+        json={"commands": ["mkdir a", "cat missing.txt", "mkdir b"]},
+    )
+    payload = response.get_json()
+    assert payload["status"] == "error"
+    assert payload["results"] == [
+        {"i": 0, "status": "ok"},
+        {"i": 1, "status": "error", "stderr": "File not found: missing.txt"},
+    ]
+    assert set(payload["timing"]) >= {"parse_ms", "exec_ms", "history_ms", "total_ms"}
+
+
+def test_batch_rejects_unparseable_command(client, workspace):
+    session_id = create_session(client)
+    response = client.post(
+        f"/api/sessions/{session_id}/batch",
+        json={"commands": ["mkdir a", 'cat "unterminated']},
+    )
+    assert response.status_code == 400
+    assert not (workspace / "a").exists()
+
+
+def test_execute_rejects_unbalanced_quotes(client):
+    session_id = create_session(client)
+    response = client.post(f"/api/sessions/{session_id}/execute", json={"command": 'ls "abc'})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid syntax in 'ls \"abc': No closing quotation"
+    history = client.get(f"/api/sessions/{session_id}/history").get_json()["history"]
+    assert history == []
+
+
+def test_unknown_session_and_bad_payload(client):
+    response = client.post("/api/sessions/nope/execute", json={"command": "pwd"})
+    assert response.status_code == 404
+
+    session_id = create_session(client)
+    response = client.post(f"/api/sessions/{session_id}/execute", json={"command": 42})
+    assert response.status_code == 400
+
+
+def test_pool_evicts_idle_and_lru_sessions(workspace):
+    now = [0.0]
+    pool = RouterPool(max_sessions=2, idle_timeout=10.0, clock=lambda: now[0])
+
+    first = pool.create().session.session_id
+    second = pool.create().session.session_id
+    third = pool.create().session.session_id
+    assert pool.session_ids() == [second, third]
+    with pytest.raises(SessionNotFoundError):
+        pool.get(first)
+
+    now[0] = 5.0
+    pool.get(third)
+    now[0] = 12.0
+    assert pool.evict_idle() == 1
+    assert pool.session_ids() == [third]
+    assert pool.get(third).router.registry is pool.registry
@@ -0,0 +1,45 @@
+"""Load test for the session API using the Flask test client."""
+
+import time
+
+import pytest
+
+from core.pool import RouterPool
+
+SESSIONS = 200
+COMMANDS_PER_SESSION = 5
+
+
+@pytest.fixture
+def client(workspace, monkeypatch):
+    import api.index as api_index
+
+    monkeypatch.setattr(api_index, "pool", RouterPool(max_sessions=SESSIONS))
+    api_index.app.config["TESTING"] = True
+    return api_index.app.test_client()
+
+
+def test_many_sessions_throughput(client, workspace):
+    session_ids = [client.post("/api/sessions").get_json()["session_id"] for _ in range(SESSIONS)]
+    (workspace / "shared").mkdir()
+
+    latencies = []
+    start = time.perf_counter()
+    for round_idx in range(COMMANDS_PER_SESSION):
+        command = ["pwd", "ls", "cd shared", "pwd", "cd .."][round_idx]
+        for session_id in session_ids:
+            t0 = time.perf_counter()
+            response = client.post(f"/api/sessions/{session_id}/execute", json={"command": command})
+            latencies.append(time.perf_counter() - t0)
+            assert response.status_code == 200
+            assert response.get_json()["status"] == "ok"
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99_ms = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    rps = len(latencies) / elapsed
+    print(f"\n{len(latencies)} requests over {SESSIONS} sessions: {rps:.0f} req/s, p99 {p99_ms:.2f}ms")
+
+    import api.index as api_index
+
+    assert len(api_index.pool) == SESSIONS
@@ -0,0 +1,127 @@
+import gzip
+import io
+import os
+import subprocess
+import tarfile
+import zipfile
+
+import pytest
+
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from fs import archive, paths
+
+
+@pytest.fixture
+def router(workspace):
+    (workspace / "project" / "src").mkdir(parents=True)
+    (workspace / "project" / "README").write_text("hello\n")
+    (workspace / "project" / "src" / "data.bin").write_bytes(os.urandom(300_000))
+    (workspace / "project" / "src" / "text.txt").write_text("line\n" * 50_000)
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths.WORKSPACE_ROOT))
+
+
+def _tree(root):
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes() if path.is_file() else None
+        for path in sorted(root.rglob("*"))
+    }
+
+
+def test_parallel_gzip_writes_multiple_members():
+    raw = io.BytesIO()
+    writer = archive.ParallelGzipWriter(raw, workers=4, block_size=1000)
+    data = os.urandom(2500) + b"x" * 7000
+    for start in range(0, len(data), 333):
+        writer.write(data[start:start + 333])
+    writer.close()
+    assert gzip.decompress(raw.getvalue()) == data
+    assert raw.getvalue().count(b"\x1f\x8b\x08") >= 10
+    assert writer.bytes_in == len(data) and writer.bytes_out == len(raw.getvalue())
+
+
+@pytest.mark.parametrize("name", ["out.tar.gz", "out.tgz", "out.tar", "out.zip"])
+def test_round_trip(router, workspace, monkeypatch, name):
+    monkeypatch.setattr(archive, "BLOCK_BYTES", 64 * 1024)
+    response = router.execute(f"archive {name} project")
+    assert response.status == "ok", response.stderr
+    assert response.stdout.startswith("Archived 3 files, ")
+    assert response.meta_value("files") == 3
+    assert response.meta_value("bytes") == 300_000 + 250_000 + 6
+    assert response.meta_value("archive_bytes") == (workspace / name).stat().st_size
+    assert response.meta_value("mb_per_s") > 0
+    assert not [entry for entry in os.listdir(workspace) if entry.startswith(".out")]
+
+    extracted = router.execute(f"extract {name} restored")
+    assert extracted.status == "ok", extracted.stderr
+    assert extracted.meta_value("files") == 3
+    assert _tree(workspace / "restored" / "project") == _tree(workspace / "project")
+
+
+def test_tar_gz_is_readable_by_system_tar(router, workspace, monkeypatch):
+    monkeypatch.setattr(archive, "BLOCK_BYTES", 64 * 1024)
+    router.execute("archive out.tar.gz project")
+    listing = subprocess.run(["tar", "tzf", "out.tar.gz"], cwd=workspace, capture_output=True, text=True, check=True)
+    assert sorted(listing.stdout.split()) == [
+        "project/", "project/README", "project/src/", "project/src/data.bin", "project/src/text.txt"
+    ]
+
+
+def test_archive_cwd_skips_its_own_output(router, workspace):
+    router.session.cwd = workspace / "project"
+    response = router.execute("archive self.zip .")
+    assert response.status == "ok", response.stderr
+    with zipfile.ZipFile(workspace / "project" / "self.zip") as bundle:
+        assert sorted(bundle.namelist()) == ["README", "src/", "src/data.bin", "src/text.txt"]
+
+
+def test_hard_links_survive_tar(router, workspace):
+    os.link(workspace / "project" / "src" / "data.bin", workspace / "project" / "copy.bin")
+    router.execute("archive out.tar project")
+    router.execute("extract out.tar restored")
+    restored = workspace / "restored" / "project"
+    assert os.path.samefile(restored / "copy.bin", restored / "src" / "data.bin")
+
+
+def _malicious_tar(path, name, data=b"pwned"):
+    with tarfile.open(path, "w") as bundle:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        bundle.addfile(info, io.BytesIO(data))
+
+
+@pytest.mark.parametrize("name", ["../escape.txt", "/etc/evil", "a/../../escape.txt"])
+def test_extract_refuses_traversal(router, workspace, name):
+    _malicious_tar(workspace / "bad.tar", name)
+    response = router.execute("extract bad.tar dest")
+    assert response.status == "error"
+    assert "Unsafe path in archive" in response.stderr
+    assert not (workspace / "escape.txt").exists()
+
+
+def test_extract_zip_checks_every_name_first(router, workspace):
+    with zipfile.ZipFile(workspace / "bad.zip", "w") as bundle:
+        bundle.writestr("fine.txt", "ok")
+        bundle.writestr("../../outside.txt", "no")
+    response = router.execute("extract bad.zip dest")
+    assert "Unsafe path in archive" in response.stderr
+    assert not (workspace / "dest" / "fine.txt").exists()
+
+
+def test_extract_skips_symlinks(router, workspace):
+    with tarfile.open(workspace / "links.tar", "w") as bundle:
+        info = tarfile.TarInfo("link")
+        info.type = tarfile.SYMTYPE
+        info.linkname = "/etc/passwd"
+        bundle.addfile(info)
+    response = router.execute("extract links.tar dest")
+    assert response.status == "ok", response.stderr
+    assert response.meta_value("skipped") == 1
+    assert not os.path.lexists(workspace / "dest" / "link")
+
+
+def test_rejects_unknown_formats(router, workspace):
+    assert "Unsupported archive type" in router.execute("archive out.rar project").stderr
+    (workspace / "plain.txt").write_text("not an archive")
+    assert "Not a tar, tar.gz or zip archive" in router.execute("extract plain.txt").stderr
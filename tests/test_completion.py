@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from core.registry import create_default_registry
+from ui.completion import CommandTrie, CompletionEngine, fuzzy_score
+
+
+@pytest.fixture
+def engine(workspace):
+    return CompletionEngine(create_default_registry())
+
+
+def test_trie_prefix_completion():
+    trie = CommandTrie(["cat", "cd", "cp", "cpu", "ls"])
+    assert trie.complete("c") == ["cat", "cd", "cp", "cpu"]
+    assert trie.complete("cp") == ["cp", "cpu"]
+    assert trie.complete("x") == []
+
+
+def test_command_suggestions_rank_prefix_first(engine):
+    assert engine.suggest("c", cwd=None) == ["cd", "cp", "cat", "cpu", "wc"]
+    assert engine.suggest("", cwd=None) == create_default_registry().list_commands()
+
+
+def test_path_completion_prefix_and_dirs(engine, workspace):
+    (workspace / "docs").mkdir()
+    (workspace / "data.txt").write_text("")
+    (workspace / "notes.md").write_text("")
+    (workspace / ".hidden").write_text("")
+
+    # Prefix matches come first, shorter names first; fuzzy matches fill the rest.
+    assert engine.suggest("cat d", workspace) == ["docs/", "data.txt", "notes.md"]
+    assert engine.suggest("ls ", workspace) == ["data.txt", "docs/", "notes.md"]
+    assert engine.suggest("ls .h", workspace) == [".hidden"]
+    (workspace / "docs" / "guide.md").write_text("")
+    assert engine.suggest("cat docs/g", workspace) == ["docs/guide.md"]
+
+
+def test_fuzzy_matches_subsequences(engine, workspace):
+    (workspace / "quarterly_report.txt").write_text("")
+    (workspace / "readme.md").write_text("")
+
+    assert engine.suggest("cat qrep", workspace) == ["quarterly_report.txt"]
+    assert fuzzy_score("rdm", "readme.md") is not None
+    assert fuzzy_score("xyz", "readme.md") is None
+
+
+def test_recent_use_breaks_ties(engine, workspace):
+    for name in ("alpha.txt", "apple.txt"):
+        (workspace / name).write_text("")
+    assert engine.suggest("cat a", workspace)[0] == "alpha.txt"
+
+    engine.record_use("apple.txt")
+    assert engine.suggest("cat a", workspace)[0] == "apple.txt"
+
+
+def test_completion_stays_inside_jail(engine, workspace):
+    assert engine.suggest("ls ../", workspace) == []
+    assert engine.suggest("ls /etc/", workspace) == []
+
+
+def test_listing_cache_refreshes_on_mtime_change(engine, workspace):
+    (workspace / "one.txt").write_text("")
+    assert engine.suggest("cat o", workspace) == ["one.txt"]
+    assert engine.listings.misses == 1
+
+    engine.suggest("cat o", workspace)
+    assert engine.listings.hits == 1
+
+    (workspace / "other.txt").write_text("")
+    stat = os.stat(workspace)
+    os.utime(workspace, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert engine.suggest("cat o", workspace) == ["one.txt", "other.txt"]
+    assert engine.listings.misses == 2
+
+
+def test_rendered_suggestions_follow_recorded_history(workspace, tmp_path, monkeypatch):
+    from core.history import HistoryStore
+    from ui import autocomplete
+
+    registry = create_default_registry()
+    for name in ("alpha.txt", "apple.txt"):
+        (workspace / name).write_text("")
+    buttons = []
+
+    class FakeStreamlit:
+        def write(self, *args):
+            pass
+
+        def button(self, label, key=None):
+            buttons.append(label)
+            return False
+
+    monkeypatch.setattr(autocomplete, "st", FakeStreamlit())
+    history = HistoryStore("dana", directory=tmp_path)
+    autocomplete.render_autocomplete_suggestions("cat a", registry, workspace, history=history)
+    assert buttons[0] == "alpha.txt"
+
+    history.extend(["cat apple.txt", "cat apple.txt"])
+    buttons.clear()
+    autocomplete.render_autocomplete_suggestions("cat a", registry, workspace, history=history)
+    assert buttons[0] == "apple.txt"
+    history.close()
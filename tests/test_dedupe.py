@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from fs import dedupe, hashing, paths
+from monitor import stats as monitor_stats
+
+
+@pytest.fixture
+def router(workspace, tmp_path_factory, monkeypatch):
+    monkeypatch.setattr(hashing, "_cache", hashing.HashCache(tmp_path_factory.mktemp("cache") / "hashes.db"))
+    big = os.urandom(3 * dedupe.EDGE_BYTES)
+    (workspace / "src").mkdir()
+    (workspace / "src" / "big.bin").write_bytes(big)
+    (workspace / "src" / "small.txt").write_text("same\n")
+    (workspace / "copy" / "nested").mkdir(parents=True)
+    (workspace / "copy" / "big.bin").write_bytes(big)
+    (workspace / "copy" / "nested" / "small.txt").write_text("same\n")
+    # Same size and edges as big.bin, different middle.
+    middle = bytearray(big)
+    middle[len(big) // 2] ^= 0xFF
+    (workspace / "copy" / "tweaked.bin").write_bytes(bytes(middle))
+    (workspace / "unique.txt").write_text("only one of these\n")
+    (workspace / "empty1").touch()
+    (workspace / "empty2").touch()
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths.WORKSPACE_ROOT))
+
+
+def test_reports_duplicate_groups(router):
+    response = router.execute("dedupe")
+    assert response.status == "ok", response.stderr
+    lines = response.stdout.splitlines()
+    assert lines[0].startswith("2 copies of 192.00 KB (sha256 ")
+    assert lines[1:3] == ["  copy/big.bin", "  src/big.bin"]
+    assert lines[3].startswith("2 copies of 5 B (sha256 ")
+    assert lines[4:6] == ["  copy/nested/small.txt", "  src/small.txt"]
+    assert lines[6] == "2 duplicate groups, 192.00 KB reclaimable"
+    assert response.meta_value("duplicate_bytes") == 3 * dedupe.EDGE_BYTES + 5
+
+
+def test_groups_are_labelled_with_their_sha256(router, workspace):
+    import hashlib
+
+    (workspace / "hello1").write_text("hello\n")
+    (workspace / "hello2").write_text("hello\n")
+    response = router.execute("dedupe")
+    digests = {
+        hashlib.sha256(b"hello\n").hexdigest()[:12],
+        hashlib.sha256(b"same\n").hexdigest()[:12],
+        hashlib.sha256((workspace / "src" / "big.bin").read_bytes()).hexdigest()[:12],
+    }
+    labels = {line.split("sha256 ")[1].rstrip("):") for line in response.stdout.splitlines() if "sha256" in line}
+    assert labels == digests
+    assert "5891b5b522d5" in labels
+
+
+def test_stages_skip_files_that_cannot_match(router):
+    response = router.execute("dedupe")
+    # unique.txt and the empty files never get hashed; only the three large
+    # files with matching edges are read in full.
+    assert response.meta_value("scanned") == 8
+    assert response.meta_value("edge_hashed") == 5
+    assert response.meta_value("full_hashed") == 3
+
+
+def test_subdirectory_and_hardlinked_copies(router, workspace):
+    assert router.execute("dedupe copy").stdout == "No duplicate files found."
+    os.link(workspace / "src" / "small.txt", workspace / "src" / "linked.txt")
+    response = router.execute("dedupe src")
+    assert response.stdout == "No duplicate files found."
+
+
+def test_hardlink_replaces_duplicates(router, workspace):
+    before = monitor_stats.reclaimed_bytes()
+    response = router.execute("dedupe --hardlink")
+    assert response.status == "ok", response.stderr
+    assert response.stdout.endswith("; 192.00 KB reclaimed with hard links")
+    assert response.meta_value("linked") == 2
+    assert response.meta_value("reclaimed_bytes") == 3 * dedupe.EDGE_BYTES + 5
+    assert monitor_stats.reclaimed_bytes() - before == 3 * dedupe.EDGE_BYTES + 5
+    assert os.path.samefile(workspace / "src" / "big.bin", workspace / "copy" / "big.bin")
+    assert os.path.samefile(workspace / "src" / "small.txt", workspace / "copy" / "nested" / "small.txt")
+    assert not os.path.samefile(workspace / "src" / "big.bin", workspace / "copy" / "tweaked.bin")
+    assert not [name for name in os.listdir(workspace / "copy") if name.endswith(".link")]
+
+    again = router.execute("dedupe --hardlink")
+    assert again.stdout == "No duplicate files found."
+
+
+def test_hardlink_skips_files_changed_since_scan(workspace):
+    (workspace / "a").write_text("data")
+    (workspace / "b").write_text("data")
+    files = dedupe.scan(workspace, ".", 2)
+    (group,) = dedupe.find_duplicates(files, 2)
+    (workspace / "b").write_text("DATA")
+    os.utime(workspace / "b", ns=(1, 1))
+    assert dedupe.hardlink(group.files[0], group.files[1]) is None
+    assert (workspace / "b").read_text() == "DATA"
+
+
+def test_disk_shows_reclaimed_bytes(monkeypatch):
+    monkeypatch.setattr(monitor_stats, "_reclaimed", 0)
+    assert "Reclaimed" not in monitor_stats.disk()
+    monitor_stats.record_reclaimed(2048)
+    assert monitor_stats.disk().endswith("|  Reclaimed: 2.00 KB")
+
+
+def test_rejects_unknown_options(router):
+    assert "Unknown option" in router.execute("dedupe --fast").stderr
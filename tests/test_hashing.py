@@ -0,0 +1,95 @@
+import hashlib
+import os
+import subprocess
+
+import pytest
+
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from fs import hashing, paths
+
+
+@pytest.fixture
+def cache(tmp_path_factory, monkeypatch):
+    cache = hashing.HashCache(tmp_path_factory.mktemp("cache") / "hashes.db")
+    monkeypatch.setattr(hashing, "_cache", cache)
+    # Let freshly written test files be cached.
+    monkeypatch.setattr(hashing, "RACY_SECONDS", -60.0)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def router(workspace, cache):
+    (workspace / "a.txt").write_text("alpha\n")
+    (workspace / "tree" / "sub").mkdir(parents=True)
+    (workspace / "tree" / "b.bin").write_bytes(os.urandom(3 * hashing.CHUNK_SIZE + 17))
+    (workspace / "tree" / "sub" / "c.txt").write_text("gamma\n")
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths.WORKSPACE_ROOT))
+
+
+def test_sha256sum_matches_coreutils(router, workspace):
+    response = router.execute("sha256sum a.txt tree")
+    assert response.status == "ok", response.stderr
+    expected = subprocess.run(
+        ["sha256sum", "a.txt", "tree/b.bin", "tree/sub/c.txt"], cwd=workspace, capture_output=True, text=True
+    ).stdout.rstrip("\n")
+    assert response.stdout == expected
+
+
+def test_other_algorithms_and_json(router, workspace):
+    response = router.execute("hashsum --algo md5 --json a.txt")
+    assert response.records.as_dicts() == [{"digest": hashlib.md5(b"alpha\n").hexdigest(), "name": "a.txt"}]
+    assert "Unknown hash algorithm" in router.execute("hashsum --algo nope a.txt").stderr
+    assert "Variable-length" in router.execute("hashsum --algo shake_128 a.txt").stderr
+
+
+def test_unchanged_files_come_from_cache(router, workspace, monkeypatch):
+    files = [workspace / "a.txt", workspace / "tree" / "b.bin"]
+    first, cached = hashing.hash_files(files, "sha256", hashing.get_hash_cache())
+    assert cached == 0
+
+    calls = []
+    real = hashing.hash_file
+    monkeypatch.setattr(hashing, "hash_file", lambda path, algo: calls.append(path) or real(path, algo))
+    second, cached = hashing.hash_files(files, "sha256", hashing.get_hash_cache())
+    assert (second, cached, calls) == (first, 2, [])
+
+    (workspace / "a.txt").write_text("changed\n")
+    third, cached = hashing.hash_files(files, "sha256", hashing.get_hash_cache())
+    assert cached == 1 and calls == [workspace / "a.txt"]
+    assert third[0] == hashlib.sha256(b"changed\n").hexdigest()
+
+
+def test_recent_files_are_not_cached(router, workspace, monkeypatch):
+    monkeypatch.setattr(hashing, "RACY_SECONDS", 3600.0)
+    hashing.hash_files([workspace / "a.txt"], "sha256", hashing.get_hash_cache())
+    _, cached = hashing.hash_files([workspace / "a.txt"], "sha256", hashing.get_hash_cache())
+    assert cached == 0
+
+
+def test_check_manifest(router, workspace):
+    (workspace / "SUMS").write_text(router.execute("sha256sum a.txt tree").stdout + "\n")
+    response = router.execute("sha256sum --check SUMS")
+    assert response.status == "ok"
+    assert response.stdout.splitlines() == ["a.txt: OK", "tree/b.bin: OK", "tree/sub/c.txt: OK"]
+
+    (workspace / "tree" / "sub" / "c.txt").write_text("tampered\n")
+    (workspace / "a.txt").unlink()
+    with (workspace / "SUMS").open("a") as handle:
+        handle.write(f"{'0' * 64}  ../../etc/passwd\n")
+    response = router.execute("sha256sum --check SUMS")
+    assert response.status == "error"
+    assert response.stdout.splitlines() == [
+        "a.txt: FAILED open or read",
+        "tree/b.bin: OK",
+        "tree/sub/c.txt: FAILED",
+        "../../etc/passwd: FAILED open or read",
+    ]
+    assert "3 of 4 computed checksums did NOT match" in response.stderr
+
+
+def test_malformed_manifest(router, workspace):
+    (workspace / "BAD").write_text("not a checksum line\n")
+    assert "improperly formatted" in router.execute("sha256sum --check BAD").stderr
@@ -0,0 +1,86 @@
+import time
+
+from core.history import HistoryStore, frecency_weight
+from core.registry import CommandRegistry
+from core.router import CommandRouter
+from core.session import HISTORY_LIMIT, SessionContext
+
+
+def test_store_persists_and_reloads(tmp_path):
+    store = HistoryStore("alice", directory=tmp_path)
+    store.extend(["ls", "cd docs", "cat notes.txt"])
+    store.close()
+
+    reopened = HistoryStore("alice", directory=tmp_path)
+    assert len(reopened) == 3
+    assert reopened.recent() == ["ls", "cd docs", "cat notes.txt"]
+    assert reopened.get(1)[2] == "cd docs"
+    assert (tmp_path / "alice.idx").stat().st_size == 3 * 8
+
+
+def test_index_rebuilt_after_torn_write(tmp_path):
+    store = HistoryStore("bob", directory=tmp_path)
+    store.extend(["one", "two"])
+    store.close()
+    with open(tmp_path / "bob.log", "ab") as handle:
+        handle.write(b'[1.0, "three"]\n')
+
+    reopened = HistoryStore("bob", directory=tmp_path)
+    assert reopened.recent() == ["one", "two", "three"]
+
+
+def test_search_newest_first_and_deduplicated(tmp_path):
+    store = HistoryStore("carol", directory=tmp_path)
+    store.extend(["cat report.txt", "ls", "cp report.txt backup/", "cat report.txt", "mkdir reports"])
+
+    matches = [command for _, _, command in store.search("report")]
+    assert matches == ["mkdir reports", "cat report.txt", "cp report.txt backup/"]
+    assert [command for _, _, command in store.search("ls")] == ["ls"]
+    assert store.search("nothing here") == []
+
+    store.append("touch REPORT.md")
+    assert store.search("report", limit=1)[0][2] == "touch REPORT.md"
+
+
+def test_stores_share_log_across_instances(tmp_path):
+    first = HistoryStore("dave", directory=tmp_path)
+    second = HistoryStore("dave", directory=tmp_path)
+    first.append("pwd")
+    second.append("ls")
+
+    assert first.recent() == ["pwd", "ls"]
+    assert [command for _, _, command in first.search("ls")] == ["ls"]
+
+
+def test_frecency_prefers_recent_and_frequent(tmp_path):
+    store = HistoryStore("erin", directory=tmp_path)
+    now = time.time()
+    store.append("cat old.txt", timestamp=now - 30 * 86400)
+    store.extend(["cat new.txt", "cat new.txt"], timestamp=now - 60)
+
+    scores = store.frecency_scores(now=now)
+    assert scores["cat"] == frecency_weight(30 * 86400) + 2 * frecency_weight(60)
+    assert scores["new.txt"] > scores["old.txt"]
+
+
+def test_session_uses_ring_buffer_and_store(tmp_path):
+    store = HistoryStore("frank", directory=tmp_path)
+    store.append("earlier")
+    session = SessionContext(cwd=tmp_path, history_store=store)
+    assert list(session.history) == ["earlier"]
+
+    for idx in range(HISTORY_LIMIT + 5):
+        session.add_to_history(f"echo {idx}")
+    assert len(session.history) == HISTORY_LIMIT
+    assert len(store) == HISTORY_LIMIT + 6
+
+
+def test_history_search_command(tmp_path):
+    session = SessionContext(cwd=tmp_path, history_store=HistoryStore("gina", directory=tmp_path))
+    router = CommandRouter(CommandRegistry(), session)
+    for command in ["mkdir logs", "cd logs", "ls"]:
+        session.add_to_history(command)
+
+    assert router.execute("history search log").stdout == "cd logs\nmkdir logs"
+    assert router.execute("history search zzz").stdout == "No matching commands."
+    assert router.execute("history search").stderr == "Usage: history search <text>"
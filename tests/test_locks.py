@@ -0,0 +1,126 @@
+import threading
+import time
+from pathlib import Path
+
+from core.locks import LockTimeoutError, PathLockManager
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from fs import ops as fs_ops
+
+ROOT = Path("/ws")
+
+
+def _try(manager, reads=(), writes=()):
+    try:
+        return manager.acquire(reads, writes, timeout=0.01)
+    except LockTimeoutError:
+        return None
+
+
+def test_shared_locks_coexist_and_exclusive_covers_subtrees():
+    manager = PathLockManager()
+    first = manager.acquire(reads=[ROOT / "docs"])
+    second = manager.acquire(reads=[ROOT / "docs"])
+    assert manager.held() == 2
+
+    assert _try(manager, writes=[ROOT / "docs/plan.md"]) is None
+    assert _try(manager, writes=[ROOT]) is None
+    disjoint = _try(manager, writes=[ROOT / "src"])
+    assert disjoint is not None
+
+    manager.release(first)
+    manager.release(second)
+    manager.release(disjoint)
+    assert manager.held() == 0
+
+
+def test_acquisition_is_all_or_nothing():
+    manager = PathLockManager()
+    busy = manager.acquire(writes=[ROOT / "b"])
+    assert _try(manager, reads=[ROOT / "a"], writes=[ROOT / "b/c"]) is None
+    assert manager.held() == 1
+    # The free path was not left locked by the failed request.
+    manager.release(manager.acquire(writes=[ROOT / "a"], timeout=0.01))
+    manager.release(busy)
+
+
+def test_waiting_writer_is_not_starved_by_new_readers():
+    manager = PathLockManager()
+    reader = manager.acquire(reads=[ROOT / "docs"])
+    order = []
+
+    def write():
+        with manager.hold(writes=[ROOT / "docs"]):
+            order.append("writer")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not manager._waiting:
+        time.sleep(0.001)
+    # A later reader queues behind the writer instead of overtaking it.
+    assert _try(manager, reads=[ROOT / "docs/a"]) is None
+
+    def read():
+        with manager.hold(reads=[ROOT / "docs"]):
+            order.append("reader")
+
+    late = threading.Thread(target=read)
+    late.start()
+    manager.release(reader)
+    writer.join()
+    late.join()
+    assert order == ["writer", "reader"]
+    assert manager.held() == 0
+
+
+def test_waiters_do_not_block_unrelated_paths():
+    manager = PathLockManager()
+    holder = manager.acquire(writes=[ROOT / "a"])
+    waiter = threading.Thread(target=lambda: manager.release(manager.acquire(writes=[ROOT / "a"], timeout=5)))
+    waiter.start()
+    while not manager._waiting:
+        time.sleep(0.001)
+
+    started = time.perf_counter()
+    unrelated = manager.acquire(reads=[ROOT / "b"], timeout=1)
+    assert time.perf_counter() - started < 0.5
+    manager.release(unrelated)
+
+    manager.release(holder)
+    waiter.join()
+    assert manager.held() == 0
+
+
+def test_router_blocks_only_conflicting_commands(workspace):
+    (workspace / "busy").mkdir()
+    (workspace / "free").mkdir()
+    entered = threading.Event()
+    finish = threading.Event()
+
+    def slow_write(ctx, args):
+        entered.set()
+        finish.wait(5)
+        return "done"
+
+    registry = create_default_registry()
+    registry.register("slowwrite", slow_write, "slowwrite <path>", "Test helper.", fs_ops.write_access)
+    writer = CommandRouter(registry, SessionContext(cwd=workspace))
+    reader = CommandRouter(registry, SessionContext(cwd=workspace))
+
+    thread = threading.Thread(target=writer.execute, args=("slowwrite busy",))
+    thread.start()
+    assert entered.wait(5)
+
+    assert reader.execute("ls free").status == "ok"
+
+    results = []
+    blocked = threading.Thread(target=lambda: results.append(reader.execute("ls busy")))
+    blocked.start()
+    blocked.join(0.1)
+    assert not results
+
+    finish.set()
+    thread.join()
+    blocked.join(5)
+    assert results and results[0].status == "ok"
@@ -0,0 +1,131 @@
+import pytest
+
+from core.session import SessionContext
+from fs.name_index import AmbiguousPathError, NameIndex, UnresolvedPathError, get_name_index
+from nl.parser import NLParser
+
+
+@pytest.fixture
+def tree(workspace):
+    (workspace / "docs").mkdir()
+    (workspace / "docs" / "README.md").write_text("hi")
+    (workspace / "archive").mkdir()
+    (workspace / "quarterly_report.txt").write_text("")
+    return workspace
+
+
+def test_lookup_exact_stem_and_typo(tree):
+    index = NameIndex(tree)
+    index.build()
+    assert len(index) == 4
+    assert index.resolve("readme") == tree / "docs" / "README.md"
+    assert index.resolve("quartrly_report") == tree / "quarterly_report.txt"
+    assert index.resolve("archve", directories_only=True) == tree / "archive"
+    assert index.resolve("nothing-like-it") is None
+
+
+def test_ambiguous_names_are_surfaced(tree):
+    (tree / "archive" / "README.txt").write_text("")
+    index = NameIndex(tree)
+    index.build()
+    with pytest.raises(AmbiguousPathError) as info:
+        index.resolve("readme", cwd=tree)
+    assert sorted(info.value.candidates) == ["archive/README.txt", "docs/README.md"]
+    # An entry directly in the working directory wins the tie.
+    assert index.resolve("readme", cwd=tree / "docs") == tree / "docs" / "README.md"
+
+
+def test_fs_handlers_update_built_index(tree):
+    import fs.ops as ops
+
+    index = get_name_index(tree)
+    ctx = SessionContext(cwd=tree)
+    ops.mkdir_handler(ctx, ["reports/2024"])
+    ops.touch_handler(ctx, ["reports/2024/summary.csv"])
+    assert index.resolve("summary") == tree / "reports" / "2024" / "summary.csv"
+
+    ops.mv_handler(ctx, ["reports", "archive"])
+    assert index.resolve("summary") == tree / "archive" / "reports" / "2024" / "summary.csv"
+
+    ops.rm_handler(ctx, ["archive/reports", "-r"])
+    assert index.lookup("summary") == []
+
+
+def test_nl_slots_resolve_to_real_paths(tree):
+    parser = NLParser()
+    assert parser.parse("show the readme", cwd=tree) == ["cat docs/README.md"]
+    assert parser.parse("move quarterly_report.txt into archve", cwd=tree) == ["mv quarterly_report.txt archive/"]
+    # Without a cwd the slots are passed through untouched.
+    assert parser.parse("show the readme") == ["cat readme"]
+
+
+@pytest.fixture
+def router(tree):
+    from core.registry import create_default_registry
+    from core.router import CommandRouter
+
+    (tree / "templates").mkdir()
+    (tree / "report_final.csv").write_text("keep me")
+    return CommandRouter(create_default_registry(), SessionContext(cwd=tree))
+
+
+@pytest.mark.parametrize(
+    "text, suggestion",
+    [
+        ("remove the folder template", "templates"),
+        ("remove the directory temp", "templates"),
+        ("delete report", "report_final.csv"),
+        ("delete reprt.csv", "report_final.csv"),
+        ("move report_fnal.csv into archive", "report_final.csv"),
+    ],
+)
+def test_near_miss_destructive_commands_run_nothing(tree, router, text, suggestion):
+    from nl.parser import parse_and_execute
+
+    with pytest.raises(UnresolvedPathError) as info:
+        NLParser().parse(text, cwd=tree)
+    assert info.value.suggestion == suggestion
+
+    status, stdout, stderr = parse_and_execute(text, router, str(tree), [], [])
+    assert status == "error"
+    assert stderr == f"No such file: {info.value.query} — did you mean {suggestion}?"
+    assert (tree / "templates").is_dir()
+    assert (tree / "report_final.csv").read_text() == "keep me"
+    assert not (tree / "archive" / "report_final.csv").exists()
+
+
+def test_destructive_commands_accept_only_exact_names(tree, router):
+    parser = NLParser()
+    assert parser.parse("remove the folder templates", cwd=tree) == ["rm templates -r"]
+    assert parser.parse("delete report_final.csv", cwd=tree) == ["rm report_final.csv"]
+    assert parser.parse("delete docs/README.md", cwd=tree) == ["rm docs/README.md"]
+    for text in ("delete report_final", "delete Report_final.csv", "delete the readme"):
+        with pytest.raises(UnresolvedPathError):
+            parser.parse(text, cwd=tree)
+    # Reads still resolve loosely.
+    assert parser.parse("show reprt_final", cwd=tree) == ["cat report_final.csv"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["delete notes", "delete the file readme", "move logs to here"],
+)
+def test_destructive_targets_are_not_searched_outside_cwd(workspace, text):
+    from core.registry import create_default_registry
+    from core.router import CommandRouter
+    from nl.parser import parse_and_execute
+
+    (workspace / "here").mkdir()
+    (workspace / "projects" / "old" / "logs").mkdir(parents=True)
+    (workspace / "projects" / "old" / "logs" / "notes.bak").write_text("keep")
+    (workspace / "README.md").write_text("keep")
+    cwd = workspace / "here"
+    before = sorted(path.relative_to(workspace) for path in workspace.rglob("*"))
+
+    with pytest.raises(UnresolvedPathError):
+        NLParser().parse(text, cwd=cwd)
+    router = CommandRouter(create_default_registry(), SessionContext(cwd=cwd))
+    status, _, stderr = parse_and_execute(text, router, str(cwd), [], [])
+    assert status == "error"
+    assert stderr.startswith("No such file: ")
+    assert sorted(path.relative_to(workspace) for path in workspace.rglob("*")) == before
@@ -0,0 +1,125 @@
+import os
+import shutil
+
+import pytest
+
+from core.native_commands import NATIVE_COMMANDS, run_native
+from core.subprocess_adapter import run_command
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="compares against POSIX binaries")
+
+
+@pytest.fixture
+def files(workspace):
+    (workspace / "lines.txt").write_text("".join(f"line {idx}\n" for idx in range(1, 31)))
+    (workspace / "partial.txt").write_text("one\ntwo\nthree")
+    (workspace / "empty.txt").write_text("")
+    (workspace / "sub").mkdir()
+    return workspace
+
+
+PARITY = [
+    ["echo", "hello", "world"],
+    ["echo", "-n", "no newline"],
+    ["echo", "-E", "a\\nb"],
+    ["echo", "-x"],
+    ["echo"],
+    ["whoami"],
+    ["hostname"],
+    ["id"],
+    ["id", "-u"],
+    ["id", "-un"],
+    ["id", "-G", "-n"],
+    ["basename", "/usr/lib/"],
+    ["basename", "archive.tar.gz", ".gz"],
+    ["basename", ".gz", ".gz"],
+    ["basename", "///"],
+    ["basename", ""],
+    ["dirname", "a/b/c", "file", "/", "a//b//", "/x", ""],
+    ["realpath", "sub/../lines.txt", "missing-leaf"],
+    ["stat", "-c", "%n %s %a %A %F %U %G %h %%", "lines.txt", "sub", "empty.txt"],
+    ["stat", "--format=%i %Y %b %B %f", "lines.txt"],
+    ["date", "+%Y-%m-%d"],
+    ["date", "-u", "+%Z %z %H"],
+    ["head", "lines.txt"],
+    ["head", "-n", "3", "lines.txt", "partial.txt"],
+    ["head", "-2", "-q", "lines.txt", "partial.txt"],
+    ["head", "-c", "7", "lines.txt"],
+    ["head", "-n", "5", "partial.txt"],
+    ["tail", "lines.txt"],
+    ["tail", "-n", "2", "partial.txt"],
+    ["tail", "-n2", "-v", "lines.txt"],
+    ["tail", "-n", "+28", "lines.txt"],
+    ["tail", "-c", "4", "partial.txt"],
+    ["tail", "-c", "+5", "partial.txt"],
+    ["tail", "-n", "0", "lines.txt"],
+    ["tail", "empty.txt", "partial.txt"],
+]
+
+
+@pytest.mark.parametrize("command", PARITY, ids=lambda command: " ".join(command))
+def test_native_output_matches_binary(files, command):
+    if shutil.which(command[0]) is None:
+        pytest.skip(f"{command[0]} binary not installed")
+    native = run_command(command, cwd=files, native=True)
+    binary = run_command(command, cwd=files, native=False)
+    assert not binary.native
+    assert (native.returncode, native.stdout, native.stderr) == (binary.returncode, binary.stdout, binary.stderr)
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        ["echo", "-e", "a\\tb"],
+        ["date", "+%N"],
+        ["date", "-d", "yesterday"],
+        ["stat", "lines.txt"],
+        ["stat", "-c", "%m", "lines.txt"],
+        ["head", "-n", "-2", "lines.txt"],
+        ["head", "-n", "1K", "lines.txt"],
+        ["tail", "-f", "lines.txt"],
+        ["head", "missing.txt"],
+        ["uptime"],
+        ["basename", "-a", "x", "y"],
+        ["ls"],
+    ],
+    ids=lambda command: " ".join(command),
+)
+def test_unsupported_invocations_fall_back(files, command):
+    assert run_native(command, files, 1 << 20) is None
+
+
+def test_head_and_tail_respect_output_cap(files):
+    assert run_native(["head", "-c", "100", "lines.txt"], files, 50) is None
+    assert run_native(["tail", "-n", "+1", "lines.txt"], files, 50) is None
+    assert run_native(["tail", "-n", "2", "lines.txt"], files, 50) == (0, b"line 29\nline 30\n", "")
+
+
+def test_every_native_command_is_whitelisted():
+    from core.subprocess_adapter import READONLY_WHITELIST
+
+    assert set(NATIVE_COMMANDS) <= READONLY_WHITELIST
+
+
+def test_native_respects_security_checks(files):
+    from core.errors import CommandError
+
+    with pytest.raises(CommandError, match="not within workspace"):
+        run_command(["stat", "-c", "%n", "../../etc/passwd"], cwd=files)
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        ["head", "/etc/passwd"],
+        ["tail", "-n", "1", "../../etc/hostname"],
+        ["stat", "-c", "%n", "/etc/passwd"],
+        ["realpath", "/etc/shadow"],
+    ],
+    ids=lambda command: " ".join(command),
+)
+def test_operands_outside_the_workspace_are_refused(files, command):
+    from core.errors import CommandError
+
+    with pytest.raises(CommandError, match="not within workspace"):
+        run_native(command, files, 1 << 20)
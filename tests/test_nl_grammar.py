@@ -0,0 +1,103 @@
+"""
+Unit tests for the declarative NL grammar.
+"""
+
+import json
+
+import pytest
+
+from nl.grammar import load_grammar
+from nl.parser import NLParser
+
+
+@pytest.fixture
+def parser():
+    return NLParser()
+
+
+@pytest.mark.parametrize("text, plan", [
+    ("make a directory named build", ["mkdir build"]),
+    ("create an empty file called notes.txt", ["touch notes.txt"]),
+    ("rename a.txt to b.txt", ["mv a.txt b.txt"]),
+    ("copy the folder src into backup", ["cp src backup -r"]),
+    ("copy report.txt to docs", ["cp report.txt docs"]),
+    ("delete the folder tmp", ["rm tmp -r"]),
+    ("remove old.log", ["rm old.log"]),
+    ("show the file README.md", ["cat README.md"]),
+    ("show the current directory", ["pwd"]),
+    ("where am I", ["pwd"]),
+    ("go to docs", ["cd docs"]),
+    ("copy a, b and c into backup", ["cp a backup", "cp b backup", "cp c backup"]),
+    ("delete the files x.log, y.log, and z.log", ["rm x.log", "rm y.log", "rm z.log"]),
+    ("move a and b to archive", ["mv a archive/", "mv b archive/"]),
+    ("remove the folders tmp and cache", ["rm tmp -r", "rm cache -r"]),
+    ("copy a into backup and then delete a", ["cp a backup", "rm a"]),
+    ("go to docs, then list files; show notes.md", ["cd docs", "ls ", "cat notes.md"]),
+])
+def test_bundled_intents(parser, text, plan):
+    assert parser.parse(text) == plan
+
+
+def test_declaration_order_wins_across_verbs(parser):
+    # "move" inside "remove" is still a verb, and the move intent is declared first.
+    assert parser.parse("remove a to b") == ["mv a b/"]
+
+
+def test_parse_many_matches_parse(parser):
+    lines = [
+        "list files in docs",
+        "nothing here",
+        "show a.md",
+        "list  files in docs",
+        "ls -l",
+        "copy a and b into c then list files",
+    ]
+    assert parser.parse_many(lines, batch_size=2) == [parser.parse(line) for line in lines]
+    assert parser.parse_many([]) == []
+
+
+def test_every_clause_must_match(parser):
+    assert parser.parse("delete a and then something else") is None
+    assert parser.parse("list files then nothing here") is None
+    assert parser.parse("delete then") == ["rm then"]
+
+
+def test_custom_grammar_file(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({
+        "slot_types": {"word": "\\w+"},
+        "intents": [{
+            "name": "greet",
+            "verbs": ["greet"],
+            "pattern": "greet {who}",
+            "slots": {"who": "word"},
+            "commands": ["echo hello {who}"],
+        }],
+    }))
+    parser = NLParser(grammar=load_grammar(path))
+    assert parser.classify_as_nl("please greet bob")
+    assert parser.parse("please greet bob") == ["echo hello bob"]
+    assert parser.parse("list files") is None
+
+
+def test_invalid_grammar_is_rejected(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({
+        "slot_types": {},
+        "intents": [{"name": "bad", "verbs": ["x"], "pattern": "x {y}", "slots": {}, "commands": ["x"]}],
+    }))
+    with pytest.raises(ValueError, match="undeclared slot"):
+        load_grammar(path)
+
+    path.write_text(json.dumps({
+        "slot_types": {"words": {"pattern": "\\w+(?: and \\w+)*", "list": True}},
+        "intents": [{
+            "name": "pair",
+            "verbs": ["pair"],
+            "pattern": "pair {a} with {b}",
+            "slots": {"a": "words", "b": "words"},
+            "commands": ["echo {a} {b}"],
+        }],
+    }))
+    with pytest.raises(ValueError, match="at most one list slot"):
+        load_grammar(path)
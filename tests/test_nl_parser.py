@@ -50,6 +50,31 @@ class TestNLParser(unittest.TestCase):
         result = self.parser.parse("this is not a valid command")
         self.assertIsNone(result)
 
+    def test_parse_keeps_rule_priority(self):
+        """The first matching rule wins when several intents match."""
+        result = self.parser.parse("move notes to docs and show README.md")
+        self.assertEqual(result, ["mv notes docs/"])
+        result = self.parser.parse("show me how to create a folder called x")
+        self.assertEqual(result, ["mkdir x"])
+
+    def test_parse_is_cached_on_normalized_input(self):
+        """Whitespace variants share one cached plan and callers get copies."""
+        first = self.parser.parse("list files in docs")
+        first.append("pwd")
+        second = self.parser.parse("  list   files in docs ")
+        self.assertEqual(second, ["ls docs"])
+        self.assertEqual(self.parser.cache_info().hits, 1)
+
+    def test_classify_uses_live_registry(self):
+        """Commands registered later are recognised without rebuilding the parser."""
+        from core.registry import CommandRegistry
+        registry = CommandRegistry()
+        parser = NLParser(registry)
+        self.assertTrue(parser.classify_as_nl("show files"))
+        registry.register("show", lambda ctx, args: "", "show", "Show things")
+        self.assertFalse(parser.classify_as_nl("show files"))
+        self.assertFalse(parser.classify_as_nl("history"))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
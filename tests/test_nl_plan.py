@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from core.registry import create_default_registry, no_path_access
+from core.router import CommandRouter
+from core.session import SessionContext
+from nl.parser import execute_plan
+from nl.plan import plan_steps, run_plan
+
+
+@pytest.fixture
+def router(workspace):
+    from fs import paths as paths_mod
+
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths_mod.WORKSPACE_ROOT))
+
+
+def test_dependencies_follow_path_conflicts(router):
+    steps = plan_steps(router, [
+        "cp a.txt backup/a.txt",
+        "cp b.txt backup/b.txt",
+        "cat backup/a.txt",
+        "cd backup",
+        "ls",
+    ])
+    assert [step.depends_on for step in steps] == [set(), set(), {0}, {0, 1, 2}, {3}]
+
+
+def test_independent_steps_run_concurrently(router):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def rendezvous(ctx, args):
+        barrier.wait()
+        return args[0]
+
+    router.registry.register("meet", rendezvous, "meet <tag>", "Wait for a peer.", no_path_access)
+    result = run_plan(router, ["meet one", "meet two"], max_workers=2)
+    assert [response.stdout for response in result.responses] == ["one", "two"]
+    assert result.status == "ok"
+
+
+def test_dependents_of_failed_steps_are_skipped(router, workspace):
+    result = run_plan(router, ["cat missing.txt", "mv missing.txt moved.txt", "touch other.txt"], max_workers=4)
+    assert [response.status for response in result.responses] == ["error", "error", "ok"]
+    assert result.responses[1].stderr == "Skipped 'mv missing.txt moved.txt': step 1 failed."
+    assert (workspace / "other.txt").exists()
+    assert list(router.session.history) == ["cat missing.txt", "touch other.txt"]
+
+
+def test_execute_plan_defers_rendering(router, workspace):
+    (workspace / "a.txt").write_text("alpha")
+    (workspace / "b.txt").write_text("beta")
+    scrollback = []
+    status, stdout, stderr = execute_plan(["cat a.txt", "cat b.txt", "cat c.txt"], router, str(workspace), [], scrollback)
+    assert status == "error"
+    assert stdout == "alpha\nbeta"
+    assert stderr == "File not found: c.txt"
+    assert scrollback == [("out", "alpha"), ("out", "beta"), ("err", "File not found: c.txt")]
+
+
+def test_steps_after_cd_use_its_directory(router, workspace):
+    steps = plan_steps(router, ["cd docs", "cat a.txt", "rm ../docs/a.txt", "cat b.txt"])
+    docs = workspace / "docs"
+    assert steps[0].access is None
+    assert steps[1].access.reads == frozenset({docs / "a.txt"})
+    # Both name docs/a.txt, so the rm must wait for the cat.
+    assert [step.depends_on for step in steps] == [set(), {0}, {0, 1}, {0}]
+
+
+def test_steps_after_a_refused_cd_are_barriers(router):
+    steps = plan_steps(router, ["cd ..", "cat a.txt", "cat b.txt"])
+    assert [step.access for step in steps] == [None, None, None]
+    assert [step.depends_on for step in steps] == [set(), {0}, {1}]
+
+
+def test_multi_target_intent_runs_one_step_per_target(router, workspace):
+    from nl.parser import NLParser
+
+    (workspace / "backup").mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (workspace / name).write_text(name)
+    plan = NLParser().parse("copy a.txt, b.txt and c.txt into backup", cwd=workspace)
+    assert plan == ["cp a.txt backup", "cp b.txt backup", "cp c.txt backup"]
+    # Each copy writes only its own entry in backup/, so none waits for another.
+    assert [step.depends_on for step in plan_steps(router, plan)] == [set(), set(), set()]
+    result = run_plan(router, plan, max_workers=3)
+    assert result.status == "ok"
+    assert sorted(path.name for path in (workspace / "backup").iterdir()) == ["a.txt", "b.txt", "c.txt"]
+
+
+def test_multi_clause_plan_resolves_and_runs_after_cd(router, workspace):
+    from nl.parser import NLParser
+
+    (workspace / "docs").mkdir()
+    (workspace / "docs" / "notes.md").write_text("hello")
+    (workspace / "docs" / "old.log").write_text("")
+    (workspace / "report.txt").write_text("r")
+    text = "copy report.txt into docs and then go to docs then show notes; delete old.log"
+    plan = NLParser().parse(text, cwd=workspace)
+    assert plan == ["cp report.txt docs", "cd docs", "cat notes.md", "rm old.log"]
+    steps = plan_steps(router, plan)
+    assert [step.depends_on for step in steps] == [set(), {0}, {1}, {1}]
+    assert steps[3].access.writes == frozenset({workspace / "docs" / "old.log"})
+    result = run_plan(router, plan, max_workers=4)
+    assert [response.stdout for response in result.responses] == ["", "", "hello", ""]
+    assert sorted(path.name for path in (workspace / "docs").iterdir()) == ["notes.md", "report.txt"]
+    assert router.session.cwd == workspace / "docs"
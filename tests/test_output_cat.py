@@ -1,17 +1,47 @@
 import os
 
+from core.registry import create_default_registry
+from core.router import CommandRouter
 from core.session import SessionContext
 
 
-def test_cat_truncates_large_file(workspace):
-    from fs.ops import cat_handler
+def test_cat_pages_large_file(workspace):
     from fs import paths as paths_mod
 
     os.chdir(paths_mod.WORKSPACE_ROOT)
-    ctx = SessionContext(cwd=paths_mod.WORKSPACE_ROOT)
+    router = CommandRouter(create_default_registry(), SessionContext(cwd=paths_mod.WORKSPACE_ROOT))
     large_file = workspace / "huge.txt"
     large_file.write_text("A" * 15000)
 
-    output = cat_handler(ctx, ["huge.txt"])
-    assert "… (truncated)" in output
-    assert len(output) <= 10000 + len("… (truncated)")
+    first = router.execute("cat huge.txt")
+    assert first.stdout == "A" * 10000
+    assert first.meta["page"] == 1 and first.meta["pages"] == 2
+
+    second = router.execute(f"more {first.meta['cursor']}")
+    assert second.stdout == "A" * 5000
+    assert "cursor" not in second.meta
+
+
+def test_cat_keeps_trailing_whitespace(workspace):
+    from fs import paths as paths_mod
+
+    router = CommandRouter(create_default_registry(), SessionContext(cwd=paths_mod.WORKSPACE_ROOT))
+    (workspace / "spaced.txt").write_text("line  \n\n")
+    assert router.execute("cat spaced.txt").stdout == "line  \n\n"
+
+
+def test_nl_plans_and_batches_are_paged(workspace):
+    from fs import paths as paths_mod
+    from nl.parser import parse_and_execute
+
+    router = CommandRouter(create_default_registry(), SessionContext(cwd=paths_mod.WORKSPACE_ROOT))
+    (workspace / "big.txt").write_text("B" * 50000)
+
+    scrollback = []
+    status, stdout, _ = parse_and_execute("show big.txt", router, str(workspace), [], scrollback)
+    assert status == "ok"
+    assert stdout == "B" * 10000
+    assert scrollback == [("out", "B" * 10000)]
+
+    batch = router.execute_batch(["cat big.txt"])
+    assert batch.results[0].stdout == "B" * 10000
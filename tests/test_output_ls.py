@@ -17,12 +17,12 @@ def test_ls_hides_hidden_and_sorts(workspace):
     hidden = workspace / ".secret"
     hidden.write_text("")
 
-    stdout = ls_handler(ctx, [])
+    stdout = ls_handler(ctx, []).text()
     lines = stdout.splitlines() if stdout else []
 
     assert lines == ["Alpha/", "beta.txt"]
 
-    stdout_all = ls_handler(ctx, ["--all"])
+    stdout_all = ls_handler(ctx, ["--all"]).text()
     all_lines = stdout_all.splitlines() if stdout_all else []
     assert ".secret" in all_lines
     assert "Alpha/" in all_lines
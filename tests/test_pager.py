@@ -0,0 +1,98 @@
+import pytest
+
+from core.pager import CursorError, OutputBuffers, split_pages
+
+
+def _lines(count):
+    return "".join(f"line {idx:04d}\n" for idx in range(count))
+
+
+def _read_all(buffers, text):
+    page = buffers.store(text)
+    parts = [page.text]
+    while page.cursor is not None:
+        page = buffers.fetch(page.cursor)
+        parts.append(page.text)
+    return parts
+
+
+def test_split_pages_prefers_line_boundaries():
+    text = _lines(10)  # 10-char lines
+    bounds = split_pages(text, 25)
+    assert bounds == [0, 20, 40, 60, 80, 100]
+    assert split_pages("x" * 7, 3) == [0, 3, 6, 7]
+    assert split_pages("short", 10) == [0, 5]
+
+
+def test_pages_reassemble_in_memory(tmp_path):
+    buffers = OutputBuffers(page_chars=100, spool_dir=tmp_path)
+    text = _lines(50)
+    parts = _read_all(buffers, text)
+    assert "".join(parts) == text
+    assert all(len(part) <= 100 for part in parts)
+    assert not list(tmp_path.iterdir())
+
+
+def test_spills_to_disk_past_memory_limit(tmp_path):
+    buffers = OutputBuffers(page_chars=64, memory_limit=500, spool_dir=tmp_path)
+    first_text = _lines(40) + "ünïcode\n"
+    first = buffers.store(first_text)
+    buffers.store(_lines(40))
+    assert len(list(tmp_path.iterdir())) >= 1
+
+    parts = [first.text]
+    page = first
+    while page.cursor is not None:
+        page = buffers.fetch(page.cursor)
+        parts.append(page.text)
+    assert "".join(parts) == first_text
+
+    buffers.clear()
+    assert not list(tmp_path.iterdir())
+
+
+def test_lru_and_ttl_eviction(tmp_path):
+    buffers = OutputBuffers(page_chars=10, max_buffers=2, spool_dir=tmp_path)
+    old = buffers.store(_lines(3))
+    kept = buffers.store(_lines(3))
+    buffers.fetch(old.cursor)  # old becomes most recently used
+    buffers.store(_lines(3))
+    buffers.fetch(old.cursor)
+    with pytest.raises(CursorError):
+        buffers.fetch(kept.cursor)
+
+    buffers.ttl = -1
+    with pytest.raises(CursorError):
+        buffers.fetch(old.cursor)
+    assert len(buffers) == 0
+
+
+def test_invalid_cursor(tmp_path):
+    buffers = OutputBuffers(page_chars=10, spool_dir=tmp_path)
+    page = buffers.store(_lines(3))
+    buffer_id = page.cursor.split(":")[0]
+    for cursor in ("nonsense", f"{buffer_id}:x", f"{buffer_id}:9"):
+        with pytest.raises(CursorError):
+            buffers.fetch(cursor)
+
+
+def test_api_cursor(workspace, monkeypatch):
+    import api.index as api_index
+    from core.pool import RouterPool
+
+    monkeypatch.setattr(api_index, "pool", RouterPool())
+    client = api_index.app.test_client()
+    session_id = client.post("/api/sessions").get_json()["session_id"]
+    text = _lines(2000)
+    (workspace / "big.txt").write_text(text)
+
+    payload = client.post(f"/api/sessions/{session_id}/execute", json={"command": "cat big.txt"}).get_json()
+    parts = [payload["stdout"]]
+    while "cursor" in payload:
+        payload = client.post(
+            f"/api/sessions/{session_id}/execute", json={"cursor": payload["cursor"]}
+        ).get_json()
+        assert payload["status"] == "ok"
+        parts.append(payload["stdout"])
+    assert "".join(parts) == text
+    assert payload["page"] == payload["pages"] > 1
@@ -0,0 +1,94 @@
+import pytest
+
+from core.ratelimit import EXEC, READ, WRITE, RateLimit, RateLimiter, TokenBucket
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from fs import paths
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limit_parse():
+    assert RateLimit.parse("10:20") == RateLimit(10.0, 20.0)
+    assert RateLimit.parse("5") == RateLimit(5.0, 5.0)
+    assert RateLimit.parse("0.5") == RateLimit(0.5, 1.0)
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(RateLimit(2.0, 2.0), now=0.0)
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0.0
+
+
+def test_session_buckets_are_separate():
+    clock = FakeClock()
+    limiter = RateLimiter({READ: RateLimit(1.0, 2.0), WRITE: RateLimit(1.0, 1.0)}, {}, clock=clock)
+    assert limiter.admit("a", READ) == 0.0
+    assert limiter.admit("a", READ) == 0.0
+    assert limiter.admit("a", READ) == pytest.approx(1.0)
+    # Other classes and other sessions are unaffected.
+    assert limiter.admit("a", WRITE) == 0.0
+    assert limiter.admit("b", READ) == 0.0
+    # Classes without a limit are never rejected.
+    assert all(limiter.admit("a", EXEC) == 0.0 for _ in range(100))
+    clock.now = 1.0
+    assert limiter.admit("a", READ) == 0.0
+
+
+def test_global_rejection_refunds_session_token():
+    clock = FakeClock()
+    limiter = RateLimiter({READ: RateLimit(1.0, 1.0)}, {READ: RateLimit(1.0, 1.0)}, clock=clock)
+    assert limiter.admit("a", READ) == 0.0
+    assert limiter.admit("b", READ) > 0
+    clock.now = 1.0
+    # "b" was not charged for the rejected call, so its own bucket is still full.
+    assert limiter.admit("b", READ) == 0.0
+
+
+def test_router_rejects_with_retry_after(workspace):
+    router = CommandRouter(create_default_registry(), SessionContext(cwd=paths.WORKSPACE_ROOT))
+    clock = FakeClock()
+    router.limiter = RateLimiter({WRITE: RateLimit(1.0, 1.0)}, {}, clock=clock)
+
+    assert router.execute("pwd").status == "ok"
+    assert router.execute("mkdir a").status == "ok"
+    response = router.execute("mkdir b")
+    assert response.status == "error"
+    assert "Rate limit exceeded for write commands" in response.stderr
+    assert response.meta["retry_after"] == pytest.approx(1.0)
+    assert response.meta["rate_class"] == WRITE
+    assert not (workspace / "b").exists()
+    assert router.execute("ls").status == "ok"
+
+
+def test_commands_that_can_write_files_use_the_write_class():
+    registry = create_default_registry()
+    for name in ("sort", "uniq", "dedupe", "archive", "extract", "cp"):
+        assert registry.get(name).rate_class == WRITE, name
+    assert registry.get("cat").rate_class == READ
+
+
+def test_api_rate_limited_status(workspace, monkeypatch):
+    import api.index as api_index
+    from core.pool import RouterPool
+
+    monkeypatch.setattr(api_index, "pool", RouterPool())
+    client = api_index.app.test_client()
+    session_id = client.post("/api/sessions").get_json()["session_id"]
+    entry = api_index.pool.get(session_id)
+    entry.router.limiter = RateLimiter({READ: RateLimit(0.5, 1.0)}, {}, clock=FakeClock())
+
+    assert client.post(f"/api/sessions/{session_id}/execute", json={"command": "pwd"}).status_code == 200
+    response = client.post(f"/api/sessions/{session_id}/execute", json={"command": "pwd"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert response.get_json()["retry_after"] == pytest.approx(2.0)
@@ -135,6 +135,13 @@ class TestCommandRouter(unittest.TestCase):
         self.assertIsNotNone(response.meta)
         self.assertIn("exec_ms", response.meta)
     
+    def test_unbalanced_quotes(self):
+        """Test that unparseable input is reported instead of raised."""
+        response = self.router.execute("test 'open")
+        self.assertEqual(response.status, "error")
+        self.assertEqual(response.stderr, "Invalid syntax in \"test 'open\": No closing quotation")
+        self.assertEqual(list(self.session.history), [])
+    
     def test_error_mapping(self):
         """Test error mapping to friendly messages."""
         def error_handler(ctx, args):
@@ -0,0 +1,62 @@
+import pytest
+
+from core.errors import CommandError
+from core.registry import create_default_registry
+from core.router import CommandRouter, _group_batch
+from core.session import SessionContext
+
+
+@pytest.fixture
+def router(workspace):
+    from fs import paths as paths_mod
+
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths_mod.WORKSPACE_ROOT))
+
+
+def test_batch_runs_setup_commands(router, workspace):
+    commands = ["mkdir data"] + [f"touch data/f{idx}.txt" for idx in range(20)] + ["cp -r data backup", "ls backup"]
+
+    batch = router.execute_batch(commands)
+
+    assert batch.status == "ok"
+    assert len(batch.results) == len(commands)
+    assert batch.results[-1].stdout.splitlines()[0] == "f0.txt"
+    assert (workspace / "backup" / "f19.txt").exists()
+    assert list(router.session.history)[-1] == "ls backup"
+    assert batch.timing["groups"] == 1
+    assert batch.timing["total_ms"] >= batch.timing["exec_ms"]
+
+
+def test_batch_stop_on_error(router, workspace):
+    batch = router.execute_batch(["mkdir a", "cat nope.txt", "mkdir b"])
+    assert [result.status for result in batch.results] == ["ok", "error"]
+    assert not (workspace / "b").exists()
+    assert list(router.session.history) == ["mkdir a", "cat nope.txt"]
+
+    batch = router.execute_batch(["cat nope.txt", "mkdir b"], stop_on_error=False)
+    assert [result.status for result in batch.results] == ["error", "ok"]
+
+
+def test_batch_tracks_cwd_changes(router, workspace):
+    batch = router.execute_batch(["mkdir sub", "cd sub", "touch here.txt", "pwd"])
+    assert batch.results[-1].stdout == str(workspace / "sub")
+    assert (workspace / "sub" / "here.txt").exists()
+    assert batch.cwd == workspace / "sub"
+
+
+def test_batch_history_sees_earlier_commands(router):
+    batch = router.execute_batch(["pwd", "history"])
+    assert batch.results[1].stdout == "1  pwd\n2  history"
+    assert list(router.session.history) == ["pwd", "history"]
+
+
+def test_batch_parse_errors_fail_before_running(router, workspace):
+    with pytest.raises(CommandError):
+        router.execute_batch(["mkdir a", 'touch "broken'])
+    assert not (workspace / "a").exists()
+    assert list(router.session.history) == []
+
+
+def test_group_batch_splits_on_terminators():
+    names = ["mkdir", "touch", "cd", "touch", "cpu", "rm", "ls"]
+    assert _group_batch(names) == [(0, 3), (3, 4), (4, 5), (5, 6), (6, 7)]
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from core.scheduler import ExecutionScheduler, SchedulerBusyError
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail("condition not reached")
+        time.sleep(0.001)
+
+
+def _queue_in_order(scheduler, entries, order):
+    """Start one waiter per ``(session, cost, label)``, each queued before the next starts."""
+    threads = []
+    for session_id, cost, label in entries:
+        def run(session_id=session_id, cost=cost, label=label):
+            with scheduler.slot(session_id, cost):
+                order.append(label)
+
+        waiting = scheduler.waiting
+        thread = threading.Thread(target=run)
+        thread.start()
+        _wait_until(lambda waiting=waiting: scheduler.waiting == waiting + 1)
+        threads.append(thread)
+    return threads
+
+
+def test_concurrency_is_bounded():
+    scheduler = ExecutionScheduler(max_concurrent=2, max_queue=10)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with scheduler.slot("s"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+    assert scheduler.running == 0 and scheduler.waiting == 0
+
+
+def test_sessions_are_served_round_robin():
+    scheduler = ExecutionScheduler(max_concurrent=1, max_queue=10)
+    order = []
+    blocker = scheduler.acquire("busy")
+    entries = [("a", 1.0, f"a{idx}") for idx in range(1, 5)] + [("b", 1.0, "b1"), ("b", 1.0, "b2")]
+    threads = _queue_in_order(scheduler, entries, order)
+    assert blocker.granted
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["a1", "b1", "a2", "b2", "a3", "a4"]
+
+
+def test_costly_commands_get_fewer_turns():
+    scheduler = ExecutionScheduler(max_concurrent=1, max_queue=10)
+    order = []
+    scheduler.acquire("busy")
+    entries = [("heavy", 2.0, "h1"), ("heavy", 2.0, "h2"), ("light", 1.0, "l1"), ("light", 1.0, "l2")]
+    threads = _queue_in_order(scheduler, entries, order)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert order.index("l2") < order.index("h2")
+
+
+def test_full_queue_sheds_load_and_timeout_withdraws():
+    scheduler = ExecutionScheduler(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    scheduler.acquire("busy")
+    with pytest.raises(SchedulerBusyError, match="no execution slot"):
+        scheduler.acquire("a")
+    assert scheduler.waiting == 0
+
+    thread = threading.Thread(target=lambda: scheduler.acquire("a", timeout=5))
+    thread.start()
+    _wait_until(lambda: scheduler.waiting == 1)
+    with pytest.raises(SchedulerBusyError, match="retry"):
+        scheduler.acquire("b")
+    scheduler.release()
+    thread.join()
+    assert scheduler.running == 1 and scheduler.waiting == 0
+
+
+def test_queue_time_is_reported():
+    scheduler = ExecutionScheduler(max_concurrent=1, max_queue=4)
+    assert scheduler.acquire("a").queue_ms == 0.0
+    tickets = []
+    thread = threading.Thread(target=lambda: tickets.append(scheduler.acquire("b")))
+    thread.start()
+    _wait_until(lambda: scheduler.waiting == 1)
+    time.sleep(0.05)
+    scheduler.release()
+    thread.join()
+    assert tickets[0].queue_ms >= 40
@@ -0,0 +1,52 @@
+from ui.render import emit_stderr, emit_stdout
+from ui.scrollback import Scrollback
+
+
+def test_ring_buffer_drops_oldest_entries():
+    scrollback = Scrollback(limit=3, page_size=10)
+    for idx in range(5):
+        scrollback.append(("out", f"line {idx}"))
+
+    assert len(scrollback) == 3
+    assert [payload for _, payload in scrollback] == ["line 2", "line 3", "line 4"]
+
+
+def test_render_emits_single_window_in_order():
+    scrollback = Scrollback(limit=100, page_size=2)
+    scrollback.append(("out", "first"))
+    scrollback.append(("err", "oops <b>"))
+    scrollback.append(("out", "last"))
+
+    assert scrollback.render() == emit_stderr("oops <b>") + emit_stdout("last")
+    assert scrollback.has_older(1)
+    assert not scrollback.has_older(2)
+    assert scrollback.render(2).startswith(emit_stdout("first"))
+
+
+def test_fragments_are_escaped_once(monkeypatch):
+    import ui.scrollback as scrollback_mod
+
+    calls = []
+    original = scrollback_mod._render_entry
+
+    def counting(channel, payload):
+        calls.append(payload)
+        return original(channel, payload)
+
+    monkeypatch.setattr(scrollback_mod, "_render_entry", counting)
+    scrollback = Scrollback(limit=10, page_size=5)
+    for idx in range(3):
+        scrollback.append(("out", str(idx)))
+
+    scrollback.render()
+    scrollback.render()
+    scrollback.append(("out", "3"))
+    scrollback.render()
+
+    assert calls == ["0", "1", "2", "3"]
+
+
+def test_empty_payloads_render_nothing():
+    scrollback = Scrollback()
+    scrollback.append(("out", "   "))
+    assert scrollback.render() == ""
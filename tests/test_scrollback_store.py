@@ -0,0 +1,85 @@
+from ui.scrollback import Scrollback
+from ui.scrollback_store import ScrollbackStore
+
+
+def test_entries_move_through_tiers():
+    store = ScrollbackStore(hot_entries=2, memory_budget=200)
+    payloads = [f"{idx}:" + "lorem ipsum " * 40 for idx in range(10)]
+    for seq, payload in enumerate(payloads):
+        store.put(seq, "out", payload)
+
+    usage = store.memory_usage()
+    assert usage["entries"] == 10
+    assert usage["hot_entries"] == 2
+    assert usage["compressed_bytes"] <= 200
+    assert usage["spilled_entries"] > 0
+    assert usage["spilled_bytes"] > 0
+    assert [store.get(seq)[1] for seq in range(10)] == payloads
+
+
+def test_pop_oldest_releases_spilled_entries():
+    store = ScrollbackStore(hot_entries=1, memory_budget=0)
+    for seq in range(5):
+        store.put(seq, "err", f"message {seq}")
+
+    for _ in range(4):
+        store.pop_oldest()
+
+    assert len(store) == 1
+    assert store.get(4) == ("err", "message 4")
+    assert store.memory_usage()["spilled_bytes"] == 0
+
+
+def test_scrollback_decompresses_older_pages_on_demand():
+    scrollback = Scrollback(limit=50, page_size=2, store=ScrollbackStore(hot_entries=2, memory_budget=64))
+    for idx in range(20):
+        scrollback.append(("out", f"line {idx} " + "x" * 100))
+
+    assert "line 19" in scrollback.render(1)
+    older = scrollback.render(10)
+    assert "line 0 " in older and "line 19" in older
+    usage = scrollback.memory_usage()
+    assert usage["spilled_entries"] > 0
+    assert usage["html_bytes"] > 0
+
+
+def test_monitor_formats_scrollback_usage():
+    from monitor import stats
+
+    text = stats.scrollback({"entries": 3, "hot_bytes": 1024, "compressed_bytes": 1024, "spilled_bytes": 2048})
+    assert text == "Scrollback: 3 entries  |  RAM 2.00 KB (zlib 1.00 KB)  |  Disk 2.00 KB"
+
+
+def test_failed_compaction_keeps_the_old_spill_file(monkeypatch):
+    import tempfile
+
+    from ui import scrollback_store
+
+    monkeypatch.setattr(scrollback_store, "_COMPACT_MIN_DEAD", 0)
+    store = ScrollbackStore(hot_entries=1, memory_budget=0)
+    for seq in range(8):
+        store.put(seq, "out", f"message {seq} " + "z" * 50)
+    spilled = store.memory_usage()["spilled_bytes"]
+
+    real = tempfile.TemporaryFile
+
+    class FullDisk:
+        def __init__(self, handle):
+            self._handle = handle
+
+        def write(self, data):
+            raise OSError(28, "No space left on device")
+
+        def __getattr__(self, name):
+            return getattr(self._handle, name)
+
+    monkeypatch.setattr(tempfile, "TemporaryFile", lambda **kwargs: FullDisk(real(**kwargs)))
+    for _ in range(5):
+        store.pop_oldest()
+    assert store.memory_usage()["spilled_bytes"] == spilled
+    assert [store.get(seq)[1].split()[1] for seq in store.seqs()] == ["5", "6", "7"]
+
+    monkeypatch.setattr(tempfile, "TemporaryFile", real)
+    store.pop_oldest()
+    assert store.memory_usage()["spilled_bytes"] < spilled
+    assert [store.get(seq)[1].split()[1] for seq in store.seqs()] == ["6", "7"]
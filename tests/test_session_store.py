@@ -0,0 +1,181 @@
+import pytest
+
+from core.pool import RouterPool, SessionNotFoundError
+from core.session import SessionContext
+from core.session_store import (
+    MemorySessionStore,
+    SessionState,
+    SessionStore,
+    SqliteSessionStore,
+    commit_state,
+    create_session_store,
+)
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return tmp_path / "sessions.db"
+
+
+def test_state_round_trip_is_relative_to_root(workspace):
+    (workspace / "sub").mkdir()
+    ctx = SessionContext(cwd=workspace / "sub")
+    ctx.add_to_history("cd sub")
+    state = SessionState.capture(ctx, workspace, version=3)
+    assert (state.cwd, state.history) == ("sub", ["cd sub"])
+
+    restored = SessionState.loads(state.session_id, 3, state.dumps())
+    other = SessionContext(cwd=workspace)
+    restored.apply(other, workspace)
+    assert other.cwd == workspace / "sub"
+    assert list(other.history) == ["cd sub"]
+
+    (workspace / "sub").rmdir()
+    restored.apply(other, workspace)
+    assert other.cwd == workspace
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_save_is_compare_and_set(backend, sqlite_path):
+    store = MemorySessionStore() if backend == "memory" else SqliteSessionStore(sqlite_path)
+    try:
+        first = SessionState("s", cwd="a")
+        assert store.save(first) and first.version == 1
+        # A second writer that also started from "no state" loses.
+        assert not store.save(SessionState("s", cwd="b"))
+        assert store.load("s").cwd == "a"
+        assert store.load("s", newer_than=1) is None
+
+        stale = SessionState("s", cwd="stale", version=1)
+        newer = SessionState("s", cwd="c", version=1)
+        assert store.save(newer) and newer.version == 2
+        assert not store.save(stale)
+        assert store.load("s").cwd == "c"
+
+        store.delete("s")
+        assert store.load("s") is None
+    finally:
+        store.close()
+
+
+def test_sqlite_store_is_shared_between_instances(sqlite_path):
+    writer = SqliteSessionStore(sqlite_path)
+    reader = SqliteSessionStore(sqlite_path)
+    try:
+        assert writer.save(SessionState("s", cwd="a", history=["ls"]))
+        assert reader.load("s").history == ["ls"]
+        assert reader.load("s", newer_than=1) is None
+        # The reader's cached copy is refreshed once the writer moves on.
+        assert writer.save(SessionState("s", cwd="b", history=["ls", "cd b"], version=1))
+        assert reader.load("s").cwd == "b"
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_sqlite_concurrent_saves_each_get_a_version(sqlite_path):
+    import threading
+
+    store = SqliteSessionStore(sqlite_path)
+    results = []
+
+    def save(idx):
+        results.append(store.save(SessionState(f"s{idx}", cwd=str(idx))))
+
+    threads = [threading.Thread(target=save, args=(idx,)) for idx in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 32
+    assert all(store.load(f"s{idx}").cwd == str(idx) for idx in range(32))
+    store.close()
+
+
+def test_commit_state_rebases_on_a_newer_state():
+    store = MemorySessionStore()
+    base = SessionState("s", cwd=".", history=["ls"])
+    store.save(base)
+    # Two workers both start from version 1.
+    ours = SessionState("s", cwd="docs", history=["ls", "cd docs"], version=1)
+    theirs = SessionState("s", cwd="src", history=["ls", "cat a"], version=1)
+    assert commit_state(store, theirs, ["ls"]) is theirs
+
+    stored = commit_state(store, ours, ["ls"])
+    assert stored is not ours
+    assert (stored.cwd, stored.history, stored.version) == ("docs", ["ls", "cat a", "cd docs"], 3)
+    assert store.load("s").history == ["ls", "cat a", "cd docs"]
+
+
+def test_pools_share_sessions_through_store(workspace, sqlite_path):
+    (workspace / "sub").mkdir()
+    first = RouterPool(store=SqliteSessionStore(sqlite_path))
+    second = RouterPool(store=SqliteSessionStore(sqlite_path))
+
+    entry = first.create()
+    session_id = entry.session.session_id
+    with entry.lock:
+        entry.router.execute("cd sub")
+        first.commit(entry)
+
+    adopted = second.get(session_id)
+    assert adopted.session.cwd == workspace / "sub"
+    assert list(adopted.session.history) == ["cd sub"]
+
+    with adopted.lock:
+        adopted.router.execute("cd ..")
+        second.commit(adopted)
+    assert first.get(session_id).session.cwd == workspace
+
+    assert second.discard(session_id)
+    first.discard(session_id)
+    third = RouterPool(store=SqliteSessionStore(sqlite_path))
+    with pytest.raises(SessionNotFoundError):
+        third.get(session_id)
+    for pool in (first, second, third):
+        pool.store.close()
+
+
+def test_pools_sharing_a_session_lose_no_updates(workspace, sqlite_path):
+    (workspace / "a").mkdir()
+    (workspace / "b").mkdir()
+    first = RouterPool(store=SqliteSessionStore(sqlite_path))
+    second = RouterPool(store=SqliteSessionStore(sqlite_path))
+    session_id = first.create().session.session_id
+    one = first.get(session_id)
+    two = second.get(session_id)
+
+    # Both workers run a command from the same stored version.
+    with one.lock:
+        one.router.execute("cd a")
+        first.commit(one)
+    with two.lock:
+        two.router.execute("pwd")
+        two.router.execute("cd b")
+        second.commit(two)
+
+    assert list(two.session.history) == ["cd a", "pwd", "cd b"]
+    assert two.version == 3
+    third = RouterPool(store=SqliteSessionStore(sqlite_path))
+    adopted = third.get(session_id)
+    assert adopted.session.cwd == workspace / "b"
+    assert list(adopted.session.history) == ["cd a", "pwd", "cd b"]
+    # The worker that fell behind catches up on its next request.
+    assert list(first.get(session_id).session.history) == ["cd a", "pwd", "cd b"]
+    for pool in (first, second, third):
+        pool.store.close()
+
+
+def test_create_session_store_from_env(monkeypatch, tmp_path):
+    assert isinstance(create_session_store(), MemorySessionStore)
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    store = create_session_store(path=tmp_path / "s.db")
+    assert isinstance(store, SqliteSessionStore)
+    store.close()
+    with pytest.raises(ValueError):
+        create_session_store("redis")
@@ -0,0 +1,108 @@
+import json
+import threading
+
+import pytest
+
+from core.pool import RouterPool
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from core.streaming import OutputStream, StreamClosedError, stream_command
+
+
+def parse_events(frames):
+    events = []
+    for frame in frames:
+        if frame.startswith(":"):
+            continue
+        lines = frame.strip().splitlines()
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def router(workspace):
+    from fs import paths as paths_mod
+
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths_mod.WORKSPACE_ROOT))
+
+
+def test_cat_streams_chunks_then_status(router, workspace):
+    (workspace / "big.txt").write_text("x" * 40_000)
+
+    events = parse_events(stream_command(router, "cat big.txt"))
+
+    output = [data for event, data in events if event == "output"]
+    assert len(output) == 3
+    assert "".join(output) == "x" * 40_000
+    assert events[-1][0] == "status"
+    assert events[-1][1]["status"] == "ok"
+    assert router.session.sink is None
+
+
+def test_cp_recursive_reports_progress(router, workspace):
+    (workspace / "src").mkdir()
+    for idx in range(3):
+        (workspace / "src" / f"f{idx}.txt").write_text("data")
+
+    events = parse_events(stream_command(router, "cp -r src dst"))
+
+    progress = [data for event, data in events if event == "progress"]
+    assert [item["files"] for item in progress] == [1, 2, 3]
+    assert events[-1] == ("status", {"status": "ok", "cwd": str(workspace), "exec_ms": events[-1][1]["exec_ms"]})
+
+
+def test_errors_are_streamed(router):
+    events = parse_events(stream_command(router, "cat missing.txt"))
+    assert events == [
+        ("error", "File not found: missing.txt"),
+        ("status", {"status": "error", "cwd": None, "exec_ms": events[-1][1]["exec_ms"]}),
+    ]
+
+
+def test_stream_applies_backpressure():
+    stream = OutputStream(max_events=2, max_bytes=1024, put_timeout=5)
+    stream.put("output", "a")
+    stream.put("output", "b")
+    blocked = threading.Event()
+    done = threading.Event()
+
+    def producer():
+        blocked.set()
+        stream.put("output", "c")
+        done.set()
+        stream.finish()
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    blocked.wait()
+    assert not done.wait(0.05)
+    assert stream.buffered_bytes <= 2
+
+    received = [data for _, data in stream.events()]
+    thread.join()
+    assert received == ["a", "b", "c"]
+
+
+def test_slow_consumer_aborts_producer():
+    stream = OutputStream(max_events=1, put_timeout=0.01)
+    stream.put("output", "a")
+    with pytest.raises(StreamClosedError):
+        stream.put("output", "b")
+
+
+def test_stream_endpoint(workspace, monkeypatch):
+    import api.index as api_index
+
+    monkeypatch.setattr(api_index, "pool", RouterPool())
+    client = api_index.app.test_client()
+    session_id = client.post("/api/sessions").get_json()["session_id"]
+    (workspace / "notes.txt").write_text("hello")
+
+    response = client.get(f"/api/sessions/{session_id}/stream", query_string={"command": "cat notes.txt"})
+
+    assert response.mimetype == "text/event-stream"
+    body = response.get_data(as_text=True)
+    events = parse_events(frame + "\n\n" for frame in body.split("\n\n") if frame)
+    assert events[0] == ("output", "hello")
+    assert events[-1][0] == "status"
@@ -0,0 +1,96 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.output import Records
+from core.pool import RouterPool
+from core.registry import create_default_registry
+from core.router import CommandRouter, Response
+from core.session import SessionContext
+from fs import paths
+
+
+@pytest.fixture
+def router(workspace):
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths.WORKSPACE_ROOT))
+
+
+def test_ls_text_is_built_lazily(router, workspace):
+    (workspace / "b.txt").write_text("")
+    (workspace / "A").mkdir()
+
+    response = router.execute("ls", paginate=False)
+    assert response.records is not None
+    assert response._stdout is None
+    assert response.stdout == "A/\nb.txt"
+    assert [row.name for row in response.records.rows] == ["A", "b.txt"]
+
+
+def test_ls_json_flag_returns_records(router, workspace):
+    (workspace / "docs").mkdir()
+    (workspace / "readme.md").write_text("")
+
+    response = router.execute("ls --json")
+    assert response.status == "ok"
+    assert json.loads(response.stdout) == [
+        {"name": "docs", "is_dir": True},
+        {"name": "readme.md", "is_dir": False},
+    ]
+
+
+def test_json_flag_is_not_stripped_for_text_commands(router, workspace):
+    response = router.execute("mkdir --json")
+    assert response.status == "ok"
+    assert (workspace / "--json").is_dir()
+
+
+def test_ps_records(router):
+    proc = MagicMock()
+    proc.info = {"pid": 7, "name": "gamma", "cpu_percent": 3.25, "memory_info": MagicMock(rss=4096)}
+    with patch("psutil.process_iter", return_value=[proc]):
+        response = router.execute("ps --json")
+    assert json.loads(response.stdout) == [{"pid": 7, "name": "gamma", "cpu_percent": 3.2, "rss": 4096}]
+
+
+def test_response_is_slotted_with_lazy_meta():
+    response = Response(stdout="x", exec_ms=1.5)
+    assert not hasattr(response, "__dict__")
+    assert response._meta is None
+    assert response.meta_value("exec_ms") == 1.5
+    assert response.meta_value("rusage") is None
+    assert response._meta is None
+    assert response.meta == {"exec_ms": 1.5}
+
+
+def test_records_format_once():
+    calls = []
+
+    def formatter(rows):
+        calls.append(rows)
+        return "text"
+
+    records = Records([], formatter)
+    assert records.text() == records.text() == "text"
+    assert len(calls) == 1
+
+
+def test_api_records_field(workspace, monkeypatch):
+    import api.index as api_index
+
+    monkeypatch.setattr(api_index, "pool", RouterPool())
+    client = api_index.app.test_client()
+    session_id = client.post("/api/sessions").get_json()["session_id"]
+    (workspace / "notes").mkdir()
+
+    payload = client.post(
+        f"/api/sessions/{session_id}/execute", json={"command": "ls", "records": True}
+    ).get_json()
+    assert payload["records"] == [{"name": "notes", "is_dir": True}]
+    assert "stdout" not in payload
+
+    payload = client.post(
+        f"/api/sessions/{session_id}/execute", json={"command": "pwd", "records": True}
+    ).get_json()
+    assert payload["records"] is None
+    assert payload["stdout"] == str(workspace)
@@ -0,0 +1,219 @@
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+from core.errors import CommandError, CommandTimeoutError
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core import subprocess_adapter
+from core.session import SessionContext, UsageTotals
+from core.subprocess_adapter import ResourceLimits, StreamingProcess, check_command, run_secure_command
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+
+@pytest.fixture
+def router(workspace):
+    return CommandRouter(create_default_registry(), SessionContext(cwd=workspace))
+
+
+def test_reads_both_streams_concurrently():
+    # Each stream writes far more than a pipe buffer; sequential reads would deadlock.
+    code = "import sys\nfor _ in range(2000):\n    sys.stdout.write('o' * 100)\n    sys.stderr.write('e' * 100)\n"
+    process = StreamingProcess(_python(code), timeout=10)
+    chunks = list(process)
+    assert {stream for stream, _ in chunks} == {"stdout", "stderr"}
+    assert process.result.returncode == 0
+    assert process.result.stdout == "o" * 200000
+    assert process.result.stderr == "e" * 200000
+
+
+def test_output_cap_keeps_head_and_tail():
+    code = "import sys\nsys.stdout.write('HEAD' + 'x' * 10000 + 'TAIL')\n"
+    process = StreamingProcess(_python(code), timeout=10, max_output_bytes=100)
+    list(process)
+    stdout = process.result.stdout
+    assert stdout.startswith("HEAD")
+    assert stdout.endswith("TAIL")
+    assert "bytes of stdout truncated" in stdout
+    assert process.result.dropped_bytes == 10008 - 100
+
+
+def test_multibyte_characters_split_across_reads():
+    code = "import sys, time\nfor _ in range(3):\n    sys.stdout.buffer.write('é'.encode()[:1]); sys.stdout.flush(); time.sleep(0.05)\n    sys.stdout.buffer.write('é'.encode()[1:]); sys.stdout.flush()\n"
+    process = StreamingProcess(_python(code), timeout=10)
+    list(process)
+    assert process.result.stdout == "ééé"
+
+
+def test_timeout_kills_process_group_and_keeps_partial_output(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    code = (
+        "import subprocess, sys, time\n"
+        f"child = subprocess.Popen(['sleep', '30'])\n"
+        f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+        "print('partial', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    process = StreamingProcess(_python(code), timeout=1.0)
+    started = time.monotonic()
+    list(process)
+    assert time.monotonic() - started < 10
+    assert process.result.timed_out
+    assert process.result.stdout == "partial\n"
+    child = int(pid_file.read_text())
+    for _ in range(50):
+        try:
+            os.kill(child, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("child process survived the timeout")
+
+
+def test_run_secure_command_checks_and_timeout(workspace):
+    assert run_secure_command(["echo", "hi"]) == (0, "hi\n", "")
+    with pytest.raises(CommandError, match="Dangerous"):
+        run_secure_command(["python3", "-V"])
+    with pytest.raises(CommandError, match="not within workspace"):
+        run_secure_command(["cat", "../../etc/passwd"])
+    with pytest.raises(CommandTimeoutError):
+        run_secure_command(["sleep", "5"], timeout=0.2)
+
+
+def test_exec_builtin_is_gated(router, monkeypatch):
+    response = router.execute("exec echo hello")
+    assert response.status == "error"
+    assert "ALLOW_SUBPROCESS" in response.stderr
+
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    response = router.execute("exec echo hello")
+    assert (response.status, response.stdout) == ("ok", "hello\n")
+
+    monkeypatch.setenv("SUBPROCESS_ALLOWLIST", "echo,touch")
+    monkeypatch.setenv("READONLY_MODE", "true")
+    response = router.execute("exec touch x")
+    assert response.status == "error"
+    assert "Read-only mode" in response.stderr
+
+
+@pytest.mark.parametrize("command", [
+    "exec rm -rf .",
+    "exec /bin/rm x",
+    "exec env rm x",
+    "exec sh -c 'rm x'",
+    "exec /usr/bin/env rm x",
+    "exec find . -exec rm {} ;",
+    "exec no-such-program",
+])
+def test_exec_only_runs_allowlisted_programs(router, monkeypatch, workspace, command):
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    (workspace / "x").write_text("keep")
+    response = router.execute(command)
+    assert response.status == "error"
+    assert "not allowed" in response.stderr or "not found" in response.stderr
+    assert (workspace / "x").exists()
+
+
+def test_exec_accepts_path_to_an_allowed_program(router, monkeypatch):
+    import shutil
+
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    response = router.execute(f"exec {shutil.which('echo')} hello")
+    assert (response.status, response.stdout) == ("ok", "hello\n")
+    monkeypatch.setenv("SUBPROCESS_ALLOWLIST", "ls")
+    assert "not allowed" in router.execute("exec echo hello").stderr
+
+
+@pytest.mark.parametrize("command", [
+    "exec head -n 2 /etc/passwd",
+    "exec tail -n 1 /etc/hostname",
+    "exec du -s /root",
+    "exec realpath /etc/shadow",
+    "exec cat ../../etc/passwd",
+    "exec grep --file=/etc/passwd x",
+    "exec grep -f/etc/passwd x",
+    "exec stat -c %n /",
+])
+def test_exec_keeps_every_operand_inside_the_workspace(router, monkeypatch, command):
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    monkeypatch.setenv("SUBPROCESS_ALLOWLIST", "head,tail,du,realpath,cat,grep,stat")
+    response = router.execute(command)
+    assert response.status == "error"
+    assert "not within workspace" in response.stderr
+    assert response.stdout == ""
+
+
+def test_denylist_compares_basenames():
+    with pytest.raises(CommandError, match="Dangerous"):
+        check_command(["/bin/rm", "x"])
+
+
+def test_exec_streams_to_sink(router, monkeypatch):
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    events = []
+    router.session.sink = lambda event, data: events.append((event, data))
+    response = router.execute("exec ls -a")
+    assert response.status == "ok"
+    assert response.stdout == ""
+    assert events and events[0][0] == "output"
+
+
+def test_limits_are_applied_in_the_child():
+    code = "import resource\nprint(resource.getrlimit(resource.RLIMIT_NOFILE)[0], resource.getrlimit(resource.RLIMIT_CPU)[0])\n"
+    process = StreamingProcess(_python(code), timeout=10, limits=ResourceLimits(cpu_seconds=5, open_files=32))
+    list(process)
+    assert process.result.stdout.split() == ["32", "5"]
+
+
+def test_cpu_limit_kills_busy_child_and_reports_rusage():
+    process = StreamingProcess(_python("while True: pass"), timeout=10, limits=ResourceLimits(cpu_seconds=1))
+    list(process)
+    assert process.result.returncode in (-signal.SIGXCPU, -signal.SIGKILL)
+    assert not process.result.timed_out
+    assert process.result.usage.cpu_seconds >= 0.9
+    assert process.result.usage.max_rss_bytes > 0
+
+
+def test_exec_reports_rusage_and_session_totals(router, monkeypatch):
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    response = router.execute("exec ls")
+    assert response.status == "ok"
+    assert set(response.meta["rusage"]) == {"user_cpu", "sys_cpu", "max_rss_bytes", "block_reads", "block_writes"}
+    assert response.meta["session_usage"]["commands"] == 1
+    assert response.meta["queue_ms"] >= 0.0
+    assert router.session.usage.commands == 1
+
+    failed = router.execute("exec ls missing-file")
+    assert failed.status == "error"
+    assert "rusage" in failed.meta
+    assert router.session.usage.commands == 2
+
+
+def test_exec_throttles_session_over_cpu_budget(router, monkeypatch):
+    monkeypatch.setenv("ALLOW_SUBPROCESS", "true")
+    monkeypatch.setattr(subprocess_adapter, "SESSION_CPU_BUDGET", 1.0)
+    router.session.usage.record(cpu_seconds=1.5)
+    response = router.execute("exec echo hello")
+    assert response.status == "error"
+    assert "CPU budget" in response.stderr
+    assert router.session.usage.commands == 1
+
+
+def test_usage_totals_retry_after_slides_with_window():
+    totals = UsageTotals()
+    totals.record(2.0, now=100.0)
+    totals.record(3.0, now=110.0)
+    assert totals.recent_cpu(60, now=115.0) == 5.0
+    assert totals.retry_after(budget=10.0, window=60, now=115.0) == 0.0
+    # Dropping the first command is enough to get under a 4s budget.
+    assert totals.retry_after(budget=4.0, window=60, now=115.0) == pytest.approx(45.0)
+    assert totals.retry_after(budget=4.0, window=60, now=161.0) == 0.0
@@ -0,0 +1,127 @@
+import subprocess
+import threading
+import time
+
+import pytest
+
+from core.errors import CommandError
+from core.registry import create_default_registry
+from core.router import CommandRouter
+from core.session import SessionContext
+from core.streaming import StreamClosedError
+from fs import paths, textops
+
+
+@pytest.fixture
+def router(workspace):
+    (workspace / "lines.txt").write_text("".join(f"line {idx} of text\n" for idx in range(1, 100_001)))
+    (workspace / "partial.txt").write_text("one two\nthree  four\tfive")
+    (workspace / "empty.txt").write_text("")
+    return CommandRouter(create_default_registry(), SessionContext(cwd=paths.WORKSPACE_ROOT))
+
+
+def _binary(workspace, *command):
+    return subprocess.run(command, cwd=workspace, capture_output=True, text=True).stdout.rstrip("\n")
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "head lines.txt",
+        "head -n 3 lines.txt partial.txt",
+        "head -c 7 lines.txt",
+        "head -n 5 partial.txt",
+        "head -n 0 lines.txt",
+        "tail lines.txt",
+        "tail -n 2 partial.txt",
+        "tail -n 70000 lines.txt",
+        "tail -c 12 lines.txt",
+        "tail -n +99998 lines.txt",
+        "tail -c +3 partial.txt",
+        "tail -q -n 1 lines.txt partial.txt",
+        "tail empty.txt",
+    ],
+)
+def test_head_tail_match_coreutils(router, workspace, command):
+    response = router.execute(command, paginate=False)
+    assert response.status == "ok", response.stderr
+    assert response.stdout == _binary(workspace, *command.split())
+
+
+def test_wc_matches_coreutils(router, workspace, monkeypatch):
+    # Small chunks so words and lines straddle chunk boundaries.
+    monkeypatch.setattr(textops, "COUNT_CHUNK", 4093)
+    for command in ("wc lines.txt partial.txt empty.txt", "wc -l lines.txt", "wc -w -c partial.txt"):
+        response = router.execute(command)
+        assert response.status == "ok", response.stderr
+        expected = [line.split() for line in _binary(workspace, *command.split()).splitlines()]
+        assert [line.split() for line in response.stdout.splitlines()] == expected
+
+
+def test_wc_records(router):
+    response = router.execute("wc --json partial.txt")
+    assert response.records.as_dicts() == [{"lines": 1, "words": 5, "bytes": 24, "name": "partial.txt"}]
+
+
+def test_tail_reads_only_the_end(router, workspace, monkeypatch):
+    reads = []
+    real_open = open
+
+    class Counting:
+        def __init__(self, handle):
+            self._handle = handle
+
+        def read(self, size=-1):
+            data = self._handle.read(size)
+            reads.append(len(data))
+            return data
+
+        def __getattr__(self, name):
+            return getattr(self._handle, name)
+
+    with real_open(workspace / "lines.txt", "rb") as handle:
+        tail = textops.read_tail(Counting(handle), "lines", 3)
+    assert tail == b"line 99998 of text\nline 99999 of text\nline 100000 of text\n"
+    assert sum(reads) <= textops.READ_BLOCK + 1
+
+
+def test_jail_and_errors(router):
+    assert "escapes workspace root" in router.execute("head ../etc/passwd").stderr
+    assert router.execute("tail -x lines.txt").status == "error"
+    assert router.execute("tail -f lines.txt").stderr.startswith("tail -f needs a streaming session")
+
+
+def test_tail_follow_streams_appended_data(router, workspace, monkeypatch):
+    monkeypatch.setattr(textops, "FOLLOW_INTERVAL", 0.01)
+    log = workspace / "app.log"
+    log.write_text("first\n")
+    events = []
+    done = threading.Event()
+
+    def sink(event, data):
+        events.append(data)
+        if "third" in data:
+            done.set()
+            raise StreamClosedError("Stream closed by client.")
+
+    router.session.sink = sink
+    worker = threading.Thread(target=router.execute, args=("tail -f app.log",))
+    worker.start()
+    time.sleep(0.05)
+    with log.open("a") as handle:
+        handle.write("second\n")
+        handle.flush()
+        time.sleep(0.05)
+        handle.write("third\n")
+    assert done.wait(5)
+    worker.join(5)
+    assert "".join(events) == "first\nsecond\nthird\n"
+
+
+def test_tail_access_skips_locks_when_following(router):
+    ctx = router.session
+    assert textops.head_tail_access(ctx, ["-f", "lines.txt"]).reads == frozenset()
+    access = textops.head_tail_access(ctx, ["-n", "5", "lines.txt", "partial.txt"])
+    assert {path.name for path in access.reads} == {"lines.txt", "partial.txt"}
+    with pytest.raises(CommandError):
+        textops.head_tail_access(ctx, ["-x"])
@@ -2,17 +2,38 @@
 Autocomplete and history functionality for the terminal UI.
 """
 
+import weakref
+
 import streamlit as st
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from core.history import HistoryStore
 from core.registry import CommandRegistry
-from fs.ops import (
-    pwd_handler, cd_handler, ls_handler, mkdir_handler,
-    rm_handler, mv_handler, cp_handler, touch_handler, cat_handler
-)
+from ui.completion import CompletionEngine
+
+
+_engines: "weakref.WeakKeyDictionary[CommandRegistry, CompletionEngine]" = weakref.WeakKeyDictionary()
 
 
-def get_command_suggestions(command: str, registry: CommandRegistry, cwd: Path) -> List[str]:
+def get_completion_engine(registry: CommandRegistry) -> CompletionEngine:
+    """
+    Return the shared completion engine for a registry.
+    
+    Args:
+        registry: Command registry
+        
+    Returns:
+        Completion engine whose trie and listing cache persist across calls
+    """
+    engine = _engines.get(registry)
+    if engine is None:
+        engine = CompletionEngine(registry)
+        _engines[registry] = engine
+    return engine
+
+
+def get_command_suggestions(command: str, registry: CommandRegistry, cwd: Path,
+                            history: Optional[HistoryStore] = None) -> List[str]:
     """
     Get command suggestions based on input.
     
@@ -20,72 +41,20 @@ def get_command_suggestions(command: str, registry: CommandRegistry, cwd: Path)
         command: Current command input
         registry: Command registry
         cwd: Current working directory
+        history: Persistent history whose frecency scores rank suggestions
         
     Returns:
         List of command suggestions
     """
-    suggestions = []
-    
-    # Split command into tokens
-    tokens = command.strip().split()
-    
-    if len(tokens) == 0:
-        # No tokens - suggest all commands
-        commands = registry.list_commands()
-        suggestions.extend(commands)
-    elif len(tokens) == 1:
-        # Single token - partial match commands
-        first_token = tokens[0]
-        commands = registry.list_commands()
-        matching_commands = [cmd for cmd in commands if cmd.startswith(first_token)]
-        suggestions.extend(matching_commands[:5])  # Top 5 suggestions
-    else:
-        # Multiple tokens - suggest filesystem entries for current argument
-        # Get the last token (current argument being typed)
-        current_arg = tokens[-1] if tokens[-1] else ""
-        
-        # Determine if we're suggesting for a path
-        if len(tokens) >= 2:
-            # Check if the command supports path arguments
-            command_name = tokens[0]
-            if command_name in ['cd', 'ls', 'rm', 'mv', 'cp', 'cat']:
-                # Get the path to complete
-                path_to_complete = current_arg
-                
-                # If path starts with '/', use absolute path, otherwise relative to cwd
-                if path_to_complete.startswith('/'):
-                    target_path = Path(path_to_complete)
-                else:
-                    target_path = cwd / path_to_complete
-                
-                # Try to resolve the path
-                try:
-                    if target_path.exists():
-                        # If it's a directory, list its contents
-                        if target_path.is_dir():
-                            # Get directory contents
-                            contents = []
-                            for item in target_path.iterdir():
-                                if item.is_dir():
-                                    contents.append(f"{item.name}/")
-                                else:
-                                    contents.append(item.name)
-                            # Sort directories first, then files
-                            dirs = [c for c in contents if c.endswith('/')]
-                            files = [c for c in contents if not c.endswith('/')]
-                            suggestions.extend(sorted(dirs) + sorted(files))
-                        else:
-                            # If it's a file, suggest the file itself
-                            suggestions.append(target_path.name)
-                except Exception:
-                    # If we can't resolve the path, suggest nothing
-                    pass
-    
-    return suggestions
+    engine = get_completion_engine(registry)
+    if history is not None:
+        engine.set_scores(history.frecency_scores())
+    return engine.suggest(command, Path(cwd))
 
 
 def render_autocomplete_suggestions(command: str, registry: CommandRegistry, cwd: Path, 
-                                   key_prefix: str = "auto") -> None:
+                                   key_prefix: str = "auto",
+                                   history: Optional[HistoryStore] = None) -> Optional[str]:
     """
     Render autocomplete suggestions below the input field.
     
@@ -94,8 +63,10 @@ def render_autocomplete_suggestions(command: str, registry: CommandRegistry, cwd
         registry: Command registry
         cwd: Current working directory
         key_prefix: Prefix for Streamlit component keys
+        history: The session's persistent history (``SessionContext.history_store``),
+            so suggestions are ranked by frecency
     """
-    suggestions = get_command_suggestions(command, registry, cwd)
+    suggestions = get_command_suggestions(command, registry, cwd, history)
     
     if suggestions:
         st.write("Suggestions:")
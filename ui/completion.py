@@ -0,0 +1,373 @@
+"""Indexed, ranked completion for command names and workspace paths."""
+
+from __future__ import annotations
+
+import heapq
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from core.errors import RootEscapeError
+from core.registry import CommandRegistry
+from fs.paths import resolve_in_root
+
+__all__ = [
+    "CommandTrie",
+    "CompletionEngine",
+    "DirectoryListing",
+    "DirectoryListingCache",
+    "PATH_COMMANDS",
+    "fuzzy_score",
+]
+
+PATH_COMMANDS = frozenset(
+    {"cd", "ls", "rm", "mv", "cp", "cat", "touch", "mkdir", "head", "tail", "wc", "sort", "uniq"}
+    | {"sha256sum", "hashsum", "dedupe", "archive", "extract"}
+)
+
+# Time allowed for the fuzzy fallback scan when prefix matches don't fill the top K.
+DEFAULT_FUZZY_BUDGET = 0.0005
+# Prefix matches always outrank pure subsequence matches.
+PREFIX_BONUS = 10.0
+# How many candidates per requested result are scored before picking the top K.
+PREFIX_OVERSCAN = 4
+# Size of the blob slices scanned between fuzzy time-budget checks.
+SEGMENT_CHARS = 8 * 1024
+
+
+class CommandTrie:
+    """Prefix tree over command names."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self._root: Dict[str, dict] = {}
+        for word in words:
+            self.insert(word)
+
+    def insert(self, word: str) -> None:
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = word
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Return words starting with *prefix* in lexicographic order."""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        results: List[str] = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if "" in current:
+                results.append(current[""])
+                if limit is not None and len(results) >= limit:
+                    break
+            for key in sorted((k for k in current if k), reverse=True):
+                stack.append(current[key])
+        return results
+
+
+@dataclass(frozen=True)
+class DirectoryListing:
+    """Snapshot of a directory, sorted by lowercase name for prefix bisection."""
+
+    mtime_ns: int
+    keys: Tuple[str, ...]
+    names: Tuple[str, ...]
+    is_dir: Tuple[bool, ...]
+    # "\n" + one lowercase key per line, scanned by the fuzzy regex.
+    blob: str
+    chars: FrozenSet[str]
+    # (start offset, end offset, first key index, end key index) per blob slice.
+    segments: Tuple[Tuple[int, int, int, int], ...]
+
+    @classmethod
+    def scan(cls, directory: Path, mtime_ns: int) -> "DirectoryListing":
+        entries: List[Tuple[str, str, bool]] = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    # d_type from the directory read answers this without a stat call.
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name.lower(), entry.name, is_dir))
+        entries.sort()
+        keys = tuple(item[0] for item in entries)
+        blob = "".join("\n" + key for key in keys)
+        return cls(
+            mtime_ns=mtime_ns,
+            keys=keys,
+            names=tuple(item[1] for item in entries),
+            is_dir=tuple(item[2] for item in entries),
+            blob=blob,
+            chars=frozenset(blob),
+            segments=_segments(blob),
+        )
+
+    def prefix_range(self, prefix: str) -> range:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return range(lo, hi)
+
+    def index_of_key(self, key: str) -> int:
+        return bisect_left(self.keys, key)
+
+    def index_of(self, name: str) -> Optional[int]:
+        key = name.lower()
+        idx = bisect_left(self.keys, key)
+        while idx < len(self.keys) and self.keys[idx] == key:
+            if self.names[idx] == name:
+                return idx
+            idx += 1
+        return None
+
+
+def _segments(blob: str, size: int = SEGMENT_CHARS) -> Tuple[Tuple[int, int, int, int], ...]:
+    bounds: List[Tuple[int, int, int, int]] = []
+    start = 0
+    first = 0
+    while start < len(blob):
+        end = blob.find("\n", start + size)
+        end = len(blob) if end < 0 else end
+        count = blob.count("\n", start, end)
+        bounds.append((start, end, first, first + count))
+        first += count
+        start = end
+    return tuple(bounds)
+
+
+class DirectoryListingCache:
+    """LRU cache of directory listings, invalidated by the directory's mtime."""
+
+    def __init__(self, max_dirs: int = 256) -> None:
+        self.max_dirs = max(1, max_dirs)
+        self._listings: "OrderedDict[Path, DirectoryListing]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, directory: Path) -> DirectoryListing:
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = self._listings.get(directory)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            self._listings.move_to_end(directory)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        listing = DirectoryListing.scan(directory, mtime_ns)
+        self._listings[directory] = listing
+        self._listings.move_to_end(directory)
+        while len(self._listings) > self.max_dirs:
+            self._listings.popitem(last=False)
+        return listing
+
+    def invalidate(self, directory: Optional[Path] = None) -> None:
+        if directory is None:
+            self._listings.clear()
+        else:
+            self._listings.pop(directory, None)
+
+
+def fuzzy_score(query: str, candidate: str) -> Optional[float]:
+    """Score *candidate* as a subsequence match for *query* (both lowercase).
+
+    Returns None when *query* is not a subsequence. Consecutive runs, matches at
+    the start or after a separator score higher; long candidates score lower.
+    """
+    if not query:
+        return 0.0
+    score = 0.0
+    pos = 0
+    prev = -2
+    for char in query:
+        found = candidate.find(char, pos)
+        if found < 0:
+            return None
+        if found == prev + 1:
+            score += 2.0
+        elif found == 0 or candidate[found - 1] in "._- /":
+            score += 1.5
+        else:
+            score += 0.5
+        prev = found
+        pos = found + 1
+    if candidate.startswith(query):
+        score += 4.0
+    return score / len(query) - 0.01 * len(candidate)
+
+
+def _subsequence_pattern(query: str) -> "re.Pattern[str]":
+    # The literal "\n" lead lets the regex engine skip between lines quickly, and
+    # "[^\nc]*c" jumps to the next occurrence of c without backtracking.
+    parts = []
+    for char in query:
+        escaped = re.escape(char)
+        parts.append(f"[^\n{escaped}]*{escaped}")
+    return re.compile("\n" + "".join(parts) + "[^\n]*")
+
+
+class CompletionEngine:
+    """Complete command names and in-jail paths, ranked by match quality and recency."""
+
+    def __init__(
+        self,
+        registry: CommandRegistry,
+        listing_cache: Optional[DirectoryListingCache] = None,
+        fuzzy_budget: float = DEFAULT_FUZZY_BUDGET,
+    ) -> None:
+        self.registry = registry
+        self.listings = listing_cache or DirectoryListingCache()
+        self.fuzzy_budget = fuzzy_budget
+        self._trie: Optional[CommandTrie] = None
+        self._trie_names: Tuple[str, ...] = ()
+        self._trie_version = -1
+        self._last_used: Dict[str, float] = {}
+        self._scores: Dict[str, float] = {}
+
+    # -- usage ------------------------------------------------------------------
+
+    def record_use(self, token: str) -> None:
+        """Mark *token* (a command name or completed path) as just used."""
+        self._last_used[token] = time.time()
+
+    def set_scores(self, scores: Mapping[str, float]) -> None:
+        """Replace the long-term usage scores (e.g. history frecency)."""
+        self._scores = dict(scores)
+
+    def _usage_bonus(self, token: str) -> float:
+        bonus = min(self._scores.get(token, 0.0), 10.0) / 5.0
+        stamp = self._last_used.get(token)
+        if stamp is not None:
+            # Recent picks decay over roughly an hour.
+            bonus += 2.0 / (1.0 + max(0.0, time.time() - stamp) / 3600.0)
+        return bonus
+
+    # -- commands ---------------------------------------------------------------
+
+    def _command_trie(self) -> CommandTrie:
+        if self._trie is None or self._trie_version != self.registry.version:
+            names = self.registry.list_commands()
+            self._trie = CommandTrie(names)
+            self._trie_names = tuple(names)
+            self._trie_version = self.registry.version
+        return self._trie
+
+    def complete_command(self, prefix: str, limit: int = 5) -> List[str]:
+        trie = self._command_trie()
+        if not prefix:
+            return list(self._trie_names)
+        lowered = prefix.lower()
+        matches = trie.complete(prefix)
+        if len(matches) < limit:
+            seen = set(matches)
+            matches.extend(
+                name for name in self._trie_names if name not in seen and fuzzy_score(lowered, name) is not None
+            )
+        ranked = sorted(
+            matches,
+            key=lambda name: (-((fuzzy_score(lowered, name) or 0.0) + self._usage_bonus(name)), name),
+        )
+        return ranked[:limit]
+
+    # -- paths ------------------------------------------------------------------
+
+    def complete_path(self, partial: str, cwd: Path, limit: int = 10) -> List[str]:
+        """Complete the last component of *partial*, staying inside the workspace."""
+        dir_part, sep, name_part = partial.rpartition("/")
+        base = dir_part + sep
+        try:
+            directory = resolve_in_root((dir_part or "/") if sep else ".", cwd)
+        except RootEscapeError:
+            return []
+        try:
+            listing = self.listings.get(directory)
+        except OSError:
+            return []
+
+        query = name_part.lower()
+        show_hidden = query.startswith(".")
+        seen: Set[int] = set()
+        scored: List[Tuple[float, str]] = []
+
+        def consider(idx: int, bonus: float) -> None:
+            if idx in seen:
+                return
+            seen.add(idx)
+            name = listing.names[idx]
+            if name.startswith(".") and not show_hidden:
+                return
+            score = fuzzy_score(query, listing.keys[idx])
+            if score is None:
+                return
+            text = base + name + ("/" if listing.is_dir[idx] else "")
+            scored.append((bonus + score + self._usage_bonus(text), text))
+
+        # Previously used entries in this directory compete regardless of position.
+        for token in self._used_tokens():
+            if token.startswith(base):
+                idx = listing.index_of(token[len(base):].rstrip("/"))
+                if idx is not None:
+                    consider(idx, PREFIX_BONUS if listing.keys[idx].startswith(query) else 0.0)
+
+        # Sorted order puts the shortest names of each stem first, so the head of
+        # the prefix range holds the best-scoring prefix matches.
+        prefix = listing.prefix_range(query)
+        for idx in prefix[: limit * PREFIX_OVERSCAN]:
+            consider(idx, PREFIX_BONUS)
+
+        if query and len(prefix) < limit:
+            self._fuzzy_paths(listing, query, limit * PREFIX_OVERSCAN, consider)
+
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [text for _, text in best]
+
+    def _used_tokens(self) -> Set[str]:
+        return set(self._scores) | set(self._last_used)
+
+    def _fuzzy_paths(self, listing: DirectoryListing, query: str, wanted: int, consider) -> None:
+        if not set(query) <= listing.chars:
+            return
+        pattern = _subsequence_pattern(query)
+        deadline = time.perf_counter() + self.fuzzy_budget
+        # Names sharing the query's first letter are the likeliest hits, so their
+        # slices are scanned first; the rest follow while time remains.
+        bucket = listing.prefix_range(query[0])
+        preferred = [seg for seg in listing.segments if seg[2] < bucket.stop and seg[3] > bucket.start]
+        others = [seg for seg in listing.segments if not (seg[2] < bucket.stop and seg[3] > bucket.start)]
+        found = 0
+        # Scanning slice by slice keeps the time budget even when matches are
+        # sparse and one regex pass would otherwise run to the end.
+        for start, end, _, _ in preferred + others:
+            for match in pattern.finditer(listing.blob, start, end):
+                consider(listing.index_of_key(match.group(0)[1:]), 0.0)
+                found += 1
+                if found >= wanted:
+                    return
+            if time.perf_counter() > deadline:
+                return
+
+    # -- entry point ------------------------------------------------------------
+
+    def suggest(self, command: str, cwd: Path, limit: int = 10) -> List[str]:
+        """Suggestions for the token under the cursor at the end of *command*."""
+        tokens = command.split()
+        trailing_space = command.endswith(" ") and bool(tokens)
+        if not tokens:
+            return self.complete_command("")
+        if len(tokens) == 1 and not trailing_space:
+            return self.complete_command(tokens[0], limit=min(limit, 5))
+        if tokens[0] not in PATH_COMMANDS:
+            return []
+        current = "" if trailing_space else tokens[-1]
+        if current.startswith("-"):
+            return []
+        return self.complete_path(current, cwd, limit=limit)
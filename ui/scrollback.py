@@ -0,0 +1,109 @@
+"""Bounded terminal scrollback with cached HTML fragments."""
+
+from __future__ import annotations
+
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ui.render import emit_stderr, emit_stdout
+from ui.scrollback_store import DEFAULT_HOT_ENTRIES, ScrollbackStore
+
+__all__ = ["Scrollback", "DEFAULT_LIMIT", "DEFAULT_PAGE_SIZE"]
+
+DEFAULT_LIMIT = int(os.getenv("SCROLLBACK_LIMIT", "1000"))
+DEFAULT_PAGE_SIZE = int(os.getenv("SCROLLBACK_PAGE_SIZE", "50"))
+
+
+def _render_entry(channel: str, payload: str) -> str:
+    return emit_stderr(payload) if channel == "err" else emit_stdout(payload)
+
+
+class Scrollback:
+    """Ring buffer of ``(channel, payload)`` entries for the terminal view.
+
+    Entries past ``limit`` are dropped oldest first. Payloads live in a tiered
+    ``ScrollbackStore``; rendered HTML is kept for the most recent fragments
+    only, so each visible entry is escaped once and the visible window is
+    rendered as a single string whose cost depends on the window size, not the
+    session length.
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_LIMIT,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        store: Optional[ScrollbackStore] = None,
+    ) -> None:
+        self.limit = max(1, limit)
+        self.page_size = max(1, page_size)
+        if store is None:
+            store = ScrollbackStore(hot_entries=max(self.page_size, DEFAULT_HOT_ENTRIES))
+        self._store = store
+        self._html: "OrderedDict[int, str]" = OrderedDict()
+        self._html_bytes = 0
+        self._html_limit = 4 * self.page_size
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        for seq in list(self._store.seqs()):
+            yield self._store.get(seq)
+
+    def append(self, entry: Tuple[str, str]) -> None:
+        """Add an entry; mirrors ``list.append`` on ``(channel, payload)`` tuples."""
+        channel, payload = entry
+        self._store.put(self._next_seq, channel, payload)
+        self._next_seq += 1
+        while len(self._store) > self.limit:
+            seq = self._store.pop_oldest()
+            self._drop_html(seq)
+
+    def clear(self) -> None:
+        self._store.clear()
+        self._html.clear()
+        self._html_bytes = 0
+
+    def visible_count(self, pages: int = 1) -> int:
+        return min(len(self._store), max(1, pages) * self.page_size)
+
+    def has_older(self, pages: int = 1) -> bool:
+        return self.visible_count(pages) < len(self._store)
+
+    def window(self, pages: int = 1) -> List[int]:
+        """Return the sequence numbers of the newest ``pages * page_size`` entries, oldest first."""
+        return self._store.newest(self.visible_count(pages))
+
+    def render(self, pages: int = 1) -> str:
+        """Return the visible window as one HTML string."""
+        fragments: List[str] = []
+        for seq in self.window(pages):
+            block = self._html.get(seq)
+            if block is None:
+                block = _render_entry(*self._store.get(seq))
+                self._cache_html(seq, block)
+            else:
+                self._html.move_to_end(seq)
+            if block:
+                fragments.append(block)
+        return "".join(fragments)
+
+    def memory_usage(self) -> Dict[str, int]:
+        usage = self._store.memory_usage()
+        usage["html_bytes"] = self._html_bytes
+        return usage
+
+    def _cache_html(self, seq: int, block: str) -> None:
+        self._html[seq] = block
+        self._html_bytes += sys.getsizeof(block)
+        while len(self._html) > self._html_limit:
+            _, old = self._html.popitem(last=False)
+            self._html_bytes -= sys.getsizeof(old)
+
+    def _drop_html(self, seq: Optional[int]) -> None:
+        block = self._html.pop(seq, None) if seq is not None else None
+        if block is not None:
+            self._html_bytes -= sys.getsizeof(block)
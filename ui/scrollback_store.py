@@ -0,0 +1,189 @@
+"""Tiered per-session storage for scrollback payloads.
+
+Recent entries stay as plain strings, older ones are zlib-compressed in
+memory, and once the compressed tier exceeds its byte budget the oldest blobs
+are appended to an anonymous spill file and located through an offset index.
+
+The spill file is only appended to, but it is not kept forever: once most of
+it belongs to dropped entries, the live blobs are copied to a new spill file
+that replaces it (with a new index) only after the copy has finished.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import zlib
+from collections import OrderedDict, deque
+from typing import IO, Deque, Dict, Iterator, List, Optional, Tuple
+
+__all__ = ["ScrollbackStore", "DEFAULT_HOT_ENTRIES", "DEFAULT_MEMORY_BUDGET"]
+
+DEFAULT_HOT_ENTRIES = int(os.getenv("SCROLLBACK_HOT_ENTRIES", "100"))
+DEFAULT_MEMORY_BUDGET = int(os.getenv("SCROLLBACK_MEMORY_BYTES", str(1024 * 1024)))
+
+# Dead bytes tolerated in the spill file before it is rewritten.
+_COMPACT_MIN_DEAD = 4 * 1024 * 1024
+
+
+class ScrollbackStore:
+    """Sequence-numbered ``(channel, payload)`` storage with three tiers."""
+
+    def __init__(
+        self,
+        hot_entries: int = DEFAULT_HOT_ENTRIES,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        compress_level: int = 6,
+    ) -> None:
+        self.hot_entries = max(1, hot_entries)
+        self.memory_budget = max(0, memory_budget)
+        self.compress_level = compress_level
+        self._hot: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+        self._warm: "OrderedDict[int, Tuple[str, bytes]]" = OrderedDict()
+        self._cold: Dict[int, Tuple[str, int, int]] = {}
+        self._order: Deque[int] = deque()
+        self._hot_bytes = 0
+        self._warm_bytes = 0
+        self._spill: Optional[IO[bytes]] = None
+        self._spill_size = 0
+        self._spill_live = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, seq: int) -> bool:
+        return seq in self._hot or seq in self._warm or seq in self._cold
+
+    def seqs(self) -> Iterator[int]:
+        return iter(self._order)
+
+    def newest(self, count: int) -> List[int]:
+        """Return the ``count`` most recent sequence numbers, oldest first."""
+        # Random access into a deque is O(n) away from its ends, so walk from the right.
+        tail: List[int] = []
+        for seq in reversed(self._order):
+            if len(tail) >= count:
+                break
+            tail.append(seq)
+        tail.reverse()
+        return tail
+
+    def put(self, seq: int, channel: str, payload: str) -> None:
+        self._order.append(seq)
+        self._hot[seq] = (channel, payload)
+        self._hot_bytes += sys.getsizeof(payload)
+        while len(self._hot) > self.hot_entries:
+            old_seq, (old_channel, old_payload) = self._hot.popitem(last=False)
+            self._hot_bytes -= sys.getsizeof(old_payload)
+            blob = zlib.compress(old_payload.encode("utf-8"), self.compress_level)
+            self._warm[old_seq] = (old_channel, blob)
+            self._warm_bytes += len(blob)
+        while self._warm and self._warm_bytes > self.memory_budget:
+            old_seq, (old_channel, blob) = self._warm.popitem(last=False)
+            self._warm_bytes -= len(blob)
+            self._spill_blob(old_seq, old_channel, blob)
+
+    def get(self, seq: int) -> Tuple[str, str]:
+        """Return ``(channel, payload)``, decompressing older entries on demand."""
+        hot = self._hot.get(seq)
+        if hot is not None:
+            return hot
+        warm = self._warm.get(seq)
+        if warm is not None:
+            channel, blob = warm
+            return channel, zlib.decompress(blob).decode("utf-8")
+        cold = self._cold.get(seq)
+        if cold is None:
+            raise KeyError(seq)
+        channel, offset, length = cold
+        assert self._spill is not None
+        self._spill.seek(offset)
+        return channel, zlib.decompress(self._spill.read(length)).decode("utf-8")
+
+    def pop_oldest(self) -> Optional[int]:
+        """Drop the oldest entry from whichever tier holds it."""
+        if not self._order:
+            return None
+        seq = self._order.popleft()
+        if seq in self._hot:
+            _, payload = self._hot.pop(seq)
+            self._hot_bytes -= sys.getsizeof(payload)
+        elif seq in self._warm:
+            _, blob = self._warm.pop(seq)
+            self._warm_bytes -= len(blob)
+        else:
+            _, _, length = self._cold.pop(seq)
+            self._spill_live -= length
+            self._maybe_compact()
+        return seq
+
+    def clear(self) -> None:
+        self._hot.clear()
+        self._warm.clear()
+        self._cold.clear()
+        self._order.clear()
+        self._hot_bytes = self._warm_bytes = 0
+        self._close_spill()
+
+    def close(self) -> None:
+        self.clear()
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Report entry counts and bytes held per tier."""
+        return {
+            "entries": len(self._order),
+            "hot_entries": len(self._hot),
+            "hot_bytes": self._hot_bytes,
+            "compressed_entries": len(self._warm),
+            "compressed_bytes": self._warm_bytes,
+            "spilled_entries": len(self._cold),
+            "spilled_bytes": self._spill_size,
+        }
+
+    def _spill_blob(self, seq: int, channel: str, blob: bytes) -> None:
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(prefix="scrollback-")
+            self._spill_size = self._spill_live = 0
+        self._spill.seek(0, os.SEEK_END)
+        self._spill.write(blob)
+        self._cold[seq] = (channel, self._spill_size, len(blob))
+        self._spill_size += len(blob)
+        self._spill_live += len(blob)
+
+    def _maybe_compact(self) -> None:
+        if self._spill is None:
+            return
+        if not self._cold:
+            self._close_spill()
+            return
+        dead = self._spill_size - self._spill_live
+        if dead < max(_COMPACT_MIN_DEAD, self._spill_live):
+            return
+        fresh = tempfile.TemporaryFile(prefix="scrollback-")
+        cold: Dict[int, Tuple[str, int, int]] = {}
+        size = 0
+        try:
+            for seq in self._order:
+                entry = self._cold.get(seq)
+                if entry is None:
+                    continue
+                channel, offset, length = entry
+                self._spill.seek(offset)
+                fresh.write(self._spill.read(length))
+                cold[seq] = (channel, size, length)
+                size += length
+            fresh.flush()
+        except OSError:
+            # The old file and index are untouched; try again on a later pop.
+            fresh.close()
+            return
+        self._spill.close()
+        self._spill, self._cold = fresh, cold
+        self._spill_size = self._spill_live = size
+
+    def _close_spill(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+        self._spill = None
+        self._spill_size = self._spill_live = 0